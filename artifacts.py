@@ -0,0 +1,129 @@
+# artifacts.py
+import hashlib
+import io
+import os
+import queue
+import threading
+from collections import deque
+from typing import Callable, Dict, Optional, TextIO
+
+# Renders one artifact into a text sink, e.g. functools.partial(pddl_ast.write_domain, domain).
+# Sinks may call it later on another thread, so it must not depend on objects the
+# request goes on to modify.
+Writer = Callable[[TextIO], None]
+
+# Captures queued for AsyncArtifactStore before new ones are dropped
+MAX_PENDING = 256
+
+
+def _render(write: Writer) -> str:
+    text = io.StringIO()
+    write(text)
+    return text.getvalue()
+
+
+class ArtifactSink:
+    """Where planning artifacts (the PDDL handed to solvers) go."""
+
+    def capture(self, kind: str, write: Writer) -> None:
+        pass
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every capture so far is stored; False on timeout."""
+        return True
+
+    def close(self) -> None:
+        pass
+
+
+class NullArtifactSink(ArtifactSink):
+    """Discards every artifact; the default, so capture costs one method call."""
+
+
+class MemoryArtifactSink(ArtifactSink):
+    """Keeps the rendered text of the last `limit` artifacts, e.g. for tests or a debug view."""
+
+    def __init__(self, limit: int = 64):
+        self.artifacts = deque(maxlen=limit)  # (kind, text), oldest first
+        self._lock = threading.Lock()
+
+    def capture(self, kind: str, write: Writer) -> None:
+        text = _render(write)
+        with self._lock:
+            self.artifacts.append((kind, text))
+
+    def latest(self, kind: str) -> Optional[str]:
+        with self._lock:
+            for artifact_kind, text in reversed(self.artifacts):
+                if artifact_kind == kind:
+                    return text
+        return None
+
+
+class AsyncArtifactStore(ArtifactSink):
+    """
+    Content-addressed files written by a background thread. capture() only
+    queues the writer; rendering, hashing and disk I/O happen off the
+    request thread. Each artifact lands in `directory` as
+    <kind>-<sha1 prefix><suffix>, so identical content is stored once and
+    concurrent requests never overwrite each other. When `max_pending`
+    captures are waiting, new ones are dropped and counted rather than
+    blocking the caller.
+    """
+
+    def __init__(self, directory: str, suffix: str = '.pddl', max_pending: int = MAX_PENDING):
+        self.directory = directory
+        self.suffix = suffix
+        self.paths: Dict[str, str] = {}  # kind -> path of the latest stored artifact
+        self.written = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._worker = threading.Thread(target=self._run, name='artifact-store', daemon=True)
+        self._worker.start()
+
+    def capture(self, kind: str, write: Writer) -> None:
+        try:
+            self._queue.put_nowait((kind, write))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        done = threading.Event()
+        # The marker is handled after everything queued before it
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._worker.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            try:
+                self._store(*item)
+            except Exception as e:
+                self.failed += 1
+                print(f"[ARTIFACTS] Could not store {item[0]}: {e}")
+
+    def _store(self, kind: str, write: Writer):
+        data = _render(write).encode('utf-8')
+        digest = hashlib.sha1(data).hexdigest()[:16]
+        path = os.path.join(self.directory, f"{kind}-{digest}{self.suffix}")
+        if os.path.exists(path):
+            self.deduplicated += 1
+        else:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self.written += 1
+        self.paths[kind] = path
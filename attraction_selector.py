@@ -0,0 +1,153 @@
+# attraction_selector.py
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional
+
+# Up to this many candidates the exact DP is used; above it, branch-and-bound
+DP_LIMIT = 12
+
+DEFAULT_TIME_LIMIT_MS = 50.0
+
+
+@dataclass
+class Selection:
+    """Chosen candidates (in input order) and the resources they use."""
+    items: List[Any] = field(default_factory=list)
+    value: float = 0.0
+    cost: float = 0.0
+    minutes: float = 0.0
+    optimal: bool = True  # False if the time limit cut the search short
+
+
+def select_attractions(candidates: List[Any], value: Callable, cost: Callable, duration: Callable,
+                       budget: float, minutes: float, max_items: Optional[int] = None,
+                       time_limit_ms: float = DEFAULT_TIME_LIMIT_MS) -> Selection:
+    """
+    Prize-collecting selection: maximise total `value` subject to total
+    `cost` <= budget, total `duration` <= minutes and at most `max_items`
+    picks. Small inputs are solved exactly by DP; larger ones by
+    branch-and-bound with LP bounds, returning the incumbent when the time
+    limit runs out.
+    """
+    max_items = len(candidates) if max_items is None else max_items
+    items = []
+    for index, candidate in enumerate(candidates):
+        v, c, d = value(candidate), cost(candidate), duration(candidate)
+        if v > 0 and c <= budget and d <= minutes:
+            items.append((v, c, d, index))
+    if not items or max_items <= 0 or budget < 0 or minutes < 0:
+        return Selection()
+
+    if len(items) <= DP_LIMIT:
+        chosen, optimal = _knapsack_dp(items, budget, minutes, max_items), True
+    else:
+        deadline = time.monotonic() + time_limit_ms / 1000.0
+        chosen, optimal = _branch_and_bound(items, budget, minutes, max_items, deadline)
+
+    chosen = sorted(chosen, key=lambda item: item[3])
+    return Selection(
+        items=[candidates[item[3]] for item in chosen],
+        value=sum(item[0] for item in chosen),
+        cost=sum(item[1] for item in chosen),
+        minutes=sum(item[2] for item in chosen),
+        optimal=optimal
+    )
+
+
+# ---------------------------------------------------------------------
+# EXACT: DP OVER REACHABLE (COST, MINUTES, COUNT) USAGE
+# ---------------------------------------------------------------------
+def _knapsack_dp(items, budget, minutes, max_items):
+    # usage -> (value, chosen items); equal usage keeps only the better value
+    table = {(0, 0, 0): (0.0, ())}
+    for item in items:
+        v, c, d, _ = item
+        for (used_cost, used_minutes, count), (total, chosen) in list(table.items()):
+            key = (used_cost + c, used_minutes + d, count + 1)
+            if key[0] > budget or key[1] > minutes or key[2] > max_items:
+                continue
+            if total + v > table.get(key, (-1.0, None))[0]:
+                table[key] = (total + v, chosen + (item,))
+    return max(table.values(), key=lambda entry: entry[0])[1]
+
+
+# ---------------------------------------------------------------------
+# LARGE INPUTS: BRANCH-AND-BOUND WITH LP BOUNDS
+# ---------------------------------------------------------------------
+def _branch_and_bound(items, budget, minutes, max_items, deadline):
+    # Branch on the items that are valuable relative to both resources first
+    items = sorted(items, key=lambda it: it[0] / (_share(it[1], budget) + _share(it[2], minutes) + 1e-9),
+                   reverse=True)
+    n = len(items)
+    # LP relaxation of each resource constraint on its own; the tighter bound wins
+    by_cost = sorted(range(n), key=lambda i: _ratio(items[i][0], items[i][1]), reverse=True)
+    by_minutes = sorted(range(n), key=lambda i: _ratio(items[i][0], items[i][2]), reverse=True)
+
+    def lp_bound(depth, value, cost_left, minutes_left):
+        return value + min(_fractional(items, by_cost, depth, cost_left, 1),
+                           _fractional(items, by_minutes, depth, minutes_left, 2))
+
+    best_value, best = _greedy(items, budget, minutes, max_items)
+    chosen = []
+    nodes = 0
+    timed_out = False
+
+    def branch(depth, value, cost_left, minutes_left, slots):
+        nonlocal best_value, best, nodes, timed_out
+        if value > best_value:
+            best_value, best = value, list(chosen)
+        if depth == n or slots == 0 or timed_out:
+            return
+        nodes += 1
+        if nodes & 255 == 0 and time.monotonic() >= deadline:
+            timed_out = True
+            return
+        if lp_bound(depth, value, cost_left, minutes_left) <= best_value + 1e-9:
+            return
+        v, c, d, _ = items[depth]
+        if c <= cost_left and d <= minutes_left:
+            chosen.append(items[depth])
+            branch(depth + 1, value + v, cost_left - c, minutes_left - d, slots - 1)
+            chosen.pop()
+        branch(depth + 1, value, cost_left, minutes_left, slots)
+
+    branch(0, 0.0, budget, minutes, max_items)
+    return best, not timed_out
+
+
+def _share(weight, capacity):
+    # A zero capacity only admits zero-weight items, which use none of it
+    return weight / capacity if capacity > 0 else 0.0
+
+
+def _ratio(value, weight):
+    return value / weight if weight > 0 else float('inf')
+
+
+def _fractional(items, order, depth, capacity, resource):
+    """Fractional-knapsack value of the undecided items (index >= depth)."""
+    total = 0.0
+    for i in order:
+        if i < depth:
+            continue
+        weight = items[i][resource]
+        if weight <= capacity:
+            total += items[i][0]
+            capacity -= weight
+        else:
+            return total + items[i][0] * capacity / weight
+    return total
+
+
+def _greedy(items, budget, minutes, max_items):
+    """First-fit in branching order; the initial incumbent."""
+    chosen, value = [], 0.0
+    for item in items:
+        if len(chosen) >= max_items:
+            break
+        if item[1] <= budget and item[2] <= minutes:
+            chosen.append(item)
+            value += item[0]
+            budget -= item[1]
+            minutes -= item[2]
+    return value, chosen
@@ -0,0 +1,62 @@
+# benchmark_connectivity.py
+"""
+Problem size and latency of PDDLBuilder's connectivity encodings
+('pairs': one connected fact per ordered pair, 'complete': none) at 50
+and 200 locations: characters and init facts sent to a solver, build
+time, and the local planner's ground time and end-to-end solve
+time (ground and search) for a five-city visit.
+
+    python benchmark_connectivity.py [locations ...]
+
+Grounding 'pairs' joins the unary type facts with every connected fact,
+which grows as n^4; above GROUND_LIMIT locations it is not run.
+"""
+import sys
+import time
+
+from pddl_builder import CONNECTIVITY_MODES, PDDLBuilder
+from pddl_ast import domain_text, problem_text
+from planner import ground_pddl, solve_locally, validate_pddl_plan
+
+SIZES = (50, 200)
+GOAL_CITIES = 5
+GROUND_LIMIT = {'pairs': 60}
+
+
+def measure(locations, mode):
+    builder = PDDLBuilder(connectivity=mode)
+    goals = locations[1:GOAL_CITIES + 1]
+    start = time.perf_counter()
+    domain = builder.build_domain()
+    problem = builder.build_problem(locations, 'home', goals)
+    build_ms = (time.perf_counter() - start) * 1000.0
+    row = {'chars': len(domain_text(domain)) + len(problem_text(problem)), 'facts': len(problem.init),
+           'build_ms': build_ms, 'ground_ms': None, 'solve_ms': None}
+
+    if len(locations) > GROUND_LIMIT.get(mode, len(locations)):
+        return row
+    start = time.perf_counter()
+    ground_pddl(domain, problem)
+    row['ground_ms'] = (time.perf_counter() - start) * 1000.0
+    start = time.perf_counter()
+    plan = solve_locally(domain, problem)
+    row['solve_ms'] = (time.perf_counter() - start) * 1000.0
+    assert plan is not None and validate_pddl_plan(domain, problem, plan).valid
+    return row
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    print(f"{'locations':>9} {'mode':<9} {'chars':>9} {'facts':>7} {'build ms':>9} {'ground ms':>10} {'solve ms':>9}")
+    for size in sizes:
+        locations = ['home'] + [f'city_{i}' for i in range(size - 1)]
+        for mode in CONNECTIVITY_MODES:
+            row = measure(locations, mode)
+            ground = f"{row['ground_ms']:.0f}" if row['ground_ms'] is not None else 'skipped'
+            solve = f"{row['solve_ms']:.0f}" if row['solve_ms'] is not None else 'skipped'
+            print(f"{size:>9} {mode:<9} {row['chars']:>9} {row['facts']:>7} {row['build_ms']:>9.2f} "
+                  f"{ground:>10} {solve:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# benchmark_landmarks.py
+"""
+Expansions and time of the forward search with the legacy heuristic,
+h_FF, the landmark heuristic ('lm') and the larger of 'lm' and the per-city pattern
+databases ('pdb') on multi-city trip tasks, over primitive actions and
+visit-city macros. The per-schema successor cap is
+off so the heuristic alone decides what gets expanded.
+
+    python benchmark_landmarks.py [max_expansions]
+"""
+import sys
+import time
+
+from heuristics import make_heuristic
+from pathfinder import PathFinderAllInOne
+from search import astar, extract_plan
+from validator import validate_plan
+
+TRIPS = (
+    ['paris', 'rome'],
+    ['paris', 'rome', 'barcelona'],
+    ['paris', 'rome', 'barcelona', 'new_york'],
+    ['paris', 'rome', 'barcelona', 'london', 'new_york'],
+)
+HEURISTICS = ('legacy', 'ff', 'lm', 'pdb')
+
+
+def run(task, heuristic, max_expansions, max_per_schema, primitive_task):
+    """(expansions, ms, plan cost or None) for one A* run; expansions = successor generations."""
+    expansions = 0
+    applicable = task.applicable
+
+    def counted(state):
+        nonlocal expansions
+        expansions += 1
+        return applicable(state)
+
+    task.applicable = counted
+    try:
+        start = time.perf_counter()
+        goal = astar(task, heuristic, max_expansions=max_expansions,
+                     max_per_schema=max_per_schema, dominance=True)
+        elapsed = (time.perf_counter() - start) * 1000.0
+    finally:
+        del task.applicable
+    if goal is None:
+        return expansions, elapsed, None
+    assert validate_plan(primitive_task, extract_plan(task, goal)).valid
+    return expansions, elapsed, goal.g
+
+
+def main():
+    max_expansions = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    planner = PathFinderAllInOne()
+    print(f"{'trip':<40} {'search':<10} {'heuristic':<9} {'expansions':>10} {'ms':>8} {'cost':>6}")
+    for destinations in TRIPS:
+        domain = planner._create_pddl_domain(destinations)
+        problem = planner._create_pddl_problem(destinations, 5000, ['cultural'], 7, 'home', 'home')
+        task = problem['task']
+        searches = (('primitive', task, None), ('macro', planner._macro_task(task, problem), None))
+        for search_name, search_task, max_per_schema in searches:
+            for name in HEURISTICS:
+                if name == 'legacy':
+                    if search_task is not task:
+                        continue
+                    heuristic = planner._search_heuristic(task, domain, problem, 'legacy')
+                elif name == 'pdb':
+                    heuristic = planner._search_heuristic(search_task, domain, problem, 'pdb')
+                else:
+                    heuristic = make_heuristic(search_task, name)
+                expansions, elapsed, cost = run(search_task, heuristic, max_expansions, max_per_schema, task)
+                print(f"{', '.join(destinations):<40} {search_name:<10} {name:<9} {expansions:>10} "
+                      f"{elapsed:>8.0f} {cost if cost is not None else '-':>6}")
+
+
+if __name__ == '__main__':
+    main()
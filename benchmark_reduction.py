@@ -0,0 +1,59 @@
+# benchmark_reduction.py
+"""
+Size of AIPlanner's external-data problem before and after
+pddl_reduce.reduce_problem: objects, init facts plus fluent values, and
+characters sent to a remote solver, with the time the reduction takes.
+Attractions are synthetic (seeded): mixed types, a few priced above the
+budget, and about a third of the cities without good weather.
+
+    python benchmark_reduction.py [cities ...]
+"""
+import random
+import sys
+import time
+
+from pathfinder import AIPlanner
+from pddl_ast import problem_text
+from pddl_reduce import reduce_problem
+
+SIZES = (5, 20, 50)
+ATTRACTIONS_PER_CITY = 30
+BUDGET = 2500
+INTERESTS = ['cultural']
+
+
+def external_data(cities, rng):
+    data = {'attractions': {}, 'restaurants': {}, 'weather': {}}
+    for city in cities:
+        data['attractions'][city] = [{
+            'id': f'{city}_{i}',
+            'rating': round(rng.uniform(3.5, 5.0), 1),
+            'price': rng.choice([0, 10, 15, 25, 60, 400, 3000]),
+            'type': rng.choice(['cultural', 'entertainment', 'nature']),
+        } for i in range(ATTRACTIONS_PER_CITY)]
+        data['weather'][city] = {'condition': rng.choice(['sunny', 'cloudy', 'rain'])}
+    return data
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    planner = AIPlanner(None)
+    print(f"{'cities':>6} {'objects':>15} {'facts':>15} {'chars':>17} {'reduce ms':>9} {'ratio':>6}")
+    for size in sizes:
+        cities = [f'city_{i}' for i in range(size)]
+        data = external_data(cities, random.Random(size))
+        full = planner._build_external_problem(cities, BUDGET, 5, data)
+        attractions = planner._external_attractions(cities, data)
+        start = time.perf_counter()
+        reduced, report = reduce_problem(
+            planner.external_domain, full,
+            relevant=planner._interest_filter(attractions, INTERESTS, data)
+        )
+        reduce_ms = (time.perf_counter() - start) * 1000.0
+        print(f"{size:>6} {report.objects_before:>7}->{report.objects_after:<7} "
+              f"{report.facts_before:>7}->{report.facts_after:<7} "
+              f"{len(problem_text(full)):>8}->{len(problem_text(reduced)):<8} {reduce_ms:>9.2f} {report.ratio:>6.0%}")
+
+
+if __name__ == '__main__':
+    main()
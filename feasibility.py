@@ -0,0 +1,56 @@
+# feasibility.py
+import math
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+
+@dataclass
+class FeasibilityReport:
+    """Lower bounds for a trip request and whether the budget/time limit can meet them."""
+    feasible: bool
+    min_budget: float               # cheapest possible spend for the full request
+    min_minutes: float              # shortest possible duration for the full request
+    budget: float
+    time_limit: float
+    destinations: List[str] = field(default_factory=list)  # kept (possibly trimmed)
+    dropped: List[str] = field(default_factory=list)
+    reason: Optional[str] = None
+
+
+# (spend, minutes) of one leg or one stay; inf when impossible
+Bounds = Tuple[float, float]
+
+
+def check_route(destinations: List[str], start: str, end: str, budget: float, time_limit: float,
+                leg: Callable[[str, str], Bounds], stay: Optional[Callable[[str], Bounds]] = None
+                ) -> FeasibilityReport:
+    """
+    Lower-bound a trip from what each travel leg and each stay costs at
+    least, with no grounding. If the full request cannot fit, trailing
+    destinations are dropped until it does; `feasible` is False only if
+    no destination fits.
+    """
+    def bounds(kept):
+        route = [start] + kept + [end]
+        parts = [leg(a, b) for a, b in zip(route, route[1:]) if a != b]
+        if stay is not None:
+            parts += [stay(loc) for loc in kept]
+        return sum(p[0] for p in parts), sum(p[1] for p in parts)
+
+    min_budget, min_minutes = bounds(list(destinations))
+    report = FeasibilityReport(True, min_budget, min_minutes, budget, time_limit, list(destinations))
+
+    kept = list(destinations)
+    spend, minutes = min_budget, min_minutes
+    while kept and (spend > budget or minutes > time_limit):
+        report.dropped.insert(0, kept.pop())
+        spend, minutes = bounds(kept) if kept else (math.inf, math.inf)
+    report.destinations = kept
+
+    if not kept:
+        report.feasible = False
+        if min_budget > budget:
+            report.reason = f"budget ${budget} is below the minimum viable ${min_budget:.0f}"
+        else:
+            report.reason = f"needs at least {min_minutes / 60:.1f} h but only {time_limit / 60:.1f} h are available"
+    return report
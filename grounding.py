@@ -0,0 +1,366 @@
+# grounding.py
+import operator
+from typing import Dict, Iterable, List, Optional, Tuple
+
+Atom = Tuple[str, Tuple[str, ...]]
+
+# Operators used by numeric preconditions/effects and fluent goals
+COMPARATORS = {
+    '>=': operator.ge,
+    '<=': operator.le,
+    '>': operator.gt,
+    '<': operator.lt,
+    '=': operator.eq,
+}
+
+ARITHMETIC = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+}
+
+
+class FactTable:
+    """
+    Interns ground atoms (name, args) to dense integer ids.
+    A set of atoms is then a Python int used as a bitset, so hashing,
+    copying and subset tests cost O(words) instead of O(facts).
+    """
+
+    def __init__(self):
+        self._ids: Dict[Atom, int] = {}
+        self.atoms: List[Atom] = []
+        self.fluents: List[str] = []
+        self._fluent_ids: Dict[str, int] = {}
+        # Facts fixed by grounding; they hold in every state but stay out of state bits
+        self.static_bits = 0
+
+    def __len__(self):
+        return len(self.atoms)
+
+    # -----------------------------------------------
+    # ATOMS
+    # -----------------------------------------------
+    def intern(self, name: str, args: Tuple[str, ...]) -> int:
+        atom = (name, tuple(args))
+        fact_id = self._ids.get(atom)
+        if fact_id is None:
+            fact_id = len(self.atoms)
+            self._ids[atom] = fact_id
+            self.atoms.append(atom)
+        return fact_id
+
+    def get(self, name: str, args: Tuple[str, ...]) -> Optional[int]:
+        return self._ids.get((name, tuple(args)))
+
+    def mask(self, predicates: Iterable) -> int:
+        """Bitset of predicates (objects with .name/.args), interning as needed."""
+        bits = 0
+        for pred in predicates:
+            bits |= 1 << self.intern(pred.name, pred.args)
+        return bits
+
+    def decode(self, bits: int) -> List[Atom]:
+        return [self.atoms[i] for i in iter_bits(bits)]
+
+    # -----------------------------------------------
+    # NUMERIC FLUENTS
+    # -----------------------------------------------
+    def fluent_index(self, name: str) -> int:
+        index = self._fluent_ids.get(name)
+        if index is None:
+            index = len(self.fluents)
+            self._fluent_ids[name] = index
+            self.fluents.append(name)
+        return index
+
+    def pack_fluents(self, values: Dict[str, float]) -> Tuple:
+        for name in values:
+            self.fluent_index(name)
+        return tuple(values.get(name, 0) for name in self.fluents)
+
+
+def iter_bits(bits: int):
+    """Yield the ids of the set bits, lowest first."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+# ---------------------------------------------------------------------
+# GROUND ACTIONS
+# ---------------------------------------------------------------------
+class GroundAction:
+    """Fully instantiated action compiled to bitset masks over dynamic facts."""
+
+    __slots__ = ('id', 'name', 'bindings', 'pre', 'neg', 'add', 'delete',
+                 'numeric_pre', 'numeric_eff', 'cost', 'anchor')
+
+    def __init__(self, action_id, name, bindings, pre, neg, add, delete,
+                 numeric_pre, numeric_eff, cost, anchor=None):
+        self.id = action_id
+        self.name = name
+        self.bindings = bindings
+        self.pre = pre
+        self.neg = neg
+        self.add = add
+        self.delete = delete
+        self.numeric_pre = numeric_pre
+        self.numeric_eff = numeric_eff
+        self.cost = cost
+        self.anchor = anchor
+
+    def label(self) -> str:
+        """Plan step string, e.g. travel(from=home, to=paris)."""
+        args = ', '.join(f'{k}={v}' for k, v in self.bindings.items())
+        return f"{self.name}({args})"
+
+    def is_applicable(self, state) -> bool:
+        bits = state.bits
+        if bits & self.pre != self.pre or bits & self.neg:
+            return False
+        fluents = state.numeric_fluents
+        for fluent, op, value in self.numeric_pre:
+            if not COMPARATORS[op](fluents.get(fluent, 0), value):
+                return False
+        return True
+
+    def apply(self, state):
+        new_state = state.copy()
+        new_state.bits = (state.bits & ~self.delete) | self.add
+        fluents = new_state.numeric_fluents
+        for fluent, op, value in self.numeric_eff:
+            fluents[fluent] = ARITHMETIC[op](fluents.get(fluent, 0), value)
+        return new_state
+
+    def __repr__(self):
+        return self.label()
+
+
+class GroundTask:
+    """
+    Grounded planning task. Static facts (no action adds or deletes them)
+    are checked once at grounding time and kept out of state bitsets;
+    actions are indexed by the anchor fact (e.g. the `at` location) they need.
+    """
+
+    def __init__(self, facts, actions, initial_state, goal_mask, goal_fluents,
+                 static_mask, anchor_mask):
+        self.facts = facts
+        self.actions = actions
+        self.initial_state = initial_state
+        self.goal_mask = goal_mask
+        self.goal_fluents = goal_fluents
+        self.static_mask = static_mask
+        self.anchor_mask = anchor_mask
+        self.by_anchor: Dict[int, List[GroundAction]] = {}
+        self.unanchored: List[GroundAction] = []
+        self._by_label: Optional[Dict[str, GroundAction]] = None
+        self._by_args: Optional[Dict[Tuple[str, ...], GroundAction]] = None
+        for action in actions:
+            if action.anchor is None:
+                self.unanchored.append(action)
+            else:
+                self.by_anchor.setdefault(action.anchor, []).append(action)
+
+    def is_goal(self, state) -> bool:
+        if state.bits & self.goal_mask != self.goal_mask:
+            return False
+        fluents = state.numeric_fluents
+        for fluent, op, value in self.goal_fluents:
+            if not COMPARATORS[op](fluents.get(fluent, 0), value):
+                return False
+        return True
+
+    def action_named(self, label: str) -> Optional[GroundAction]:
+        """Ground action for a plan step string (index built on first use)."""
+        if self._by_label is None:
+            self._by_label = {action.label(): action for action in self.actions}
+        return self._by_label.get(label)
+
+    def action_for_step(self, step: str) -> Optional[GroundAction]:
+        """Ground action for either step format: 'travel(from=a, to=b)' or '(travel a b)'."""
+        step = step.strip()
+        if not step.startswith('('):
+            return self.action_named(step)
+        if self._by_args is None:
+            self._by_args = {(action.name,) + tuple(action.bindings.values()): action
+                             for action in self.actions}
+        return self._by_args.get(tuple(step[1:-1].split()))
+
+    def replay(self, plan: List[str]):
+        """Execute plan step strings from the initial state; None if a step fails."""
+        state = self.initial_state
+        for step in plan:
+            action = self.action_named(step)
+            if action is None or not action.is_applicable(state):
+                return None
+            state = action.apply(state)
+        return state
+
+    def applicable(self, state):
+        """Yield applicable ground actions: anchor lookup plus bitset checks."""
+        for anchor in iter_bits(state.bits & self.anchor_mask):
+            for action in self.by_anchor.get(anchor, ()):
+                if action.is_applicable(state):
+                    yield action
+        for action in self.unanchored:
+            if action.is_applicable(state):
+                yield action
+
+
+# ---------------------------------------------------------------------
+# GROUNDING
+# ---------------------------------------------------------------------
+def _param(term: str) -> Optional[str]:
+    return term[1:] if term.startswith('?') else None
+
+
+def _bind(pred, bindings) -> Tuple[str, ...]:
+    return tuple(bindings[t[1:]] if t.startswith('?') else t for t in pred.args)
+
+
+def _match(pred, args, bindings) -> Optional[dict]:
+    """Extend bindings so that pred matches the ground args, or None."""
+    extended = bindings
+    for term, value in zip(pred.args, args):
+        name = _param(term)
+        if name is None:
+            if term != value:
+                return None
+        elif name in extended:
+            if extended[name] != value:
+                return None
+        else:
+            if extended is bindings:
+                extended = dict(bindings)
+            extended[name] = value
+    return extended
+
+
+def _is_atom(pre) -> bool:
+    return not isinstance(pre, tuple)
+
+
+def ground_task(actions, initial_state, goal_predicates, goal_fluents, anchor='at') -> GroundTask:
+    """
+    Ground lifted actions (PDDLAction-like: name, parameters, preconditions,
+    effects, cost) against an initial state. Runs once per problem.
+    """
+    facts = initial_state.facts
+    init_atoms = facts.decode(initial_state.bits | facts.static_bits)
+
+    # Predicates no action touches are static
+    dynamic_names = {
+        effect[1].name
+        for action in actions
+        for effect in action.effects
+        if effect[0] in ('add', 'del')
+    }
+    static_by_name: Dict[str, List[Tuple[str, ...]]] = {}
+    static_mask = 0
+    objects = []
+    seen = set()
+    for name, args in init_atoms:
+        if name not in dynamic_names:
+            static_by_name.setdefault(name, []).append(args)
+            static_mask |= 1 << facts.get(name, args)
+        for obj in args:
+            if obj not in seen:
+                seen.add(obj)
+                objects.append(obj)
+    for pred in goal_predicates:
+        for obj in pred.args:
+            if obj not in seen:
+                seen.add(obj)
+                objects.append(obj)
+
+    def is_static(pred):
+        return pred.name not in dynamic_names
+
+    def static_holds(pred, bindings):
+        fact_id = facts.get(pred.name, _bind(pred, bindings))
+        return fact_id is not None and bool((static_mask >> fact_id) & 1)
+
+    ground_actions: List[GroundAction] = []
+    anchor_mask = 0
+    for action in actions:
+        params = [p[1:] for p in action.parameters]
+        static_pos = [p for p in action.preconditions if _is_atom(p) and is_static(p)]
+        static_neg = [p[1] for p in action.preconditions
+                      if not _is_atom(p) and p[0] == 'not' and is_static(p[1])]
+
+        # Join static preconditions first, then range free parameters over objects
+        candidates = [{}]
+        for pred in static_pos:
+            joined = []
+            for bindings in candidates:
+                for args in static_by_name.get(pred.name, ()):
+                    extended = _match(pred, args, bindings)
+                    if extended is not None:
+                        joined.append(extended)
+            candidates = joined
+        for param in params:
+            expanded = []
+            for bindings in candidates:
+                if param in bindings:
+                    expanded.append(bindings)
+                else:
+                    expanded.extend(dict(bindings, **{param: obj}) for obj in objects)
+            candidates = expanded
+
+        for bindings in candidates:
+            if any(static_holds(pred, bindings) for pred in static_neg):
+                continue
+            ordered = {param: bindings[param] for param in params}
+            pre = neg = add = delete = 0
+            numeric_pre = []
+            numeric_eff = []
+            anchor_id = None
+            for p in action.preconditions:
+                if _is_atom(p):
+                    if is_static(p):
+                        continue
+                    fact_id = facts.intern(p.name, _bind(p, ordered))
+                    pre |= 1 << fact_id
+                    if p.name == anchor and anchor_id is None:
+                        anchor_id = fact_id
+                elif p[0] == 'not':
+                    if not is_static(p[1]):
+                        neg |= 1 << facts.intern(p[1].name, _bind(p[1], ordered))
+                elif p[0] == 'numeric':
+                    _, op, fluent, value = p
+                    numeric_pre.append((fluent, op, value))
+            for effect in action.effects:
+                if effect[0] == 'add':
+                    add |= 1 << facts.intern(effect[1].name, _bind(effect[1], ordered))
+                elif effect[0] == 'del':
+                    delete |= 1 << facts.intern(effect[1].name, _bind(effect[1], ordered))
+                elif effect[0] == 'assign':
+                    _, fluent, op, value = effect
+                    numeric_eff.append((fluent, op, value))
+            if anchor_id is not None:
+                anchor_mask |= 1 << anchor_id
+            ground_actions.append(GroundAction(
+                len(ground_actions), action.name, ordered, pre, neg, add, delete,
+                tuple(numeric_pre), tuple(numeric_eff), action.cost, anchor_id
+            ))
+
+    # Static goal atoms are decided now; only dynamic ones stay in the mask
+    goal_mask = 0
+    for pred in goal_predicates:
+        fact_id = facts.intern(pred.name, pred.args)
+        if not (is_static(pred) and (static_mask >> fact_id) & 1):
+            goal_mask |= 1 << fact_id
+
+    facts.static_bits = static_mask
+    start = initial_state.copy()
+    start.bits &= ~static_mask
+
+    return GroundTask(
+        facts, ground_actions, start, goal_mask,
+        tuple((fluent, op, value) for fluent, (op, value) in goal_fluents.items()),
+        static_mask, anchor_mask
+    )
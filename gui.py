@@ -4,6 +4,7 @@ from tkinter import ttk, messagebox, filedialog
 from typing import List
 
 from main import TripEngine, DESTINATION_LABELS
+from pddl_ast import domain_text, problem_text
 
 
 class PathfinderGUI:
@@ -155,8 +156,8 @@ class PathfinderGUI:
             return
 
         # Fill output tabs
-        self._write(self.txt_domain, domain)
-        self._write(self.txt_problem, problem)
+        self._write(self.txt_domain, domain_text(domain))
+        self._write(self.txt_problem, problem_text(problem))
 
         self._write(self.txt_plan, "Raw Planner Output:\n\n")
         for i, step in enumerate(raw_plan):
@@ -181,7 +182,10 @@ class PathfinderGUI:
         self._write(self.txt_itinerary, "\n=== SUMMARY ===\n")
         self._write(self.txt_itinerary, f"Total Cost: ${summary['total_cost']}\n")
         self._write(self.txt_itinerary, f"Budget Remaining: ${summary['remaining']}\n")
-        self._write(self.txt_itinerary, f"Total Duration: {summary['hours']} hours\n\n")
+        self._write(self.txt_itinerary, f"Total Duration: {summary['hours']} hours\n")
+        if summary["extra_days"]:
+            self._write(self.txt_itinerary, f"Needs {summary['extra_days']} more day(s) than requested\n")
+        self._write(self.txt_itinerary, "\n")
 
         self._write(self.txt_itinerary, "Cost Breakdown:\n")
         for t, v in summary["cost_by_type"].items():
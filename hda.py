@@ -0,0 +1,288 @@
+# hda.py
+import heapq
+import math
+import multiprocessing as mp
+import os
+import queue
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from heuristics import make_heuristic
+from search import SearchStats
+
+# Idle workers block on their inbox this long before re-checking the stop flag
+POLL_SECONDS = 0.005
+
+# How long the main process waits for a worker's reply (a parent record or its counters)
+REPLY_SECONDS = 1.0
+
+
+@dataclass
+class HDAResult:
+    """Outcome of a hash-distributed A* run."""
+    path: Optional[List[int]]       # action ids from the initial state, None if no plan
+    cost: float
+    elapsed_ms: float
+    expansions: List[int] = field(default_factory=list)  # per worker
+    completed: bool = False         # ended by termination detection, not the deadline or cap
+    stats: SearchStats = field(default_factory=SearchStats)  # summed over the workers that reported
+
+
+def owner(signature, workers: int) -> int:
+    """Worker that owns a state: every process computes the same value for the same state."""
+    return hash(signature) % workers
+
+
+def hda_search(task, heuristic: str = 'ff', workers: Optional[int] = None,
+               deadline_ms: Optional[float] = None, max_expansions: Optional[int] = None,
+               weight: float = 1.0) -> HDAResult:
+    """
+    Hash-distributed A* (HDA*) over a ground task. Each worker process owns
+    the states whose signature hashes to it: it keeps their open list,
+    best-g table and parent records, and sends every generated child to its
+    owner's inbox. Parent records hold (owner, record id, action id), so
+    the plan is traced back worker to worker after the search.
+
+    A goal found by one worker becomes the shared incumbent; everyone
+    prunes nodes whose f cannot beat it. The search ends once every worker's
+    open list has no f below the incumbent and every batch sent has been
+    received, which is when sequential A* would pop that goal too (or, with
+    no incumbent, when the space is exhausted).
+    """
+    workers = workers or max(1, os.cpu_count() or 1)
+    ctx = mp.get_context()
+    inboxes = [ctx.Queue() for _ in range(workers)]
+    results = ctx.Queue()
+    shared = _Shared(ctx, workers)
+
+    processes = [
+        ctx.Process(target=_worker, daemon=True,
+                    args=(index, task, heuristic, weight, inboxes, results, shared))
+        for index in range(workers)
+    ]
+    start = time.monotonic()
+    for process in processes:
+        process.start()
+
+    root = task.initial_state
+    _send(shared, inboxes[owner(root.signature(), workers)],
+          ('nodes', [(root.bits, _pack(root), 0, None, None)]))
+
+    deadline = start + deadline_ms / 1000.0 if deadline_ms is not None else None
+    best = None  # (cost, worker, record id)
+    completed = False
+    try:
+        while True:
+            try:
+                message = results.get(timeout=POLL_SECONDS)
+                if message[0] == 'goal' and (best is None or message[3] < best[0]):
+                    best = (message[3], message[1], message[2])
+            except queue.Empty:
+                pass
+            incumbent = best[0] if best else math.inf
+            # A goal message can still be in the queue after the shared incumbent moved
+            if incumbent <= shared.best.value and shared.settled(incumbent):
+                completed = True
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            if max_expansions is not None and sum(shared.expansions) >= max_expansions:
+                break
+
+        shared.done.value = 1
+        path = _trace(best, inboxes, results) if best is not None else None
+    finally:
+        for inbox in inboxes:
+            inbox.put(('stop',))
+        stats = _collect_stats(results, workers)
+        for process in processes:
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.terminate()
+
+    stats.elapsed_ms = (time.monotonic() - start) * 1000.0
+    return HDAResult(path, best[0] if best else math.inf, stats.elapsed_ms,
+                     list(shared.expansions), completed, stats)
+
+
+def _collect_stats(results, workers) -> SearchStats:
+    """Sum the counters each worker sends back with 'stop'; a worker that never answers is left out."""
+    total = SearchStats()
+    reported = 0
+    while reported < workers:
+        try:
+            message = results.get(timeout=REPLY_SECONDS)
+        except queue.Empty:
+            break
+        if message[0] == 'stats':
+            total.add(message[2])
+            reported += 1
+    return total
+
+
+def _trace(best, inboxes, results) -> Optional[List[int]]:
+    """Follow parent records from the goal back to the root, one owner at a time; None if an owner stops answering."""
+    path = []
+    _, worker, record = best
+    while record is not None:
+        inboxes[worker].put(('trace', record))
+        while True:
+            try:
+                message = results.get(timeout=REPLY_SECONDS)
+            except queue.Empty:
+                return None
+            if message[0] == 'parent':
+                break
+        _, parent_worker, parent_record, action_id = message
+        if action_id is not None:
+            path.append(action_id)
+        worker, record = parent_worker, parent_record
+    path.reverse()
+    return path
+
+
+# ---------------------------------------------------------------------
+# SHARED COUNTERS AND TERMINATION DETECTION
+# ---------------------------------------------------------------------
+class _Shared:
+    """
+    Values all processes see. Each worker publishes the lowest f in its
+    open list (inf when empty). A batch is counted as sent before it is
+    queued; the receiver resets its published f to -inf before counting
+    it as received and republishes after queueing its nodes.
+    """
+
+    def __init__(self, ctx, workers):
+        self.sent = ctx.Value('q', 0)
+        self.received = ctx.Value('q', 0)
+        self.min_f = ctx.Array('d', [-math.inf] * workers, lock=False)
+        self.expansions = ctx.Array('q', [0] * workers, lock=False)
+        self.best = ctx.Value('d', math.inf)
+        self.done = ctx.Value('b', 0, lock=False)
+
+    def settled(self, bound: float) -> bool:
+        """No queued or in-flight node has f below `bound`; no receive happened while checking."""
+        received = self.received.value
+        if any(f < bound for f in self.min_f):
+            return False
+        return self.sent.value == received == self.received.value
+
+
+def _send(shared, inbox, message):
+    with shared.sent.get_lock():
+        shared.sent.value += 1
+    inbox.put(message)
+
+
+def _pack(state):
+    return tuple(state.numeric_fluents.items())
+
+
+# ---------------------------------------------------------------------
+# WORKER PROCESS
+# ---------------------------------------------------------------------
+def _worker(index, task, heuristic_name, weight, inboxes, results, shared):
+    h = make_heuristic(task, heuristic_name)
+    workers = len(inboxes)
+    root = task.initial_state
+    inbox = inboxes[index]
+
+    open_list = []      # (f, g, tie, record id, state)
+    best_g = {}         # signature -> best g seen for a state this worker owns
+    records = []        # record id -> (parent worker, parent record, action id)
+    counter = 0
+    expansions = 0
+    stats = SearchStats()  # elapsed_ms is the caller's wall time, not summed here
+
+    def receive(nodes):
+        nonlocal counter
+        bound = shared.best.value
+        for bits, fluents, g, parent, action_id in nodes:
+            if g >= bound:
+                continue
+            state = root.copy()
+            state.bits = bits
+            state.numeric_fluents = dict(fluents)
+            signature = state.signature()
+            if best_g.get(signature, math.inf) <= g:
+                stats.duplicates += 1
+                continue
+            best_g[signature] = g
+            h_started = time.perf_counter()
+            h_score = h(state)
+            stats.heuristic_ms += (time.perf_counter() - h_started) * 1000.0
+            if h_score == math.inf or g + weight * h_score >= bound:
+                continue
+            records.append((parent[0], parent[1], action_id) if parent else (None, None, None))
+            counter += 1
+            heapq.heappush(open_list, (g + weight * h_score, g, counter, len(records) - 1, state))
+        stats.peak_open = max(stats.peak_open, len(open_list))
+
+    def handle(message) -> bool:
+        kind = message[0]
+        if kind == 'nodes':
+            shared.min_f[index] = -math.inf
+            with shared.received.get_lock():
+                shared.received.value += 1
+            if not shared.done:
+                receive(message[1])
+        elif kind == 'trace':
+            parent_worker, parent_record, action_id = records[message[1]]
+            results.put(('parent', parent_worker, parent_record, action_id))
+        elif kind == 'stop':
+            stats.expanded = expansions
+            results.put(('stats', index, stats))
+            return False
+        return True
+
+    while True:
+        # Drain the inbox before expanding so better nodes from peers are queued first
+        try:
+            while True:
+                if not handle(inbox.get_nowait()):
+                    return
+        except queue.Empty:
+            pass
+
+        shared.min_f[index] = open_list[0][0] if open_list else math.inf
+        if shared.done or not open_list:
+            try:
+                message = inbox.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                continue
+            if not handle(message):
+                return
+            continue
+
+        f, g, _, record, state = heapq.heappop(open_list)
+        bound = shared.best.value
+        if best_g.get(state.signature(), math.inf) < g or f >= bound:
+            stats.duplicates += 1
+            continue  # reached again more cheaply, or cannot beat the incumbent
+        expansions += 1
+        shared.expansions[index] = expansions
+
+        if task.is_goal(state):
+            with shared.best.get_lock():
+                if g < shared.best.value:
+                    shared.best.value = g
+                    results.put(('goal', index, record, g))
+            continue
+
+        successor_started = time.perf_counter()
+        outgoing = {}
+        for action in task.applicable(state):
+            child_g = g + action.cost
+            if child_g >= bound:
+                continue
+            child = action.apply(state)
+            stats.generated += 1
+            target = owner(child.signature(), workers)
+            outgoing.setdefault(target, []).append((child.bits, _pack(child), child_g, (index, record), action.id))
+        stats.successor_ms += (time.perf_counter() - successor_started) * 1000.0
+        for target, nodes in outgoing.items():
+            if target == index:
+                receive(nodes)
+            else:
+                _send(shared, inboxes[target], ('nodes', nodes))
@@ -0,0 +1,231 @@
+# heuristics.py
+import heapq
+import math
+from typing import Callable, Dict, List
+
+from grounding import COMPARATORS, iter_bits
+from landmarks import LandmarkHeuristic
+
+INF = math.inf
+
+HEURISTICS = ('max', 'add', 'ff')
+
+
+class RelaxedHeuristic:
+    """
+    Delete-relaxation heuristics (h_max, h_add, h_FF) over a GroundTask.
+
+    Numeric fluents are treated as monotone resources: a fluent that actions
+    only ever decrease (budget) or only ever increase (time, satisfaction)
+    cannot recover, so a failed precondition or goal bound on it prunes the
+    action or the state, and a '>=' goal on an increasing fluent is covered
+    by the cheapest reachable incrementing actions.
+    """
+
+    def __init__(self, task, kind: str = 'ff'):
+        if kind not in HEURISTICS:
+            raise ValueError(f"Unknown relaxed heuristic: {kind}")
+        self.task = task
+        self.kind = kind
+        actions = task.actions
+
+        self.pre_ids = [tuple(iter_bits(a.pre)) for a in actions]
+        self.add_ids = [tuple(iter_bits(a.add)) for a in actions]
+        self.costs = [a.cost for a in actions]
+        self.no_pre = [a.id for a in actions if not a.pre]
+        self.pre_actions: Dict[int, List[int]] = {}
+        for a in actions:
+            for fact_id in self.pre_ids[a.id]:
+                self.pre_actions.setdefault(fact_id, []).append(a.id)
+
+        # Negative preconditions on facts nothing deletes are permanent once true
+        deletable = 0
+        for a in actions:
+            deletable |= a.delete
+        self.permanent_neg = [a.neg & ~deletable for a in actions]
+        # Actions that block themselves (e.g. visit once) count at most once
+        self.one_shot = [bool(a.neg & a.add) for a in actions]
+
+        self.direction = _fluent_directions(actions)
+        self.goal_ids = tuple(iter_bits(task.goal_mask))
+        self.gains = {}
+        self.caps = []
+        for fluent, op, value in task.goal_fluents:
+            if op in ('>=', '>') and self.direction.get(fluent) == 1:
+                self.gains[fluent] = [_gain(a, fluent) for a in actions]
+            elif op in ('<=', '<') and self.direction.get(fluent) == 1:
+                # An action that would overshoot an upper-bounded, increasing fluent is dead
+                self.caps.append((fluent, op, value, [_gain(a, fluent) for a in actions]))
+
+    # -----------------------------------------------
+    # EVALUATION
+    # -----------------------------------------------
+    def __call__(self, state) -> float:
+        fluents = state.numeric_fluents
+        direction = self.direction
+
+        # Goal bounds on fluents that only move the wrong way are dead ends
+        for fluent, op, value in self.task.goal_fluents:
+            current = fluents.get(fluent, 0)
+            if not COMPARATORS[op](current, value):
+                if op in ('<=', '<') and direction.get(fluent) == 1:
+                    return INF
+                if op in ('>=', '>') and direction.get(fluent) == -1:
+                    return INF
+
+        usable = self._usable_actions(state)
+        fact_cost, reach_cost, supporter = self._propagate(state, usable)
+
+        goal_costs = [fact_cost.get(g, INF) for g in self.goal_ids]
+        if any(c == INF for c in goal_costs):
+            return INF
+
+        incrementers = self._numeric_cover(state, reach_cost)
+        if incrementers is None:
+            return INF
+
+        if self.kind == 'max':
+            numeric = max((reach_cost[a] for a in incrementers), default=0)
+            return max(goal_costs + [numeric])
+        if self.kind == 'add':
+            return sum(goal_costs) + sum(reach_cost[a] for a in incrementers)
+        return self._relaxed_plan_cost(state, incrementers, supporter)
+
+    def _usable_actions(self, state) -> List[bool]:
+        bits = state.bits
+        fluents = state.numeric_fluents
+        direction = self.direction
+        usable = []
+        for a in self.task.actions:
+            ok = not (bits & self.permanent_neg[a.id])
+            if ok:
+                for fluent, op, value in a.numeric_pre:
+                    if not COMPARATORS[op](fluents.get(fluent, 0), value):
+                        if (op in ('>=', '>') and direction.get(fluent) == -1) or \
+                           (op in ('<=', '<') and direction.get(fluent) == 1):
+                            ok = False
+                            break
+            if ok:
+                for fluent, op, value, gains in self.caps:
+                    if not COMPARATORS[op](fluents.get(fluent, 0) + gains[a.id], value):
+                        ok = False
+                        break
+            usable.append(ok)
+        return usable
+
+    def _propagate(self, state, usable):
+        """Generalised Dijkstra over facts; h_max or h_add cost combination."""
+        combine_max = self.kind == 'max'
+        fact_cost = {fact_id: 0 for fact_id in iter_bits(state.bits)}
+        reach_cost = [INF] * len(self.costs)
+        supporter = {}
+        unsat = [len(p) for p in self.pre_ids]
+        acc = [0] * len(self.costs)
+
+        queue = [(0, fact_id) for fact_id in fact_cost]
+        heapq.heapify(queue)
+        ready = [a for a in self.no_pre if usable[a]]
+
+        while queue or ready:
+            for a in ready:
+                reach_cost[a] = acc[a] + self.costs[a]
+                for fact_id in self.add_ids[a]:
+                    if reach_cost[a] < fact_cost.get(fact_id, INF):
+                        fact_cost[fact_id] = reach_cost[a]
+                        supporter[fact_id] = a
+                        heapq.heappush(queue, (reach_cost[a], fact_id))
+            ready = []
+            if not queue:
+                break
+            cost, fact_id = heapq.heappop(queue)
+            if cost > fact_cost.get(fact_id, INF):
+                continue
+            for a in self.pre_actions.get(fact_id, ()):
+                if not usable[a]:
+                    continue
+                acc[a] = max(acc[a], cost) if combine_max else acc[a] + cost
+                unsat[a] -= 1
+                if unsat[a] == 0:
+                    ready.append(a)
+        return fact_cost, reach_cost, supporter
+
+    def _numeric_cover(self, state, reach_cost):
+        """Cheapest-ratio cover of '>=' goal deficits; None if impossible."""
+        chosen = []
+        fluents = state.numeric_fluents
+        for fluent, op, value in self.task.goal_fluents:
+            gains = self.gains.get(fluent)
+            if gains is None:
+                continue
+            deficit = value - fluents.get(fluent, 0)
+            if deficit < 0 or (deficit == 0 and op == '>='):
+                continue
+            candidates = sorted(
+                (reach_cost[a] / gains[a], a) for a in range(len(gains))
+                if gains[a] > 0 and reach_cost[a] < INF
+            )
+            for _, a in candidates:
+                if deficit < 0 or (deficit == 0 and op == '>='):
+                    break
+                uses = 1 if self.one_shot[a] else max(1, math.ceil(deficit / gains[a]))
+                chosen.extend([a] * uses)
+                deficit -= gains[a] * uses
+            if deficit > 0 or (deficit == 0 and op == '>'):
+                return None
+        return chosen
+
+    def _relaxed_plan_cost(self, state, incrementers, supporter) -> float:
+        """FF: extract a relaxed plan by backchaining through best supporters."""
+        plan = set()
+        repeated = 0
+        agenda = list(self.goal_ids)
+        for a in incrementers:
+            if a in plan:
+                repeated += self.costs[a]
+            else:
+                plan.add(a)
+                agenda.extend(self.pre_ids[a])
+        seen = set()
+        while agenda:
+            fact_id = agenda.pop()
+            if fact_id in seen or (state.bits >> fact_id) & 1:
+                continue
+            seen.add(fact_id)
+            a = supporter[fact_id]
+            if a not in plan:
+                plan.add(a)
+                agenda.extend(self.pre_ids[a])
+        return sum(self.costs[a] for a in plan) + repeated
+
+
+def _fluent_directions(actions) -> Dict[str, int]:
+    """+1 if a fluent only increases, -1 if it only decreases, 0 otherwise."""
+    direction: Dict[str, int] = {}
+    for a in actions:
+        for fluent, op, value in a.numeric_eff:
+            if op == '+':
+                d = 1 if value > 0 else -1 if value < 0 else None
+            elif op == '-':
+                d = -1 if value > 0 else 1 if value < 0 else None
+            else:
+                d = 0
+            if d is None:
+                continue
+            previous = direction.get(fluent)
+            direction[fluent] = d if previous in (None, d) else 0
+    return direction
+
+
+def _gain(action, fluent) -> float:
+    gain = 0
+    for name, op, value in action.numeric_eff:
+        if name == fluent:
+            gain += value if op == '+' else -value if op == '-' else 0
+    return gain
+
+
+def make_heuristic(task, kind: str = 'ff') -> Callable:
+    """Build a heuristic callable for search.astar from its name ('lm': landmarks + h_FF)."""
+    if kind == 'lm':
+        return LandmarkHeuristic(task, RelaxedHeuristic(task, 'ff'))
+    return RelaxedHeuristic(task, kind)
@@ -0,0 +1,314 @@
+# htn.py
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from grounding import GroundAction, iter_bits
+from search import SearchStats
+
+# Sub-task results kept across requests (least recently used dropped first)
+MEMO_SIZE = 4096
+
+DEFAULT_MAX_EXPANSIONS = 20000
+
+# Attractions tried per day by the trip methods, most first
+DAY_VISITS = 3
+
+
+class _MemoEntry:
+    """Plans found so far for one (task, relevant state) and the decomposition still producing them."""
+
+    __slots__ = ('plans', 'seen', 'source', 'done', 'running')
+
+    def __init__(self):
+        self.plans: List[Tuple[str, ...]] = []
+        self.seen = set()
+        self.source: Optional[Iterator] = None
+        self.done = False
+        self.running = False
+
+
+class HTNMemo:
+    """LRU map (task, relevant atoms, fluents, limits) -> _MemoEntry, shareable between planners."""
+
+    def __init__(self, size: int = MEMO_SIZE):
+        self.size = size
+        self.entries: 'OrderedDict[tuple, _MemoEntry]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def entry(self, key) -> _MemoEntry:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            entry = self.entries[key] = _MemoEntry()
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return entry
+
+    def detach(self):
+        """Drop unfinished decompositions (they belong to one planner); found plans stay."""
+        for entry in self.entries.values():
+            entry.source = None
+
+
+# ---------------------------------------------------------------------
+# ENGINE: TOTAL-ORDER DECOMPOSITION WITH BACKTRACKING
+# ---------------------------------------------------------------------
+class HTNPlanner:
+    """
+    Decomposes compound tasks (tuples like ('city', 'paris', 2)) with the
+    methods registered for their name; primitive tasks are ground actions.
+    A method maps (state, *args) to alternative subtask lists, tried in
+    order, and the planner backtracks into earlier choices when a later
+    task cannot be achieved. Solutions of each compound task are memoised
+    under the task, the facts `relevant(task)` says it depends on, the
+    numeric fluents and the goal limits, so a sub-problem met again (in
+    another branch or a later request with a shared memo) is replayed
+    instead of re-decomposed.
+
+    `stats` counts method alternatives as expansions, applied actions as
+    generated states, memo replays as duplicates and memo entries as the
+    open list; limit checks are the heuristic time.
+    """
+
+    def __init__(self, task, methods: Dict[str, Callable], relevant: Optional[Callable] = None,
+                 memo: Optional[HTNMemo] = None, max_expansions: int = DEFAULT_MAX_EXPANSIONS):
+        self.task = task
+        self.methods = methods
+        self.relevant = relevant or (lambda compound: None)
+        self.memo = memo if memo is not None else HTNMemo()
+        self.max_expansions = max_expansions
+        self.expansions = 0
+        self.limits = tuple(sorted(_monotone_limits(task)))
+        self.stats = SearchStats()
+
+    def plan(self, root: tuple, state=None) -> Optional[List[str]]:
+        """Plan labels for `root` whose final state meets the task goal, or None."""
+        state = state if state is not None else self.task.initial_state
+        started = time.perf_counter()
+        hits = self.memo.hits
+        try:
+            for steps, final in self._expand(root, state):
+                if self.task.is_goal(final):
+                    self.stats.depth = len(steps)
+                    return list(steps)
+                if self.expansions >= self.max_expansions:
+                    break
+            return None
+        finally:
+            self.memo.detach()
+            self.stats.duplicates += self.memo.hits - hits
+            self.stats.peak_open = max(self.stats.peak_open, len(self.memo.entries))
+            self.stats.elapsed_ms += (time.perf_counter() - started) * 1000.0
+
+    def _solve(self, tasks, index, state):
+        """Yield (steps, state) for every way to achieve tasks[index:] in order."""
+        if index == len(tasks):
+            yield (), state
+            return
+        for head, middle in self._expand(tasks[index], state):
+            for tail, final in self._solve(tasks, index + 1, middle):
+                yield head + tail, final
+
+    def _expand(self, item, state):
+        if isinstance(item, GroundAction):
+            started = time.perf_counter()
+            new_state = item.apply(state) if item.is_applicable(state) else None
+            applied = time.perf_counter()
+            self.stats.successor_ms += (applied - started) * 1000.0
+            if new_state is not None:
+                self.stats.generated += 1
+                within = self._within_limits(new_state)
+                self.stats.heuristic_ms += (time.perf_counter() - applied) * 1000.0
+                if within:
+                    yield (item.label(),), new_state
+            return
+        yield from self._memoised(item, state)
+
+    def _memoised(self, compound, state):
+        entry = self.memo.entry(self._key(compound, state))
+        if entry.running:  # the task reached itself in the same state: no memo for this loop
+            yield from self._decompose(compound, state)
+            return
+        index = 0
+        while True:
+            if index < len(entry.plans):
+                steps = entry.plans[index]
+                index += 1
+                final = self._replay(steps, state)
+                if final is not None:
+                    yield steps, final
+                continue
+            if entry.done or self.expansions >= self.max_expansions:
+                return
+            if entry.source is None:
+                entry.source = self._decompose(compound, state)
+            entry.running = True
+            try:
+                steps, _ = next(entry.source)
+            except StopIteration:
+                # A decomposition cut off by the expansion budget may have more plans
+                entry.done = self.expansions <= self.max_expansions
+                entry.source = None
+                return
+            finally:
+                entry.running = False
+            if steps not in entry.seen:
+                entry.seen.add(steps)
+                entry.plans.append(steps)
+
+    def _decompose(self, compound, state):
+        method = self.methods.get(compound[0])
+        if method is None:
+            raise KeyError(f"No HTN method for task '{compound[0]}'")
+        alternatives = iter(method(state, *compound[1:]))
+        while True:
+            started = time.perf_counter()
+            subtasks = next(alternatives, None)
+            self.stats.successor_ms += (time.perf_counter() - started) * 1000.0
+            if subtasks is None:
+                return
+            self.expansions += 1
+            self.stats.expanded += 1
+            if self.expansions > self.max_expansions:
+                return
+            yield from self._solve(subtasks, 0, state)
+
+    def _key(self, compound, state):
+        mask = self.relevant(compound)
+        bits = state.bits if mask is None else state.bits & mask
+        atoms = self.task.facts.atoms
+        # The goal limits prune plans, so requests with different limits cannot share results
+        return (compound, frozenset(atoms[i] for i in iter_bits(bits)),
+                tuple(sorted(state.numeric_fluents.items())), self.limits)
+
+    def _replay(self, steps, state):
+        for label in steps:
+            action = self.task.action_named(label)
+            if action is None or not action.is_applicable(state):
+                return None
+            state = action.apply(state)
+        return state
+
+    def _within_limits(self, state) -> bool:
+        fluents = state.numeric_fluents
+        return all(fluents.get(fluent, 0) <= limit for fluent, limit in self.limits)
+
+
+def _monotone_limits(task):
+    """'<=' fluent goals on fluents no action decreases: exceeding them is a dead end."""
+    limits = []
+    for fluent, op, value in task.goal_fluents:
+        if op not in ('<=', '<'):
+            continue
+        if all(effect == '+' and amount >= 0
+               for action in task.actions for name, effect, amount in action.numeric_eff if name == fluent):
+            limits.append((fluent, value))
+    return limits
+
+
+# ---------------------------------------------------------------------
+# TRIP METHOD LIBRARY: TRIP -> CITIES -> DAYS -> ACTIVITIES
+# ---------------------------------------------------------------------
+class TripMethods:
+    """
+    HTN methods for a multi-city trip over a ground task:
+      ('trip', cities, days, end)  -> cities in order, then go to `end`
+      ('cities', cities, days)     -> first city for its share of days, or skip it
+      ('city', city, days)         -> go there, then `days` days of activities
+      ('day', city)                -> best-ranked unvisited attractions (DAY_VISITS
+                                      down to none) and a meal, then without the meal
+    """
+
+    def __init__(self, task, move_action: str = 'travel', visit_action: str = 'visit_attraction',
+                 dine_action: str = 'dine', city_param: str = 'loc', day_visits: int = DAY_VISITS,
+                 rank: Optional[Callable[[GroundAction], float]] = None):
+        self.task = task
+        self.day_visits = day_visits
+        self.moves: Dict[Tuple[str, str], GroundAction] = {}
+        self.visits: Dict[str, List[GroundAction]] = {}
+        self.meals: Dict[str, List[GroundAction]] = {}
+        self.masks: Dict[str, int] = {}
+        for action in task.actions:
+            if action.name == move_action:
+                self.moves[(action.bindings.get('from'), action.bindings.get('to'))] = action
+                continue
+            if action.name == visit_action:
+                group = self.visits
+            elif action.name == dine_action:
+                group = self.meals
+            else:
+                continue
+            city = action.bindings[city_param]
+            group.setdefault(city, []).append(action)
+            # A city's activities only read and write these facts (plus where we are)
+            self.masks[city] = (self.masks.get(city, task.anchor_mask)
+                                | action.pre | action.neg | action.add | action.delete)
+        if rank is not None:
+            for city_visits in self.visits.values():
+                city_visits.sort(key=rank)
+        self.methods = {
+            'trip': self.trip,
+            'cities': self.cities,
+            'city': self.city,
+            'go': self.go,
+            'days': self.days,
+            'day': self.day,
+        }
+
+    def relevant(self, compound) -> Optional[int]:
+        if compound[0] == 'day':
+            return self.masks.get(compound[1], self.task.anchor_mask)
+        if compound[0] == 'go':
+            return self.task.anchor_mask
+        return None
+
+    def trip(self, state, cities, days, end):
+        yield [('cities', cities, split_days(days, len(cities))), ('go', end)]
+
+    def cities(self, state, cities, days):
+        if not cities:
+            yield []
+            return
+        yield [('city', cities[0], days[0]), ('cities', cities[1:], days[1:])]
+        yield [('cities', cities[1:], days[1:])]
+
+    def city(self, state, city, days):
+        yield [('go', city), ('days', city, days)]
+
+    def go(self, state, city):
+        here = self._location(state)
+        if here == city:
+            yield []
+        elif (here, city) in self.moves:
+            yield [self.moves[(here, city)]]
+
+    def days(self, state, city, days):
+        yield [('day', city)] * days
+
+    def day(self, state, city):
+        bits = state.bits
+        open_visits = [a for a in self.visits.get(city, ()) if bits & a.pre == a.pre and not bits & a.neg]
+        meal = next((a for a in self.meals.get(city, ()) if not bits & a.neg), None)
+        for count in range(min(self.day_visits, len(open_visits)), -1, -1):
+            chosen = open_visits[:count]
+            if meal is not None:
+                yield chosen + [meal]
+            yield chosen
+
+    def _location(self, state) -> Optional[str]:
+        for fact_id in iter_bits(state.bits & self.task.anchor_mask):
+            return self.task.facts.atoms[fact_id][1][0]
+        return None
+
+
+def split_days(days: int, cities: int) -> Tuple[int, ...]:
+    """Share `days` over the cities, earlier cities first; every city gets at least one."""
+    if cities == 0:
+        return ()
+    base, extra = divmod(max(days, cities), cities)
+    return tuple(base + (1 if i < extra else 0) for i in range(cities))
@@ -0,0 +1,117 @@
+# landmarks.py
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from grounding import iter_bits
+
+INF = math.inf
+
+
+@dataclass
+class LandmarkGraph:
+    """Fact landmarks of a ground task with their greedy-necessary orderings."""
+    facts: List[int] = field(default_factory=list)               # landmark fact ids, goals first
+    before: Dict[int, List[int]] = field(default_factory=dict)   # fact -> landmarks it must precede
+    achievers: Dict[int, List[int]] = field(default_factory=dict)  # fact -> ids of actions adding it
+    goal_mask: int = 0
+
+
+def extract_landmarks(task) -> LandmarkGraph:
+    """
+    Backchain from the goal facts: a precondition shared by every action
+    that adds a landmark must hold right before that landmark is first
+    reached, so it is a landmark ordered before it. For the trip domain this
+    finds `(at city)` for every must-visit city (all its visits need it)
+    next to the goal facts themselves.
+    """
+    adders: Dict[int, List[int]] = {}
+    for action in task.actions:
+        for fact_id in iter_bits(action.add):
+            adders.setdefault(fact_id, []).append(action.id)
+
+    graph = LandmarkGraph(goal_mask=task.goal_mask)
+    agenda = list(iter_bits(task.goal_mask))
+    known = set(agenda)
+    while agenda:
+        fact_id = agenda.pop(0)
+        graph.facts.append(fact_id)
+        achievers = adders.get(fact_id, [])
+        graph.achievers[fact_id] = achievers
+        if not achievers or (task.initial_state.bits >> fact_id) & 1:
+            continue
+        shared = -1
+        for action_id in achievers:
+            shared &= task.actions[action_id].pre
+        for pre_id in iter_bits(shared):
+            graph.before.setdefault(pre_id, []).append(fact_id)
+            if pre_id not in known:
+                known.add(pre_id)
+                agenda.append(pre_id)
+    return graph
+
+
+class LandmarkHeuristic:
+    """
+    Landmark count with uniform cost partitioning: each action's cost is
+    split evenly over the landmarks it adds, and a landmark still required
+    costs its cheapest share. A landmark counts as reached once it, or a
+    landmark it is ordered before, holds; reached goals and landmarks
+    needed by unreached ones are required again while false. The state
+    alone decides this (no per-path bookkeeping), so it plugs into every
+    search in search.py. Landmarks say nothing about numeric goals, so a
+    `relaxed` heuristic (h_FF) can be added on top to cover them.
+    """
+
+    def __init__(self, task, relaxed: Optional[Callable] = None):
+        self.task = task
+        self.graph = extract_landmarks(task)
+        self.relaxed = relaxed
+
+        landmark_mask = 0
+        for fact_id in self.graph.facts:
+            landmark_mask |= 1 << fact_id
+        shares = {}
+        for action in task.actions:
+            count = bin(action.add & landmark_mask).count('1')
+            if count:
+                shares[action.id] = action.cost / count
+        self.costs = {
+            fact_id: min((shares[a] for a in self.graph.achievers[fact_id]), default=INF)
+            for fact_id in self.graph.facts
+        }
+        # A landmark is reached if it or anything it precedes (transitively) holds
+        self.reached_mask = {fact_id: self._closure(fact_id) for fact_id in self.graph.facts}
+
+    def _closure(self, fact_id) -> int:
+        mask, stack = 0, [fact_id]
+        while stack:
+            current = stack.pop()
+            if (mask >> current) & 1:
+                continue
+            mask |= 1 << current
+            stack.extend(self.graph.before.get(current, ()))
+        return mask
+
+    def landmark_cost(self, state) -> float:
+        bits = state.bits
+        total = 0.0
+        for fact_id in self.graph.facts:
+            if (bits >> fact_id) & 1:
+                continue
+            if bits & self.reached_mask[fact_id] and not self._needed_again(fact_id, bits):
+                continue
+            total += self.costs[fact_id]
+        return total
+
+    def _needed_again(self, fact_id, bits) -> bool:
+        """A reached landmark that is false again: still needed for the goal or a later landmark?"""
+        if (self.graph.goal_mask >> fact_id) & 1:
+            return True
+        return any(not bits & self.reached_mask[later] for later in self.graph.before.get(fact_id, ()))
+
+    def __call__(self, state) -> float:
+        landmarks = self.landmark_cost(state)
+        if landmarks == INF or self.relaxed is None:
+            return landmarks
+        return landmarks + self.relaxed(state)
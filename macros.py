@@ -0,0 +1,115 @@
+# macros.py
+from typing import Callable, Dict, List, Optional
+
+from grounding import GroundAction, GroundTask, iter_bits
+
+
+class MacroAction(GroundAction):
+    """Ground action composed from a sequence of primitives; `steps` keeps them for plan output."""
+
+    __slots__ = ('steps',)
+
+    def __init__(self, action_id, name, bindings, steps, pre, neg, add, delete,
+                 numeric_pre, numeric_eff, cost, anchor=None):
+        super().__init__(action_id, name, bindings, pre, neg, add, delete,
+                         numeric_pre, numeric_eff, cost, anchor)
+        self.steps = steps
+
+
+def compose(steps: List[GroundAction]) -> Optional[tuple]:
+    """
+    Sequential composition of ground actions:
+    (pre, neg, add, delete, numeric_pre, numeric_eff, cost), or None if a
+    later step can never apply after the earlier ones. Numeric effects must
+    be additive; later numeric preconditions are shifted by the earlier deltas.
+    """
+    pre = neg = add = delete = 0
+    delta: Dict[str, float] = {}
+    numeric_pre = []
+    cost = 0
+    for step in steps:
+        # A precondition deleted earlier (and not re-added) or a forbidden fact added earlier cannot hold
+        if step.pre & delete & ~add or step.neg & add:
+            return None
+        pre |= step.pre & ~add
+        neg |= step.neg & ~delete
+        for fluent, op, value in step.numeric_pre:
+            numeric_pre.append((fluent, op, value - delta.get(fluent, 0)))
+        for fluent, op, value in step.numeric_eff:
+            if op not in ('+', '-'):
+                return None
+            delta[fluent] = delta.get(fluent, 0) + (value if op == '+' else -value)
+        add = (add & ~step.delete) | step.add
+        delete = (delete & ~step.add) | step.delete
+        cost += step.cost
+    numeric_eff = tuple((fluent, '+', value) for fluent, value in delta.items() if value)
+    return pre, neg, add, delete, tuple(numeric_pre), numeric_eff, cost
+
+
+def compile_visit_macros(task, move_action: str = 'travel', visit_action: str = 'visit_attraction',
+                         dine_action: str = 'dine', city_param: str = 'loc',
+                         max_visits: Optional[int] = None,
+                         rank: Optional[Callable[[GroundAction], float]] = None) -> GroundTask:
+    """
+    Macro task for the visit-city HTN method: "travel to X, visit attraction
+    subset S, then dine at X's first restaurant (if any)", with aggregate
+    masks, cost and resource deltas. S ranges over the best-ranked prefixes
+    of X's visits by `rank` (lower first), up to `max_visits` long, so each
+    city contributes one macro per prefix length instead of one per subset.
+    Primitive travel stays for plain moves (e.g. the way home); primitive
+    visits and meals are replaced by the macros, so search depth follows
+    the number of cities rather than activities. Cities occupied in the
+    initial state also get macros without travel.
+    """
+    visits: Dict[str, List[GroundAction]] = {}
+    meals: Dict[str, List[GroundAction]] = {}
+    moves: List[GroundAction] = []
+    for action in task.actions:
+        if action.name == move_action:
+            moves.append(action)
+        elif action.name == visit_action:
+            visits.setdefault(action.bindings[city_param], []).append(action)
+        elif action.name == dine_action:
+            meals.setdefault(action.bindings[city_param], []).append(action)
+
+    atoms = task.facts.atoms
+    occupied = {atoms[fact_id][1][0] for fact_id in iter_bits(task.initial_state.bits & task.anchor_mask)}
+
+    actions: List[GroundAction] = []
+    for move in moves:
+        actions.append(GroundAction(len(actions), move.name, move.bindings, move.pre, move.neg,
+                                    move.add, move.delete, move.numeric_pre, move.numeric_eff,
+                                    move.cost, move.anchor))
+
+    def add_macro(leg, city, subset, meal):
+        steps = ([leg] if leg is not None else []) + list(subset) + ([meal] if meal is not None else [])
+        composed = compose(steps)
+        if composed is None:
+            return
+        bindings = {
+            'from': leg.bindings.get('from') if leg is not None else city,
+            'city': city,
+            'attractions': len(subset),
+        }
+        actions.append(MacroAction(len(actions), 'visit_city', bindings, steps, *composed,
+                                   anchor=steps[0].anchor))
+
+    for city, city_visits in visits.items():
+        if rank is not None:
+            city_visits = sorted(city_visits, key=rank)
+        if max_visits is not None:
+            city_visits = city_visits[:max_visits]
+        meal = (meals.get(city) or [None])[0]
+        legs = [m for m in moves if m.bindings.get('to') == city]
+        if city in occupied:
+            legs.append(None)
+        for size in range(1, len(city_visits) + 1):
+            for leg in legs:
+                add_macro(leg, city, city_visits[:size], meal)
+
+    anchor_mask = 0
+    for action in actions:
+        if action.anchor is not None:
+            anchor_mask |= 1 << action.anchor
+    return GroundTask(task.facts, actions, task.initial_state, task.goal_mask,
+                      task.goal_fluents, task.static_mask, anchor_mask)
@@ -1,7 +1,11 @@
 # main.py
 from typing import List, Dict, Tuple
 from planner import RealPlanner
+from pddl_ast import PDDLDomain, PDDLProblem
 from pddl_builder import PDDLBuilder
+from route_optimizer import haversine_km, optimize_order
+from attraction_selector import select_attractions
+from scheduler import DayScheduler, chronological
 
 # Optional plotting
 try:
@@ -42,6 +46,16 @@ USA_DISTANCE_MATRIX = {
     # default fallback if pair missing:
 }
 
+# [lat, lon] of each city, for pairs the matrix does not list
+CITY_COORDINATES = {
+    "los_angeles": [34.0522, -118.2437],
+    "san_francisco": [37.7749, -122.4194],
+    "las_vegas": [36.1699, -115.1398],
+    "new_york": [40.7128, -74.0060],
+    "chicago": [41.8781, -87.6298],
+    "miami": [25.7617, -80.1918],
+}
+
 
 # ---------------------------------------------------------------------
 # ATTRACTION METADATA
@@ -179,7 +193,7 @@ class TripEngine:
 
     def __init__(self):
         self.planner = RealPlanner()
-        self.builder = PDDLBuilder()
+        self.builder = PDDLBuilder(connectivity='complete')
 
     # -----------------------------------------------
     # MAIN ENTRY
@@ -190,11 +204,19 @@ class TripEngine:
         budget: int,
         days: int,
         interests: List[str]
-    ) -> Tuple[List[Dict], str, str, List[str], Dict]:
+    ) -> Tuple[List[Dict], PDDLDomain, PDDLProblem, List[str], Dict]:
 
         if not destinations:
             raise ValueError("No destinations selected.")
 
+        # Shortest round trip from home instead of checkbox order
+        destinations = optimize_order(
+            destinations,
+            self._travel_distance_km,
+            "home",
+            "home"
+        )
+
         # Build domain + problem
         domain = self.builder.build_domain()
         problem = self.builder.build_problem(
@@ -203,11 +225,8 @@ class TripEngine:
             destinations
         )
 
-        # DEBUG PRINT
-        print("=== DOMAIN ===")
-        print(domain)
-        print("=== PROBLEM ===")
-        print(problem)
+        print(f"PDDL: {len(domain.actions)} actions, {len(problem.objects)} objects, "
+              f"{len(problem.init)} init facts, {len(problem.goal)} goals")
 
         # Real PDDL plan with fallback
         raw_plan = self.planner.solve_with_fallback(domain, problem)
@@ -216,7 +235,7 @@ class TripEngine:
         itinerary = self._interpret_plan(raw_plan, budget, days, interests)
 
         # Compute summary
-        summary = self._summarize(itinerary, budget)
+        summary = self._summarize(itinerary, budget, days)
 
         return itinerary, domain, problem, raw_plan, summary
 
@@ -232,8 +251,8 @@ class TripEngine:
     ) -> List[Dict]:
 
         itinerary = []
-        current_day = 1
-        current_time = 9 * 60   # start 09:00
+        schedule = DayScheduler(days=days)   # days start 09:00
+        slots = []
 
         for step in plan:
             tokens = (
@@ -248,17 +267,17 @@ class TripEngine:
             if tokens[0] == "travel":
                 frm, to = tokens[1], tokens[2]
                 cost, duration = self._travel_cost_duration(frm, to)
+                slot = schedule.place(duration, barrier=True)
 
                 itinerary.append({
                     "type": "travel",
                     "description": f"Travel from {self._label(frm)} to {self._label(to)}",
                     "cost": cost,
                     "duration": duration,
-                    "day": current_day,
-                    "time": self._time_str(current_time)
+                    "day": slot.day,
+                    "time": self._time_str(slot.start)
                 })
-
-                current_time += duration
+                slots.append(slot)
 
             elif tokens[0] == "visit":
                 city = tokens[1]
@@ -272,43 +291,49 @@ class TripEngine:
                         if any(tag in interests for tag in a["tags"])
                     ]
 
-                if not attractions:
+                # take the best-matching attraction that still fits budget and day
+                spent = sum(item["cost"] for item in itinerary)
+                selection = select_attractions(
+                    attractions,
+                    value=lambda a: len(set(a["tags"]) & set(interests)) if interests else 1,
+                    cost=lambda a: a["price"],
+                    duration=lambda a: a["duration"],
+                    budget=budget - spent,
+                    minutes=schedule.day_end - schedule.day_start,
+                    max_items=1
+                )
+                if not selection.items:
                     continue
 
-                # take the top attraction (simple choice)
-                a = attractions[0]
+                a = selection.items[0]
+                slot = schedule.place(a["duration"], a.get("open_hours"))
 
                 itinerary.append({
                     "type": "visit",
                     "description": f"Visit {a['name']}",
                     "cost": a["price"],
                     "duration": a["duration"],
-                    "day": current_day,
-                    "time": self._time_str(current_time)
+                    "day": slot.day,
+                    "time": self._time_str(slot.start)
                 })
+                slots.append(slot)
 
-                current_time += a["duration"]
-
-                # Add a meal if time allows
+                # Add a meal if a lunch or dinner slot is still free today
                 restaurants = RESTAURANTS.get(city, [])
-                if restaurants and current_time < (19 * 60):
+                slot = schedule.place_meal(75, roll_over=False) if restaurants else None
+                if slot is not None:
                     r = restaurants[0]
                     itinerary.append({
                         "type": "meal",
                         "description": f"Dine at {r['name']}",
                         "cost": r["price"],
                         "duration": 75,
-                        "day": current_day,
-                        "time": self._time_str(current_time)
+                        "day": slot.day,
+                        "time": self._time_str(slot.start)
                     })
-                    current_time += 75
-
-            # Day rollover
-            if current_time >= 19 * 60:
-                current_day += 1
-                current_time = 9 * 60
+                    slots.append(slot)
 
-        return itinerary
+        return chronological(itinerary, slots)
 
     # -----------------------------------------------
     # COST + DURATION MODELS
@@ -323,12 +348,21 @@ class TripEngine:
         cost = round(km * 0.12)  # $0.12 per km
         return cost, mins
 
+    def _travel_distance_km(self, frm: str, to: str):
+        """Road km from the matrix, else great-circle km; 0 when either city has no coordinates (e.g. home)."""
+        if (frm, to) in USA_DISTANCE_MATRIX:
+            return USA_DISTANCE_MATRIX[(frm, to)][0]
+        if frm not in CITY_COORDINATES or to not in CITY_COORDINATES:
+            return 0.0
+        return haversine_km(CITY_COORDINATES[frm], CITY_COORDINATES[to])
+
     # -----------------------------------------------
     # SUMMARY
     # -----------------------------------------------
-    def _summarize(self, itinerary: List[Dict], budget: int):
+    def _summarize(self, itinerary: List[Dict], budget: int, days: int):
         total_cost = sum(i["cost"] for i in itinerary)
         total_minutes = sum(i["duration"] for i in itinerary)
+        days_used = max((i["day"] for i in itinerary), default=0)
 
         cost_by_type = {}
         for item in itinerary:
@@ -341,6 +375,8 @@ class TripEngine:
             "remaining": budget - total_cost,
             "hours": round(total_minutes / 60, 1),
             "cost_by_type": cost_by_type,
+            "days_used": days_used,
+            "extra_days": max(0, days_used - days),  # trip outgrew the requested days
         }
 
     # -----------------------------------------------
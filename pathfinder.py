@@ -33,10 +33,37 @@ import requests
 import sqlite3
 import datetime
 from dataclasses import dataclass
+from functools import partial
 from typing import List, Dict, Optional
 import xml.etree.ElementTree as ET
 from datetime import datetime, timedelta
 
+from grounding import FactTable, COMPARATORS, ARITHMETIC, ground_task
+from search import SearchNode, SearchStats, astar, anytime_search, ida_star, extract_path, extract_plan, plan_labels
+from heuristics import make_heuristic
+from portfolio import run_portfolio
+from route_optimizer import optimize_order, haversine_km
+from attraction_selector import select_attractions
+from scheduler import DAY_END, DAY_START, DayScheduler, chronological
+from validator import validate_plan
+from feasibility import check_route
+from macros import compile_visit_macros
+from htn import HTNMemo, HTNPlanner, TripMethods
+from hda import hda_search
+from plan_cache import PlanCache, catalog_version, normalize_destinations, request_key
+from pattern_db import PDBHeuristic, PDBStore
+from artifacts import ArtifactSink, AsyncArtifactStore, NullArtifactSink
+from pddl_reduce import reduce_problem
+from planner import solve_locally, validate_pddl_plan
+from pddl_ast import (DurativeAction, LiftedAction, PDDLAtom, PDDLDomain, PDDLProblem,
+                      domain_text, problem_text, write_domain, write_problem)
+
+# What the itinerary builders charge per travel leg and per hotel stay; the precheck bounds use the same figures
+TRAVEL_LEG_COST = 150
+TRAVEL_LEG_MINUTES = 120
+HOTEL_COST = 120
+HOTEL_MINUTES = 60
+
 @dataclass
 class ExternalDataSource:
     """External data source configuration"""
@@ -45,6 +72,114 @@ class ExternalDataSource:
     api_key: Optional[str] = None
     data_type: str = "json"
 
+class PDDLPredicate:
+    """PDDL atom, lifted ("?loc") or ground ("paris")"""
+
+    __slots__ = ('name', 'args')
+
+    def __init__(self, name, *args):
+        self.name = name
+        self.args = tuple(args)
+
+    def ground(self, bindings):
+        """Substitute ?parameters using a bindings dict keyed without '?'"""
+        return PDDLPredicate(self.name, *(
+            bindings.get(arg[1:], arg) if arg.startswith('?') else arg
+            for arg in self.args
+        ))
+
+    def __eq__(self, other):
+        return isinstance(other, PDDLPredicate) and self.name == other.name and self.args == other.args
+
+    def __hash__(self):
+        return hash((self.name, self.args))
+
+    def __repr__(self):
+        return f"({' '.join((self.name,) + self.args)})"
+
+class PDDLState:
+    """PDDL state: predicates interned into an integer bitset plus numeric fluents"""
+
+    __slots__ = ('facts', 'bits', 'numeric_fluents')
+
+    def __init__(self, predicates=(), numeric_fluents=None, facts=None, bits=0):
+        self.facts = facts if facts is not None else FactTable()
+        self.bits = bits | self.facts.mask(predicates)
+        self.numeric_fluents = dict(numeric_fluents or {})
+
+    @property
+    def predicates(self):
+        """Decoded predicate set (O(facts) - avoid in search loops)"""
+        bits = self.bits | self.facts.static_bits
+        return {PDDLPredicate(name, *args) for name, args in self.facts.decode(bits)}
+
+    def has_predicate(self, pred):
+        fact_id = self.facts.get(pred.name, pred.args)
+        return fact_id is not None and bool(((self.bits | self.facts.static_bits) >> fact_id) & 1)
+
+    def holds_all(self, mask):
+        return (self.bits | self.facts.static_bits) & mask == mask
+
+    def get_fluent(self, name, default=0):
+        return self.numeric_fluents.get(name, default)
+
+    def copy(self):
+        return PDDLState(numeric_fluents=self.numeric_fluents, facts=self.facts, bits=self.bits)
+
+    def signature(self):
+        """Hashable (bitset, fluent tuple) key for duplicate detection"""
+        return (self.bits, self.facts.pack_fluents(self.numeric_fluents))
+
+    def __eq__(self, other):
+        return isinstance(other, PDDLState) and self.signature() == other.signature()
+
+    def __hash__(self):
+        return hash(self.signature())
+
+class PDDLAction:
+    """Lifted PDDL action with predicate and numeric preconditions/effects"""
+
+    def __init__(self, name, parameters, preconditions, effects, cost=1):
+        self.name = name
+        self.parameters = parameters
+        self.preconditions = preconditions
+        self.effects = effects
+        self.cost = cost
+
+    def is_applicable(self, state, bindings):
+        """Check preconditions: PDDLPredicate, ('not', pred) or ('numeric', op, fluent, value)"""
+        for pre in self.preconditions:
+            if isinstance(pre, PDDLPredicate):
+                if not state.has_predicate(pre.ground(bindings)):
+                    return False
+            elif pre[0] == 'not':
+                if state.has_predicate(pre[1].ground(bindings)):
+                    return False
+            elif pre[0] == 'numeric':
+                _, op, fluent, value = pre
+                if not COMPARATORS[op](state.get_fluent(fluent, 0), value):
+                    return False
+        return True
+
+    def apply(self, state, bindings):
+        """Return the successor state; delete effects are applied before add effects"""
+        new_state = state.copy()
+        facts = state.facts
+        add_bits = del_bits = 0
+        for effect in self.effects:
+            kind = effect[0]
+            if kind == 'add':
+                pred = effect[1].ground(bindings)
+                add_bits |= 1 << facts.intern(pred.name, pred.args)
+            elif kind == 'del':
+                pred = effect[1].ground(bindings)
+                del_bits |= 1 << facts.intern(pred.name, pred.args)
+            elif kind == 'assign':
+                _, fluent, op, value = effect
+                new_state.numeric_fluents[fluent] = ARITHMETIC[op](new_state.get_fluent(fluent, 0), value)
+        new_state.bits = (new_state.bits & ~del_bits) | add_bits
+        return new_state
+
 class ExternalDataIntegrator:
     """Integrates external data sources for PDDL planning"""
     
@@ -449,92 +584,100 @@ class ExternalDataIntegrator:
 class PDDLDomainGenerator:
     """Generates proper PDDL domain files with external data integration"""
     
-    def __init__(self, external_data: ExternalDataIntegrator):
+    def __init__(self, external_data: ExternalDataIntegrator, artifacts: Optional[ArtifactSink] = None):
         self.external_data = external_data
+        self.artifacts = artifacts or NullArtifactSink()
     
     def generate_complete_pddl_domain(self, destinations):
-        """Generate a complete PDDL domain file with external data"""
-        domain_content = f"""(define (domain travel-planning-external)
-  (:requirements :strips :typing :fluents :durative-actions :timed-initial-literals)
-  
-  (:types 
-    location - object
-    attraction - object 
-    restaurant - object
-    transport - object
-    weather-condition - object
-  )
-  
-  (:predicates
-    (at ?loc - location)
-    (connected ?from - location ?to - location)
-    (attraction-at ?attr - attraction ?loc - location)
-    (restaurant-at ?rest - restaurant ?loc - location)
-    (visited-attraction ?attr - attraction)
-    (dined-at ?rest - restaurant)
-    (weather-good ?loc - location)
-    (attraction-open ?attr - attraction)
-    (external-data-integrated)
-  )
-  
-  (:functions
-    (budget) - number
-    (time) - number
-    (satisfaction) - number
-    (external-rating ?attr - attraction) - number
-    (live-price ?attr - attraction) - number
-    (weather-impact ?loc - location) - number
-  )
-  
-  (:durative-action travel-external
-    :parameters (?from - location ?to - location)
-    :duration (= ?duration 120)
-    :condition (and
-      (at start (at ?from))
-      (at start (connected ?from ?to))
-      (at start (>= (budget) 100))
-      (at start (external-data-integrated))
-    )
-    :effect (and
-      (at start (not (at ?from)))
-      (at end (at ?to))
-      (at start (decrease (budget) 100))
-      (at end (increase (time) 120))
-    )
-  )
-  
-  (:durative-action visit-external-attraction
-    :parameters (?attr - attraction ?loc - location)
-    :duration (= ?duration 90)
-    :condition (and
-      (at start (at ?loc))
-      (at start (attraction-at ?attr ?loc))
-      (at start (attraction-open ?attr))
-      (at start (>= (budget) (live-price ?attr)))
-      (at start (weather-good ?loc))
-      (at start (external-data-integrated))
-    )
-    :effect (and
-      (at end (visited-attraction ?attr))
-      (at start (decrease (budget) (live-price ?attr)))
-      (at end (increase (time) 90))
-      (at end (increase (satisfaction) (* (external-rating ?attr) (weather-impact ?loc))))
-    )
-  )
-)
-"""
+        """Build the temporal/numeric domain and write it out for external PDDL solvers"""
+        domain = self.build_complete_pddl_domain()
         
-        # Save to file for external PDDL solvers
-        with open('travel_external_domain.pddl', 'w') as f:
-            f.write(domain_content)
-            
-        return domain_content
+        # Kept for external PDDL solvers; the sink writes it (if at all) off this thread
+        self.artifacts.capture('travel_external_domain', partial(write_domain, domain))
+        
+        return domain
+    
+    def build_complete_pddl_domain(self):
+        """The temporal/numeric travel domain as a pddl_ast object"""
+        domain = PDDLDomain(
+            'travel-planning-external',
+            requirements=[':strips', ':typing', ':negative-preconditions', ':fluents',
+                          ':durative-actions', ':timed-initial-literals'],
+            types={t: 'object' for t in ('location', 'attraction', 'restaurant', 'transport', 'weather-condition')}
+        )
+        domain.predicates.update({
+            'at': [('?loc', 'location')],
+            'attraction-at': [('?attr', 'attraction'), ('?loc', 'location')],
+            'restaurant-at': [('?rest', 'restaurant'), ('?loc', 'location')],
+            'visited-attraction': [('?attr', 'attraction')],
+            'dined-at': [('?rest', 'restaurant')],
+            'weather-good': [('?loc', 'location')],
+            'attraction-open': [('?attr', 'attraction')],
+            'external-data-integrated': [],
+        })
+        domain.functions.update({
+            'budget': [],
+            'time': [],
+            'satisfaction': [],
+            'external-rating': [('?attr', 'attraction')],
+            'live-price': [('?attr', 'attraction')],
+            'weather-impact': [('?loc', 'location')],
+        })
+
+        def at(*parts):
+            return ('at',) + parts
+
+        integrated = PDDLAtom('external-data-integrated', ())
+        domain.durative_actions.append(DurativeAction(
+            'travel-external', [('?from', 'location'), ('?to', 'location')],
+            duration=('=', '?duration', 120),
+            condition=[
+                at('start', PDDLAtom('at', ('?from',))),
+                at('start', ('not', PDDLAtom('at', ('?to',)))),
+                at('start', ('>=', ('budget',), 100)),
+                at('start', integrated),
+            ],
+            effect=[
+                at('start', ('not', PDDLAtom('at', ('?from',)))),
+                at('end', PDDLAtom('at', ('?to',))),
+                at('start', ('decrease', ('budget',), 100)),
+                at('end', ('increase', ('time',), 120)),
+            ]
+        ))
+        domain.durative_actions.append(DurativeAction(
+            'visit-external-attraction', [('?attr', 'attraction'), ('?loc', 'location')],
+            duration=('=', '?duration', 90),
+            condition=[
+                at('start', PDDLAtom('at', ('?loc',))),
+                at('start', PDDLAtom('attraction-at', ('?attr', '?loc'))),
+                at('start', PDDLAtom('attraction-open', ('?attr',))),
+                at('start', ('>=', ('budget',), ('live-price', '?attr'))),
+                at('start', PDDLAtom('weather-good', ('?loc',))),
+                at('start', integrated),
+            ],
+            effect=[
+                at('end', PDDLAtom('visited-attraction', ('?attr',))),
+                at('start', ('decrease', ('budget',), ('live-price', '?attr'))),
+                at('end', ('increase', ('time',), 90)),
+                at('end', ('increase', ('satisfaction',),
+                           ('*', ('external-rating', '?attr'), ('weather-impact', '?loc')))),
+            ]
+        ))
+
+        return domain
 
 class AIPlanner:
     """Simplified AI Planner with PDDL structure and external data integration"""
     
-    def __init__(self, external_data: ExternalDataIntegrator):
+    SATISFACTION_GOAL = 80
+    
+    def __init__(self, external_data: ExternalDataIntegrator, artifacts: Optional[ArtifactSink] = None):
         self.external_data = external_data
+        self.artifacts = artifacts or NullArtifactSink()
+        self.external_domain = PDDLDomainGenerator(external_data).build_complete_pddl_domain()
+        
+        # Size cut of the last external problem (pddl_reduce.ReductionReport)
+        self.last_reduction = None
     
     def plan_with_external_data(self, destinations, budget, interests, duration, algorithm='simple'):
         """Simplified planning with external data integration"""
@@ -573,104 +716,106 @@ class AIPlanner:
     
     def _generate_problem_with_external_data(self, destinations, budget, interests, duration, external_data):
         """Generate PDDL problem with integrated external data"""
-        
-        # Build objects from external data
-        objects = ['home'] + destinations
-        external_attractions = []
-        
-        for dest in destinations:
-            dest_attractions = external_data['attractions'].get(dest, [])
-            for i, attr in enumerate(dest_attractions):
-                attr_name = f"ext_{dest}_attr_{i}"
-                external_attractions.append(attr_name)
-                objects.append(attr_name)
-        
-        # Build initial state with external data
-        init_predicates = [
-            "(at home)",
-            "(external-data-integrated)"
-        ]
-        
-        # Add connectivity
-        for dest in destinations:
-            init_predicates.append(f"(connected home {dest})")
-            init_predicates.append(f"(connected {dest} home)")
-            
-        for i, dest1 in enumerate(destinations):
-            for dest2 in destinations[i+1:]:
-                init_predicates.append(f"(connected {dest1} {dest2})")
-                init_predicates.append(f"(connected {dest2} {dest1})")
-        
-        # Add external attractions
-        for dest in destinations:
-            dest_attractions = external_data['attractions'].get(dest, [])
-            for i, attr in enumerate(dest_attractions):
-                attr_name = f"ext_{dest}_attr_{i}"
-                init_predicates.append(f"(attraction-at {attr_name} {dest})")
-                init_predicates.append(f"(attraction-open {attr_name})")
-        
+        problem = self._build_external_problem(destinations, budget, duration, external_data)
+
+        # Unreachable (bad weather), unaffordable and off-interest attractions never reach the solver
+        attractions = self._external_attractions(destinations, external_data)
+        problem, self.last_reduction = reduce_problem(
+            self.external_domain, problem,
+            relevant=self._interest_filter(attractions, interests, external_data)
+        )
+        print(f"[REDUCE] {self.last_reduction.summary()}")
+
+        self.artifacts.capture('travel_external_problem', partial(write_problem, problem))
+
+        return problem
+
+    def _build_external_problem(self, destinations, budget, duration, external_data):
+        """Every location and fetched attraction with its facts, before reduction"""
+        problem = PDDLProblem('travel-external-problem', 'travel-planning-external')
+        problem.objects.update((loc, 'location') for loc in ['home'] + destinations)
+
+        # Initial state with external data
+        problem.init.append(PDDLAtom('at', ('home',)))
+        problem.init.append(PDDLAtom('external-data-integrated', ()))
+
+        # No connectivity facts: every location is reachable from every other, which
+        # travel-external states as (not (at ?to)) instead of n*(n-1) connected facts
+
+        for attr_name, (dest, _) in self._external_attractions(destinations, external_data).items():
+            problem.objects[attr_name] = 'attraction'
+            problem.init.append(PDDLAtom('attraction-at', (attr_name, dest)))
+            problem.init.append(PDDLAtom('attraction-open', (attr_name,)))
+
         # Add weather conditions
         for dest in destinations:
             weather = external_data['weather'].get(dest, {})
             if weather.get('condition') in ['sunny', 'cloudy']:
-                init_predicates.append(f"(weather-good {dest})")
-        
-        problem_content = f"""(define (problem travel-external-problem)
-  (:domain travel-planning-external)
-  
-  (:objects
-    {' '.join(f'{obj} - location' if obj in destinations + ['home'] else f'{obj} - attraction' for obj in objects)}
-  )
-  
-  (:init
-    {chr(10).join(f'    {pred}' for pred in init_predicates)}
-    
-    (= (budget) {budget})
-    (= (time) 0)
-    (= (satisfaction) 0)
-    
-    ; External data values
-    {self._generate_external_function_values(destinations, external_data)}
-  )
-  
-  (:goal
-    (and
-      (at home)
-      (>= (satisfaction) 80)
-      (<= (time) {duration * 12 * 60})
-      (external-data-integrated)
-    )
-  )
-  
-  (:metric minimize (+ (* 0.7 (time)) (* 0.3 (- {budget} (budget)))))
-)
-"""
-        
-        # Save to file
-        with open('travel_external_problem.pddl', 'w') as f:
-            f.write(problem_content)
-            
-        return problem_content
+                problem.init.append(PDDLAtom('weather-good', (dest,)))
+
+        problem.fluents.extend([(('budget',), budget), (('time',), 0), (('satisfaction',), 0)])
+        problem.fluents.extend(self._external_function_values(destinations, external_data))
+
+        problem.goal.append(PDDLAtom('at', ('home',)))
+        problem.goal.append(PDDLAtom('external-data-integrated', ()))
+        problem.goal_conditions.append(('>=', ('satisfaction',), self.SATISFACTION_GOAL))
+        problem.goal_conditions.append(('<=', ('time',), duration * 12 * 60))
+        problem.metric = ('minimize', ('+', ('*', 0.7, ('time',)), ('*', 0.3, ('-', budget, ('budget',)))))
+
+        return problem
+
+    def _external_attractions(self, destinations, external_data):
+        """Attraction object name -> (destination, attraction data)"""
+        return {
+            f"ext_{dest}_attr_{i}": (dest, attr)
+            for dest in destinations
+            for i, attr in enumerate(external_data['attractions'].get(dest, []))
+        }
+
+    def _interest_filter(self, attractions, interests, external_data):
+        """
+        Relevance callback for reduce_problem, or None to keep every attraction.
+        Interests match an attraction's type or category, ignoring case. The
+        filter is skipped when the matching attractions could not earn the
+        satisfaction goal between them, which also covers interests that
+        name no attraction kind at all (e.g. 'food').
+        """
+        wanted = {interest.strip().lower() for interest in interests or () if interest and interest.strip()}
+        matching = {
+            name for name, (_, attr) in attractions.items()
+            if wanted & {str(attr.get(key, '')).lower() for key in ('type', 'category')}
+        }
+        earnable = 0
+        for name in matching:
+            dest, attr = attractions[name]
+            weather = external_data['weather'].get(dest, {})
+            if weather.get('condition') in ['sunny', 'cloudy']:  # visits need weather-good
+                earnable += attr.get('rating', 0) * self._weather_impact(weather)
+        if earnable < self.SATISFACTION_GOAL:
+            return None
+        return lambda obj: obj not in attractions or obj in matching
+
+    def _weather_impact(self, weather):
+        return 10 if weather.get('condition') == 'sunny' else 5
     
-    def _generate_external_function_values(self, destinations, external_data):
-        """Generate function values from external data"""
-        functions = []
-        
+    def _external_function_values(self, destinations, external_data):
+        """Numeric fluent values, as (head, value) pairs, from external data"""
+        values = []
+
         for dest in destinations:
             # Weather impact
             weather = external_data['weather'].get(dest, {})
-            weather_score = 10 if weather.get('condition') == 'sunny' else 5
-            functions.append(f"    (= (weather-impact {dest}) {weather_score})")
-            
+            values.append((('weather-impact', dest), self._weather_impact(weather)))
+
             # Attraction data
             dest_attractions = external_data['attractions'].get(dest, [])
             for i, attr in enumerate(dest_attractions):
                 attr_name = f"ext_{dest}_attr_{i}"
-                functions.append(f"    (= (external-rating {attr_name}) {attr['rating']})")
-                functions.append(f"    (= (live-price {attr_name}) {attr['price']})")
-        
-        return chr(10).join(functions)
-    
+                values.append((('external-rating', attr_name), attr['rating']))
+                values.append((('live-price', attr_name), attr['price']))
+
+        return values
+
     def _simple_real_pddl_planner(self, destinations, external_data, duration=5, budget=2500):
         """Simple but REAL PDDL planning with external data integration"""
         
@@ -680,8 +825,8 @@ class AIPlanner:
         domain = self._create_simple_pddl_domain()
         problem = self._create_simple_pddl_problem(destinations, external_data, budget)
         
-        print(f"📝 PDDL Domain Generated ({len(domain)} chars)")
-        print(f"📝 PDDL Problem Generated ({len(problem)} chars)")
+        print(f"📝 PDDL Domain Generated ({len(domain.actions)} actions)")
+        print(f"📝 PDDL Problem Generated ({len(problem.objects)} objects, {len(problem.goal)} goals)")
         
         # Try real PDDL planner first
         try:
@@ -698,71 +843,35 @@ class AIPlanner:
     
     def _create_simple_pddl_domain(self):
         """Create simple PDDL domain for trip planning"""
-        return """(define (domain simple-travel)
-  (:requirements :strips)
-  
-  (:predicates
-    (at ?loc)
-    (visited ?loc)
-    (connected ?from ?to)
-  )
-  
-  (:action travel
-    :parameters (?from ?to)
-    :precondition (and (at ?from) (connected ?from ?to))
-    :effect (and (not (at ?from)) (at ?to))
-  )
-  
-  (:action explore
-    :parameters (?loc)
-    :precondition (at ?loc)
-    :effect (visited ?loc)
-  )
-)"""
-    
+        domain = PDDLDomain('simple-travel', requirements=[':strips', ':negative-preconditions'])
+        domain.predicates.update({'at': [('?loc', None)], 'visited': [('?loc', None)]})
+        domain.actions.append(LiftedAction(
+            'travel', ['?from', '?to'],
+            preconditions=[PDDLAtom('at', ('?from',)), ('not', PDDLAtom('at', ('?to',)))],
+            effects=[('del', PDDLAtom('at', ('?from',))), ('add', PDDLAtom('at', ('?to',)))]
+        ))
+        domain.actions.append(LiftedAction(
+            'explore', ['?loc'],
+            preconditions=[PDDLAtom('at', ('?loc',))],
+            effects=[('add', PDDLAtom('visited', ('?loc',)))]
+        ))
+        return domain
+
     def _create_simple_pddl_problem(self, destinations, external_data, budget):
         """Create simple PDDL problem with external data"""
-        locations = ['home'] + destinations
-        
-        # Build connections
-        connections = []
-        for i, loc1 in enumerate(locations):
-            for j, loc2 in enumerate(locations):
-                if i != j:
-                    connections.append(f"(connected {loc1} {loc2})")
-        
-        # Build goals from external data
-        goals = []
-        for dest in destinations:
-            goals.append(f"(visited {dest})")
-        goals.append("(at home)")
-        
-        return f"""(define (problem trip-problem)
-  (:domain simple-travel)
-  
-  (:objects {' '.join(locations)})
-  
-  (:init
-    (at home)
-    {chr(10).join(f'    {conn}' for conn in connections)}
-  )
-  
-  (:goal 
-    (and {' '.join(goals)})
-  )
-)"""
-    
+        problem = PDDLProblem('trip-problem', 'simple-travel',
+                              objects={loc: None for loc in ['home'] + destinations})
+        problem.init.append(PDDLAtom('at', ('home',)))
+        problem.goal.extend(PDDLAtom('visited', (dest,)) for dest in destinations)
+        problem.goal.append(PDDLAtom('at', ('home',)))
+        return problem
+
     def _simple_pddl_solver(self, domain, problem):
-        """Simple PDDL solver using basic search"""
-        # This is a simple PDDL-like solver for demonstration
-        # In practice, you'd use a real planner like Fast Downward
-        
+        """Solve the simple domain with the local planner; steps as 'travel home paris'"""
         print("🔍 Simple PDDL solver running...")
-        
-        # For simplicity, generate a basic plan structure
-        # This follows PDDL semantics but uses simplified search
-        return ["travel home chicago", "explore chicago", "travel chicago home"]
-    
+        plan = solve_locally(domain, problem)
+        return [step.strip('()') for step in plan] if plan is not None else None
+
     def _convert_pddl_plan_with_external_data(self, pddl_plan, destinations, external_data):
         """Convert PDDL plan to actions with external data"""
         actions = []
@@ -834,8 +943,8 @@ class AIPlanner:
         try:
             url = "https://solver.planning.domains/solve"
             data = {
-                "domain": domain,
-                "problem": problem
+                "domain": domain if isinstance(domain, str) else domain_text(domain),
+                "problem": problem if isinstance(problem, str) else problem_text(problem)
             }
             
             print("🤖 Calling Planning.Domains API...")
@@ -854,12 +963,19 @@ class AIPlanner:
                         else:
                             plan_actions.append(str(action))
                     
+                    # Only verified plans are returned (and so can be cached)
+                    validation = validate_pddl_plan(domain, problem, plan_actions)
+                    if validation is not None and not validation.valid:
+                        print(f"❌ Planner returned an invalid plan: {validation.reason}")
+                        return None
+                    
                     return {
                         'plan': plan_actions,
                         'planner': 'Planning.Domains API',
                         'raw_result': result,
                         'domain_used': domain,
-                        'problem_used': problem
+                        'problem_used': problem,
+                        'validated': validation is not None
                     }
                 else:
                     print(f"❌ Planning failed: {result.get('result', {}).get('error', 'Unknown error')}")
@@ -909,11 +1025,20 @@ except ImportError:
 class PathFinderAllInOne:
     """Complete PDDL + AI Planner with External Data Integration."""
     
-    def __init__(self):
+    def __init__(self, plan_cache_path=None, artifact_dir=None, pdb_cache_dir=None):
+        # Generated PDDL goes to artifact_dir, content-addressed, from a background thread
+        self.artifacts = AsyncArtifactStore(artifact_dir) if artifact_dir else NullArtifactSink()
+        
         # Initialize external data integration and AI planner
         self.external_data_integrator = ExternalDataIntegrator()
-        self.ai_planner = AIPlanner(self.external_data_integrator)
-        self.pddl_domain_generator = PDDLDomainGenerator(self.external_data_integrator)
+        self.ai_planner = AIPlanner(self.external_data_integrator, self.artifacts)
+        self.pddl_domain_generator = PDDLDomainGenerator(self.external_data_integrator, self.artifacts)
+        
+        # HTN sub-task solutions shared by every request
+        self.htn_memo = HTNMemo()
+        
+        # Counters of the last run of each search engine (search.SearchStats.as_dict)
+        self.search_stats = {}
         
         # Static destination data (enhanced with external data)
         self.destinations_data = {
@@ -1150,34 +1275,118 @@ class PathFinderAllInOne:
                 ]
             }
         }
+        
+        # Intra-city pattern databases, memory-mapped from pdb_cache_dir (default pdb_cache/
+        # beside pattern_db.py); loaded the first time the 'pdb' heuristic is asked for
+        self.pdb_cache_dir = pdb_cache_dir
+        self.pattern_databases = None
+        
+        # Finished itineraries per canonical request; plan_cache_path adds a SQLite tier
+        self.catalog_version = catalog_version(self.destinations_data)
+        self.plan_cache = PlanCache(db_path=plan_cache_path)
     
     def plan_trip(self, destinations, budget=2500, interests=None, duration=5, start_point="home", end_point="home"):
-        """Simplified trip planning using PDDL structure with external data integration."""
-        
+        """Plan a trip, answering repeated requests from the plan cache."""
         if interests is None:
             interests = ['cultural', 'food']
+        destinations = normalize_destinations(destinations)
+        
+        key = request_key(destinations, budget, interests, duration, start_point, end_point, self.catalog_version)
+        itinerary = self.plan_cache.get(key)
+        if itinerary is not None:
+            print(f"[CACHE] Plan cache hit ({self.plan_cache.hits} hits, {self.plan_cache.misses} misses)")
+            return itinerary
+        
+        itinerary = self._plan_trip(destinations, budget, interests, duration, start_point, end_point)
+        if self._itinerary_is_cacheable(itinerary, budget):
+            self.plan_cache.put(key, itinerary)
+        return itinerary
+    
+    def _itinerary_is_cacheable(self, itinerary, budget):
+        """Only keep itineraries that have activities and stay within the budget."""
+        return bool(itinerary.get('activities')) and itinerary.get('total_cost', 0) <= budget
+    
+    def _plan_trip(self, destinations, budget, interests, duration, start_point, end_point):
+        """Simplified trip planning using PDDL structure with external data integration."""
+        
+        # Visit cities in the shortest order rather than the order they were ticked
+        destinations = self._optimize_destination_order(destinations, start_point, end_point)
+        
+        # Fail fast on hopeless requests before fetching data or searching
+        precheck = self._feasibility_precheck(destinations, budget, interests, duration, start_point, end_point)
+        if not precheck.feasible:
+            raise ValueError(f"This trip cannot fit: {precheck.reason}")
+        if precheck.dropped:
+            print(f"[PRECHECK] Dropped {precheck.dropped} to fit; the full trip needs at least "
+                  f"${precheck.min_budget:.0f} and {precheck.min_minutes / 60:.1f} h")
+            destinations = precheck.destinations
         
         print(f"[AI PLANNER] PDDL + AI Planner Starting...")
         print(f"[DATA] External Data Integration: {len(self.external_data_integrator.data_sources)} sources")
         print(f"[PLAN] Destinations: {destinations}")
         print(f"[BUDGET] Budget: ${budget}")
         
+        # Whichever engines or builders actually run add an entry with what they measured
+        self.search_stats = {}
+        started = time.perf_counter()
         try:
             # Simplified AI Planning with External Data
             plan_result = self.ai_planner.plan_with_external_data(
                 destinations, budget, interests, duration
             )
+            self.search_stats['ai_planner'] = {
+                'algorithm': plan_result.get('statistics', {}).get('planning_algorithm'),
+                'plan_steps': len(plan_result.get('plan') or []),
+                'elapsed_ms': round((time.perf_counter() - started) * 1000.0, 2)
+            }
             
             if plan_result and plan_result.get('plan') and len(plan_result['plan']) > 0:
                 print(f"[SUCCESS] AI Planner Success: {len(plan_result['plan'])} actions")
-                return self._convert_ai_plan_to_itinerary(plan_result, destinations, budget, duration)
+                plan_result.setdefault('statistics', {})['search'] = dict(self.search_stats)
+                itinerary = self._convert_ai_plan_to_itinerary(plan_result, destinations, budget, duration)
+                return self._attach_precheck(itinerary, precheck)
                 
         except Exception as e:
             print(f"[WARNING] AI Planning error: {e}")
             # Continue to fallback
         
         print("[FALLBACK] Using enhanced structured planning with external data...")
-        return self._create_enhanced_structured_itinerary_with_external_data(destinations, budget, interests, duration, start_point, end_point)
+        started = time.perf_counter()
+        itinerary = self._create_enhanced_structured_itinerary_with_external_data(destinations, budget, interests, duration, start_point, end_point)
+        self.search_stats['structured_fallback'] = {'elapsed_ms': round((time.perf_counter() - started) * 1000.0, 2)}
+        itinerary.setdefault('statistics', {})['search'] = dict(self.search_stats)
+        return self._attach_precheck(itinerary, precheck)
+    
+    def _feasibility_precheck(self, destinations, budget, interests, duration, start_point, end_point):
+        """
+        Lower bounds on spend and time from what the builders charge for
+        travel legs and hotel stays; trims trailing cities that do not fit.
+        Attractions, meals and the satisfaction goal are optional, so they
+        never fail the check.
+        """
+        return check_route(destinations, start_point, end_point, budget, duration * (DAY_END - DAY_START),
+                           leg=lambda a, b: (TRAVEL_LEG_COST, TRAVEL_LEG_MINUTES),
+                           stay=lambda loc: (HOTEL_COST, HOTEL_MINUTES))
+    
+    def _attach_precheck(self, itinerary, precheck):
+        itinerary.setdefault('statistics', {})['precheck'] = {
+            'minimum_viable_budget': precheck.min_budget,
+            'minimum_hours': round(precheck.min_minutes / 60, 1),
+            'dropped_destinations': precheck.dropped
+        }
+        return itinerary
+    
+    def _optimize_destination_order(self, destinations, start_point="home", end_point="home"):
+        """Shortest visiting order by coordinates (exact up to EXACT_LIMIT cities)."""
+        return optimize_order(destinations, self._leg_distance_km, start_point, end_point)
+    
+    def _leg_distance_km(self, origin, destination):
+        """Great-circle km between two known cities; 0 when either has no coordinates (e.g. home)."""
+        origin_data = self.destinations_data.get(origin)
+        destination_data = self.destinations_data.get(destination)
+        if not origin_data or not destination_data:
+            return 0.0
+        return haversine_km(origin_data['coords'], destination_data['coords'])
     
     def _convert_ai_plan_to_itinerary(self, plan_result, destinations, budget, duration):
         """Convert AI planner output to itinerary format"""
@@ -1195,20 +1404,33 @@ class PathFinderAllInOne:
         external_data = plan_result.get('external_data', {})
         algorithm_used = plan_result.get('statistics', {}).get('planning_algorithm', 'HTN')
         
-        current_time = 9 * 60  # Start at 9 AM
-        day = 1
+        schedule = DayScheduler(days=duration)
+        slots = []
         activities_today = 0  # Track activities for current day
         # Better distribution: ensure activities are spread across all days
         total_activities = len([p for p in plan if not p.startswith('travel-external(from=')])  # Exclude return travel
         max_activities_per_day = max(3, (total_activities + duration - 1) // duration)  # Round up division
         
+        def is_travel(action_str):
+            return "travel" in action_str and ("travel-external" in action_str or action_str.startswith("travel "))
+        
+        def is_hotel(action_str):
+            return "book" in action_str and ("book-external-hotel" in action_str or "book-hotel" in action_str)
+        
+        # Travel and hotels still ahead are paid first; attractions and meals only spend what is left
+        reserved = sum(TRAVEL_LEG_COST if is_travel(a) else HOTEL_COST if is_hotel(a) else 0 for a in plan)
+        
+        def affordable(cost):
+            return itinerary['total_cost'] + reserved + cost <= budget
+        
         for action_str in plan:
-            # Check if we should move to next day (more generous time limits)
-            if (current_time >= 22 * 60 or activities_today >= max_activities_per_day) and day < duration:
-                day += 1
-                current_time = 9 * 60  # Reset to 9 AM next day
+            # Spread activities: move on once today has its share
+            if activities_today >= max_activities_per_day and schedule.has_next_day():
+                schedule.next_day()
                 activities_today = 0
-            if "travel" in action_str and ("travel-external" in action_str or action_str.startswith("travel ")):
+            day = schedule.day
+            slot = None
+            if is_travel(action_str):
                 dest = action_str.split("to=")[1].split(")")[0] if "to=" in action_str else "destination"
                 dest = dest.replace('_', ' ')
                 
@@ -1216,30 +1438,23 @@ class PathFinderAllInOne:
                 weather_info = external_data.get('weather', {}).get(dest, {})
                 weather_desc = f" ({weather_info.get('condition', 'clear')} weather)" if weather_info else ""
                 
+                slot = schedule.place(TRAVEL_LEG_MINUTES, barrier=True)
                 activity = {
                     'type': 'travel',
-                    'name': f'🚗 Travel to {dest.title()} (120 min)',
+                    'name': f'🚗 Travel to {dest.title()} ({TRAVEL_LEG_MINUTES} min)',
                     'description': f'AI-optimized journey with external data integration{weather_desc}',
-                    'day': day,
-                    'formatted_time': self._format_time(current_time),
-                    'duration_minutes': 120,
-                    'cost': 150
+                    'duration_minutes': TRAVEL_LEG_MINUTES,
+                    'cost': TRAVEL_LEG_COST
                 }
                 itinerary['activities'].append(activity)
-                itinerary['total_cost'] += 150
-                current_time += 120
-                activities_today += 1
-                
-                # Long travel might span to next day
-                if current_time >= 21 * 60 and day < duration:
-                    day += 1
-                    current_time = 9 * 60
-                    activities_today = 0
+                itinerary['total_cost'] += TRAVEL_LEG_COST
+                reserved -= TRAVEL_LEG_COST
             
             elif "visit" in action_str and ("visit-external-attraction" in action_str or "visit-attraction" in action_str):
                 # Extract destination and attraction info from action string
                 attraction_name = "AI-Selected Attraction"
                 attraction_cost = 25
+                open_hours = None
                 location = "unknown"
                 
                 # FIXED: Extract location and attraction with strict validation  
@@ -1255,6 +1470,7 @@ class PathFinderAllInOne:
                                 if attr.get('id') == attr_id:
                                     attraction_name = attr.get('name', f'{dest.replace("_", " ").title()} Attraction')
                                     attraction_cost = attr.get('price', 25)
+                                    open_hours = attr.get('open_hours')
                                     break
                 
                 # CRITICAL: Only use attractions that belong to valid destinations
@@ -1266,31 +1482,25 @@ class PathFinderAllInOne:
                         attr = dest_attractions[attr_index]
                         attraction_name = attr.get('name', f'{location.replace("_", " ").title()} Attraction')
                         attraction_cost = attr.get('price', 25)
+                        open_hours = attr.get('open_hours')
                         # Double-check: this attraction MUST belong to this location
                         if not any(attr.get('id') in str(a.get('id', '')) for a in external_data['attractions'].get(location, [])):
                             attraction_name = f"Local {location.replace('_', ' ').title()} Attraction"
                 
+                if not affordable(attraction_cost):
+                    continue
+                slot = schedule.place(90, open_hours)
                 activity = {
                     'type': 'attraction', 
                     'name': f'{attraction_name}',
                     'description': f'AI Planning with Live External Data - Rated attraction',
-                    'day': day,
-                    'formatted_time': self._format_time(current_time),
                     'duration_minutes': 90,
                     'cost': attraction_cost
                 }
                 itinerary['activities'].append(activity)
                 itinerary['total_cost'] += attraction_cost
-                current_time += 90
-                activities_today += 1
-                
-                # Check if we need to move to next day
-                if current_time >= 21 * 60 and day < duration:
-                    day += 1
-                    current_time = 9 * 60
-                    activities_today = 0
             
-            elif "book" in action_str and ("book-external-hotel" in action_str or "book-hotel" in action_str):
+            elif is_hotel(action_str):
                 # Extract hotel ID and ensure it reflects correct location
                 hotel_id = "generic"
                 hotel_location = "unknown"
@@ -1301,33 +1511,24 @@ class PathFinderAllInOne:
                         hotel_location = hotel_id.split("_")[1] if len(hotel_id.split("_")) > 1 else "unknown"
                 
                 hotel_name = f"Hotel in {hotel_location.replace('_', ' ').title()}" if hotel_location != "unknown" else f"AI-Selected Hotel ({hotel_id})"
-                hotel_cost = 120
-                
+                slot = schedule.place(HOTEL_MINUTES)
                 activity = {
                     'type': 'accommodation',
                     'name': f'{hotel_name}',
                     'description': f'AI-planned accommodation with external booking data',
-                    'day': day,
-                    'formatted_time': self._format_time(current_time),
-                    'duration_minutes': 60,
-                    'cost': hotel_cost
+                    'duration_minutes': HOTEL_MINUTES,
+                    'cost': HOTEL_COST
                 }
                 itinerary['activities'].append(activity)
-                itinerary['total_cost'] += hotel_cost
-                current_time += 60
-                activities_today += 1
-                
-                # Check if we need to move to next day
-                if current_time >= 21 * 60 and day < duration:
-                    day += 1
-                    current_time = 9 * 60
-                    activities_today = 0
+                itinerary['total_cost'] += HOTEL_COST
+                reserved -= HOTEL_COST
             
             elif "dine" in action_str and ("dine-external" in action_str or "dine-at-restaurant" in action_str):
                 # Extract restaurant info from external data
                 restaurant_name = "Local Restaurant"
                 restaurant_cost = 35
                 cuisine = "Local Cuisine"
+                open_hours = None
                 
                 # Extract restaurant ID and VERIFY it belongs to correct destination
                 restaurant_location = "unknown"
@@ -1341,6 +1542,7 @@ class PathFinderAllInOne:
                                 restaurant_name = rest.get('name', 'Premium Restaurant')
                                 restaurant_cost = rest.get('price', 35)
                                 cuisine = rest.get('cuisine', 'Local Cuisine')
+                                open_hours = rest.get('open_hours')
                                 restaurant_location = dest
                                 break
                         if restaurant_location != "unknown":
@@ -1350,34 +1552,37 @@ class PathFinderAllInOne:
                 if restaurant_location == "unknown":
                     restaurant_name = "Local Restaurant"
                 
+                if not affordable(restaurant_cost):
+                    continue
+                slot = schedule.place_meal(75, open_hours)
                 activity = {
                     'type': 'dining',
                     'name': f'{restaurant_name}',
                     'description': f'AI-selected dining - {cuisine}',
-                    'day': day,
-                    'formatted_time': self._format_time(current_time),
                     'duration_minutes': 75,
                     'cost': restaurant_cost
                 }
                 itinerary['activities'].append(activity)
                 itinerary['total_cost'] += restaurant_cost
-                current_time += 75
-                activities_today += 1
-                
-                # Check if we need to move to next day  
-                if current_time >= 21 * 60 and day < duration:
-                    day += 1
-                    current_time = 9 * 60
-                    activities_today = 0
+            
+            if slot is not None:
+                activity['day'] = slot.day
+                activity['formatted_time'] = self._format_time(slot.start)
+                slots.append(slot)
+                activities_today = activities_today + 1 if slot.day == day else 1
+        
+        itinerary['activities'] = chronological(itinerary['activities'], slots)
         
         itinerary['statistics'] = {
             'total_activities': len(itinerary['activities']),
             'total_duration_hours': round(sum(a['duration_minutes'] for a in itinerary['activities']) / 60, 1),
             'total_cost': itinerary['total_cost'],
             'budget_remaining': budget - itinerary['total_cost'],
+            'extra_days': schedule.extra_days,  # days the plan needed beyond `duration`
             'ai_planning_used': True,
             'external_data_integrated': True,
             'planning_algorithm': algorithm_used,
+            'search': plan_result.get('statistics', {}).get('search', {}),
             'pddl_actions_executed': len(plan),
             'external_data_sources': len(external_data),
             'weather_integrated': bool(external_data.get('weather')),
@@ -1461,6 +1666,7 @@ class PathFinderAllInOne:
             preconditions=[
                 PDDLPredicate("at", "?loc"),
                 PDDLPredicate("attraction_at", "?attraction", "?loc"),
+                ('not', PDDLPredicate("visited_attraction", "?attraction")),
                 ('numeric', '>=', 'budget', 25)
             ],
             effects=[
@@ -1481,6 +1687,7 @@ class PathFinderAllInOne:
             preconditions=[
                 PDDLPredicate("at", "?loc"),
                 PDDLPredicate("restaurant_at", "?restaurant", "?loc"),
+                ('not', PDDLPredicate("dined_at", "?restaurant")),
                 ('numeric', '>=', 'budget', 40)
             ],
             effects=[
@@ -1529,6 +1736,9 @@ class PathFinderAllInOne:
         # Goal conditions
         goal_predicates = set()
         goal_predicates.add(PDDLPredicate("at", end_point))
+        for dest in destinations:
+            if self.destinations_data.get(dest, {}).get('attractions'):
+                goal_predicates.add(PDDLPredicate("visited_location", dest))
         
         # Must visit destinations and achieve good satisfaction
         goal_fluents = {
@@ -1536,14 +1746,46 @@ class PathFinderAllInOne:
             'satisfaction': ('>=', 50)           # Higher satisfaction target for more activities
         }
         
-        return {
+        problem = {
             'initial_state': initial_state,
             'goal_predicates': goal_predicates,
-            'goal_fluents': goal_fluents
+            'goal_fluents': goal_fluents,
+            'destinations': list(destinations),  # visiting order for the HTN methods
+            'days': duration
         }
+        
+        # Ground once per problem; every search strategy reuses the task
+        problem['task'] = self._ground_problem(self._create_pddl_domain(destinations), problem)
+        return problem
     
-    def _pddl_ai_planner(self, domain, problem):
-        """Advanced AI planning algorithm using PDDL with multiple strategies."""
+    def _ground_problem(self, domain, problem):
+        """Ground domain actions against the problem (static facts split out)."""
+        actions = self._order_actions_by_relevance(domain['actions'], problem['initial_state'], problem['goal_predicates'])
+        return ground_task(actions, problem['initial_state'], problem['goal_predicates'], problem['goal_fluents'])
+    
+    def _grounded_task(self, domain, problem):
+        """Return the problem's ground task, grounding it on first use."""
+        task = problem.get('task')
+        if task is None:
+            task = problem['task'] = self._ground_problem(domain, problem)
+        return task
+    
+    # Portfolio strategies: name -> (planner method, keyword arguments)
+    PORTFOLIO_STRATEGIES = {
+        'htn': ('_htn_planning', {}),
+        'forward_search': ('_advanced_forward_search', {}),
+        'backward_chaining': ('_backward_chaining', {}),
+    }
+    
+    def _pddl_ai_planner(self, domain, problem, portfolio=False, deadline_ms=None, algorithm='astar'):
+        """Advanced AI planning algorithm using PDDL with multiple strategies.
+        
+        portfolio=True runs the strategies in parallel processes instead of one
+        after another and returns the first valid plan (or None by deadline_ms).
+        algorithm='ida' runs the forward search as IDA* in near-constant memory.
+        """
+        if portfolio:
+            return self._portfolio_planner(domain, problem, deadline_ms)
         
         # Try hierarchical task network (HTN) planning first
         plan = self._htn_planning(domain, problem)
@@ -1551,7 +1793,7 @@ class PathFinderAllInOne:
             return plan
             
         # Try forward search with advanced heuristics
-        plan = self._advanced_forward_search(domain, problem)
+        plan = self._advanced_forward_search(domain, problem, algorithm=algorithm)
         if plan:
             return plan
             
@@ -1562,276 +1804,172 @@ class PathFinderAllInOne:
             
         return None
     
+    def _portfolio_planner(self, domain, problem, deadline_ms=None, mode='first'):
+        """Run PORTFOLIO_STRATEGIES concurrently; keep the first (or cheapest) valid plan."""
+        task = self._grounded_task(domain, problem)
+        jobs = {
+            name: (_run_portfolio_strategy, (method, domain, problem, kwargs))
+            for name, (method, kwargs) in self.PORTFOLIO_STRATEGIES.items()
+        }
+        result = run_portfolio(
+            jobs, deadline_ms=deadline_ms, mode=mode,
+            is_valid=lambda plan: self._plan_is_valid(task, plan),
+            score=lambda plan: self._plan_cost(task, plan)
+        )
+        print(f"[PORTFOLIO] Winner: {result.strategy} in {result.elapsed_ms:.0f} ms - {result.status}")
+        return result.plan
+    
+    def _plan_is_valid(self, task, plan):
+        """A plan is valid if it replays on the ground task and reaches the goal."""
+        return validate_plan(task, plan).valid
+    
+    def _plan_cost(self, task, plan):
+        """Total action cost of a plan of step strings."""
+        return sum(task.action_named(step).cost for step in plan)
+    
     def _htn_planning(self, domain, problem):
-        """Hierarchical Task Network planning for trip planning."""
-        initial_state = problem['initial_state']
-        goal_predicates = problem['goal_predicates']
-        goal_fluents = problem['goal_fluents']
-        
-        # Define high-level tasks
-        high_level_plan = []
-        
-        # HTN Method: Plan trip to each destination
-        current_location = "home"
-        for pred in initial_state.predicates:
-            if pred.name == "at":
-                current_location = pred.args[0]
-                break
-        
-        # Get all destinations from connected predicates
-        destinations = []
-        for pred in initial_state.predicates:
-            if pred.name == "connected" and pred.args[0] != pred.args[1]:
-                if pred.args[1] not in destinations and pred.args[1] != "home":
-                    destinations.append(pred.args[1])
-        
-        # HTN decomposition: For each destination, plan visit
-        plan = []
-        current_state = initial_state.copy()
-        
-        for dest in destinations[:2]:  # Limit destinations
-            # High-level task: Visit destination
-            travel_plan = self._decompose_visit_destination(dest, current_state, domain)
-            if travel_plan:
-                plan.extend(travel_plan)
-                # Update state after visiting destination
-                current_state = self._simulate_plan_execution(current_state, travel_plan, domain)
-                if not current_state:
-                    break
-        
-        # Return to end point
-        end_location = None
-        for pred in goal_predicates:
+        """Hierarchical Task Network planning for trip planning: trip -> cities -> days -> activities."""
+        task = self._grounded_task(domain, problem)
+        
+        destinations = problem.get('destinations')
+        if destinations is None:
+            destinations = sorted({pred.args[1] for pred in problem['initial_state'].predicates
+                                   if pred.name == "connected" and pred.args[1] != "home"})
+        end_location = "home"
+        for pred in problem['goal_predicates']:
             if pred.name == "at":
                 end_location = pred.args[0]
                 break
         
-        if end_location and current_state:
-            return_plan = self._plan_travel(current_state, end_location, domain)
-            if return_plan:
-                plan.extend(return_plan)
-        
-        return plan if plan else None
-    
-    def _decompose_visit_destination(self, destination, state, domain):
-        """HTN method: decompose 'visit destination' into primitive actions."""
-        plan = []
-        current_state = state.copy()
-        
-        # Step 1: Travel to destination
-        travel_actions = self._plan_travel(current_state, destination, domain)
-        if not travel_actions:
-            return None
-            
-        plan.extend(travel_actions)
-        current_state = self._simulate_plan_execution(current_state, travel_actions, domain)
-        if not current_state:
-            return None
-        
-        # Step 2: Visit attractions (multiple)
-        attraction_plan = self._plan_attractions(current_state, destination, domain)
-        if attraction_plan:
-            plan.extend(attraction_plan)
-            current_state = self._simulate_plan_execution(current_state, attraction_plan, domain)
-        
-        # Step 3: Dine at restaurant
-        dining_plan = self._plan_dining(current_state, destination, domain)
-        if dining_plan:
-            plan.extend(dining_plan)
-            
+        methods = TripMethods(task, rank=self._attraction_rank())
+        planner = HTNPlanner(task, methods.methods, methods.relevant, memo=self.htn_memo)
+        hits = self.htn_memo.hits
+        plan = planner.plan(('trip', tuple(destinations), problem.get('days', len(destinations)), end_location))
+        self.search_stats['htn'] = planner.stats.as_dict()
+        print(f"[HTN] {planner.expansions} method expansions, {self.htn_memo.hits - hits} memo hits, "
+              f"{'plan found' if plan else 'no plan'}")
         return plan
     
-    def _plan_travel(self, state, destination, domain):
-        """Plan travel to destination."""
-        actions = domain['actions']
-        travel_action = None
-        
-        for action in actions:
-            if action.name == "travel":
-                bindings = {"from": "home", "to": destination}
-                # Check if we can find current location
-                for pred in state.predicates:
-                    if pred.name == "at":
-                        bindings["from"] = pred.args[0]
-                        break
-                
-                if action.is_applicable(state, bindings):
-                    action_str = f"travel(from={bindings['from']}, to={bindings['to']})"
-                    return [action_str]
-        
+    def _advanced_forward_search(self, domain, problem, heuristic='lm', deadline_ms=None, macros=True,
+                                 workers=None, algorithm='astar'):
+        """Advanced forward search with sophisticated heuristics.
+        
+        heuristic: 'ff', 'add' or 'max' (delete relaxation over the ground task),
+        'lm' (landmark count plus h_FF, steering toward unvisited cities),
+        'pdb' (the larger of 'lm' and per-city pattern databases for the satisfaction goal),
+        or 'legacy' for the original weighted goal/progress/resource sum.
+        deadline_ms: if given, run anytime search and return the best plan found in time.
+        macros: search over visit-city macro actions first, falling back to primitives.
+        workers: if > 1 (and not 'legacy' or 'pdb'), run hash-distributed A* over that many processes, without
+        the expansion cap (deadline_ms then bounds each attempt).
+        algorithm: 'astar', or 'ida' for IDA* with a bounded transposition table
+        (memory stays flat as the problem grows; deadline_ms bounds each attempt).
+        """
+        task = self._grounded_task(domain, problem)
+        stats = SearchStats()
+        try:
+            return self._forward_search(task, domain, problem, heuristic, deadline_ms, macros,
+                                        workers, algorithm, stats)
+        finally:
+            self.search_stats['forward_search'] = stats.as_dict()
+    
+    def _forward_search(self, task, domain, problem, heuristic, deadline_ms, macros, workers, algorithm, stats):
+        """Body of _advanced_forward_search; every engine it runs adds to `stats`."""
+        if workers and workers > 1 and heuristic not in ('legacy', 'pdb'):
+            return self._distributed_search(task, problem, heuristic, workers, deadline_ms, macros, stats)
+        if algorithm == 'ida':
+            return self._low_memory_search(task, domain, problem, heuristic, deadline_ms, macros, stats)
+        if macros and deadline_ms is None and heuristic != 'legacy':
+            macro_task = self._macro_task(task, problem)
+            goal_node = astar(macro_task, self._search_heuristic(macro_task, domain, problem, heuristic),
+                              max_expansions=2000, dominance=True, stats=stats)
+            if goal_node:
+                return extract_plan(macro_task, goal_node)
+            print("[MACROS] No macro plan found, searching primitive actions")
+        h = self._search_heuristic(task, domain, problem, heuristic)
+        
+        if deadline_ms is not None:
+            result = anytime_search(task, h, deadline_ms, dominance=True, stats=stats)
+            print(f"[ANYTIME] {len(result.improvements)} improvements, best cost {result.cost}, "
+                  f"{'complete' if result.completed else 'deadline reached'}")
+            return extract_plan(task, result.node) if result.node else None
+        
+        # A* with multiple heuristics; nodes keep parent pointers, plan strings are built on return.
+        # Landmarks already steer travel; the per-schema successor cap would hide the way home.
+        max_per_schema = None if heuristic in ('lm', 'pdb') else 4
+        goal_node = astar(task, h, max_expansions=2000, max_per_schema=max_per_schema, dominance=True,
+                          stats=stats)
+        return extract_plan(task, goal_node) if goal_node else None
+    
+    def _distributed_search(self, task, problem, heuristic, workers, deadline_ms, macros, stats):
+        """HDA* over the macro task (if enabled), then over primitive actions."""
+        tasks = [self._macro_task(task, problem), task] if macros else [task]
+        for search_task in tasks:
+            result = hda_search(search_task, heuristic, workers=workers, deadline_ms=deadline_ms)
+            print(f"[HDA*] {workers} workers, {sum(result.expansions)} expansions "
+                  f"in {result.elapsed_ms:.0f} ms, cost {result.cost}")
+            stats.add(result.stats)
+            if result.path is not None:
+                stats.depth = len(result.path)
+                return plan_labels(search_task, result.path)
         return None
     
-    def _plan_attractions(self, state, location, domain):
-        """Plan multiple attraction visits."""
-        plan = []
-        actions = domain['actions']
-        
-        # Find visit_attraction action
-        visit_action = None
-        for action in actions:
-            if action.name == "visit_attraction":
-                visit_action = action
-                break
-                
-        if not visit_action:
-            return plan
-        
-        # Find all attractions at this location
-        attractions = []
-        for pred in state.predicates:
-            if pred.name == "attraction_at" and pred.args[1] == location:
-                attractions.append(pred.args[0])
-        
-        # Plan to visit multiple attractions (up to 3)
-        current_state = state.copy()
-        for attraction in attractions[:3]:
-            bindings = {"loc": location, "attraction": attraction}
-            if visit_action.is_applicable(current_state, bindings):
-                action_str = f"visit_attraction(loc={location}, attraction={attraction})"
-                plan.append(action_str)
-                # Update state
-                current_state = visit_action.apply(current_state, bindings)
-                if not current_state:
-                    break
-        
-        return plan
-    
-    def _plan_dining(self, state, location, domain):
-        """Plan dining activities."""
-        plan = []
-        actions = domain['actions']
-        
-        # Find dine action
-        dine_action = None
-        for action in actions:
-            if action.name == "dine":
-                dine_action = action
-                break
-                
-        if not dine_action:
-            return plan
-        
-        # Find restaurants at this location
-        restaurants = []
-        for pred in state.predicates:
-            if pred.name == "restaurant_at" and pred.args[1] == location:
-                restaurants.append(pred.args[0])
-        
-        # Plan to dine at restaurant
-        if restaurants:
-            restaurant = restaurants[0]  # Take first available
-            bindings = {"loc": location, "restaurant": restaurant}
-            if dine_action.is_applicable(state, bindings):
-                action_str = f"dine(loc={location}, restaurant={restaurant})"
-                plan.append(action_str)
-        
-        return plan
-    
-    def _simulate_plan_execution(self, state, plan, domain):
-        """Simulate executing a plan and return resulting state."""
-        current_state = state.copy()
-        actions = domain['actions']
-        
-        for action_str in plan:
-            # Parse action string to find matching action and bindings
-            if "travel(" in action_str:
-                # Extract bindings from travel action
-                parts = action_str.split('=')
-                if len(parts) >= 3:
-                    from_loc = parts[1].split(',')[0]
-                    to_loc = parts[2].rstrip(')')
-                    bindings = {"from": from_loc, "to": to_loc}
-                    
-                    # Find and apply travel action
-                    for action in actions:
-                        if action.name == "travel":
-                            if action.is_applicable(current_state, bindings):
-                                current_state = action.apply(current_state, bindings)
-                                break
-                            
-            elif "visit_attraction(" in action_str:
-                # Handle attraction visit
-                parts = action_str.split('=')
-                if len(parts) >= 3:
-                    location = parts[1].split(',')[0]
-                    attraction = parts[2].rstrip(')')
-                    bindings = {"loc": location, "attraction": attraction}
-                    
-                    for action in actions:
-                        if action.name == "visit_attraction":
-                            if action.is_applicable(current_state, bindings):
-                                current_state = action.apply(current_state, bindings)
-                                break
-                                
-            elif "dine(" in action_str:
-                # Handle dining
-                parts = action_str.split('=')
-                if len(parts) >= 3:
-                    location = parts[1].split(',')[0]
-                    restaurant = parts[2].rstrip(')')
-                    bindings = {"loc": location, "restaurant": restaurant}
-                    
-                    for action in actions:
-                        if action.name == "dine":
-                            if action.is_applicable(current_state, bindings):
-                                current_state = action.apply(current_state, bindings)
-                                break
-                                
-            if not current_state:
-                return None
-        
-        return current_state
-    
-    def _advanced_forward_search(self, domain, problem):
-        """Advanced forward search with sophisticated heuristics."""
-        import heapq
-        
-        initial_state = problem['initial_state']
-        goal_predicates = problem['goal_predicates']
-        goal_fluents = problem['goal_fluents']
-        actions = domain['actions']
-        
-        # Use A* with multiple heuristics
-        open_list = [(0, 0, initial_state, [])]  # (f_score, g_score, state, plan)
-        closed_set = set()
-        
-        step = 0
-        max_steps = 2000
-        
-        while open_list and step < max_steps:
-            step += 1
-            f_score, g_score, current_state, plan = heapq.heappop(open_list)
-            
-            # State signature for duplicate detection
-            state_sig = self._state_signature(current_state)
-            if state_sig in closed_set:
-                continue
-            closed_set.add(state_sig)
-            
-            # Goal test
-            if self._is_pddl_goal_satisfied(current_state, goal_predicates, goal_fluents):
-                return plan
-            
-            # Generate successors with intelligent action ordering
-            for action in self._order_actions_by_relevance(actions, current_state, goal_predicates):
-                bindings_list = self._generate_action_bindings(action, current_state)
-                
-                for bindings in bindings_list[:4]:  # More bindings for better exploration
-                    if action.is_applicable(current_state, bindings):
-                        new_state = action.apply(current_state, bindings)
-                        if new_state:
-                            new_g_score = g_score + action.cost
-                            action_instance = f"{action.name}({', '.join([f'{k}={v}' for k, v in bindings.items()])})"
-                            new_plan = plan + [action_instance]
-                            
-                            # Advanced heuristic combining multiple factors
-                            h_score = self._advanced_heuristic(new_state, goal_predicates, goal_fluents, actions)
-                            new_f_score = new_g_score + h_score
-                            
-                            heapq.heappush(open_list, (new_f_score, new_g_score, new_state, new_plan))
-        
+    def _low_memory_search(self, task, domain, problem, heuristic, deadline_ms, macros, stats):
+        """IDA* over the macro task (if enabled), then over primitive actions."""
+        tasks = [self._macro_task(task, problem), task] if macros and heuristic != 'legacy' else [task]
+        for search_task in tasks:
+            h = self._search_heuristic(search_task, domain, problem, heuristic)
+            deadline = time.monotonic() + deadline_ms / 1000.0 if deadline_ms is not None else None
+            goal_node = ida_star(search_task, h, max_expansions=20000, deadline=deadline, stats=stats)
+            if goal_node:
+                return extract_plan(search_task, goal_node)
         return None
     
+    def _macro_task(self, task, problem):
+        """Visit-city macro task for the problem, best-rated attractions first; compiled once."""
+        macro_task = problem.get('macro_task')
+        if macro_task is None:
+            macro_task = problem['macro_task'] = compile_visit_macros(task, rank=self._attraction_rank())
+        return macro_task
+    
+    def _attraction_rank(self):
+        """Sort key for visit actions: best-rated attractions first."""
+        ratings = {attraction['name']: attraction.get('rating', 0)
+                   for dest_data in self.destinations_data.values()
+                   for attraction in dest_data.get('attractions', [])}
+        return lambda action: -ratings.get(action.bindings.get('attraction'), 0)
+    
+    def _search_heuristic(self, task, domain, problem, heuristic):
+        """Build the heuristic callable selected by name."""
+        if heuristic == 'legacy':
+            goal_predicates = problem['goal_predicates']
+            goal_fluents = problem['goal_fluents']
+            actions = domain['actions']
+            return lambda state: self._advanced_heuristic(state, goal_predicates, goal_fluents, actions)
+        if heuristic == 'pdb':
+            if self.pattern_databases is None:
+                self.pattern_databases = self._load_pattern_databases()
+            return PDBHeuristic(task, self.pattern_databases, base=make_heuristic(task, 'lm'))
+        return make_heuristic(task, heuristic)
+    
+    def _load_pattern_databases(self):
+        """Per-city pattern databases from the disk cache, built for catalogs not seen before."""
+        # Costs come from the action schemas, which charge every visit (and every meal) the same,
+        # so a city has one class per catalog and its tables are small
+        schemas = {action.name: action for action in self._create_pddl_domain([])['actions']}
+        catalogs = (('attractions', 'attraction', schemas['visit_attraction']),
+                    ('restaurants', 'restaurant', schemas['dine']))
+        store = PDBStore(self.pdb_cache_dir) if self.pdb_cache_dir else PDBStore()
+        for city, dest_data in self.destinations_data.items():
+            items = []
+            for key, param, schema in catalogs:
+                effects = {effect[1]: effect[3] for effect in schema.effects if effect[0] == 'assign'}
+                for entry in dest_data.get(key, []):
+                    items.append((f"{param}:{entry['name']}", effects.get('budget', 0),
+                                  effects.get('satisfaction', 0), effects.get('time', 0)))
+            store.load_or_build(city, items)
+        return store.databases
+    
     def _backward_chaining(self, domain, problem):
         """Backward chaining from goal to initial state."""
         # Simplified backward chaining - work backwards from goals
@@ -1857,12 +1995,6 @@ class PathFinderAllInOne:
         
         return plan if plan else None
     
-    def _state_signature(self, state):
-        """Create a signature for state comparison."""
-        pred_sig = frozenset((p.name, p.args) for p in state.predicates)
-        fluent_sig = frozenset(state.numeric_fluents.items())
-        return (pred_sig, fluent_sig)
-    
     def _order_actions_by_relevance(self, actions, state, goal_predicates):
         """Order actions by relevance to current state and goals."""
         # Prioritize actions that make progress toward goals
@@ -1923,18 +2055,20 @@ class PathFinderAllInOne:
     def _progress_heuristic(self, state, goal_predicates):
         """Reward progress toward subgoals."""
         progress = 0
+        # Only dynamic facts live in the state bits; statics never count here
+        atoms = state.facts.decode(state.bits)
         
         # Reward being at non-home locations (exploration)
-        for pred in state.predicates:
-            if pred.name == "at" and pred.args[0] != "home":
+        for name, args in atoms:
+            if name == "at" and args[0] != "home":
                 progress -= 20
                 
         # Reward visited attractions
-        attraction_count = len([p for p in state.predicates if p.name == "visited_attraction"])
+        attraction_count = len([1 for name, _ in atoms if name == "visited_attraction"])
         progress -= attraction_count * 10
         
         # Reward dining experiences
-        dining_count = len([p for p in state.predicates if p.name == "dined_at"])
+        dining_count = len([1 for name, _ in atoms if name == "dined_at"])
         progress -= dining_count * 5
         
         return progress
@@ -1957,61 +2091,11 @@ class PathFinderAllInOne:
         
         return resource_penalty
     
-    def _generate_action_bindings(self, action, state):
-        """Generate possible parameter bindings for an action."""
-        bindings_list = []
-        
-        if action.name == "travel":
-            # Find current location and possible destinations
-            current_loc = None
-            for pred in state.predicates:
-                if pred.name == "at":
-                    current_loc = pred.args[0]
-                    break
-            
-            if current_loc:
-                for pred in state.predicates:
-                    if pred.name == "connected" and pred.args[0] == current_loc:
-                        bindings_list.append({"from": current_loc, "to": pred.args[1]})
-        
-        elif action.name == "visit_attraction":
-            # Find current location and available attractions
-            current_loc = None
-            for pred in state.predicates:
-                if pred.name == "at":
-                    current_loc = pred.args[0]
-                    break
-            
-            if current_loc:
-                for pred in state.predicates:
-                    if (pred.name == "attraction_at" and pred.args[1] == current_loc and
-                        not any(p.name == "visited_attraction" and p.args[0] == pred.args[0] 
-                               for p in state.predicates)):
-                        bindings_list.append({"loc": current_loc, "attraction": pred.args[0]})
-        
-        elif action.name == "dine":
-            # Find current location and available restaurants
-            current_loc = None
-            for pred in state.predicates:
-                if pred.name == "at":
-                    current_loc = pred.args[0]
-                    break
-            
-            if current_loc:
-                for pred in state.predicates:
-                    if (pred.name == "restaurant_at" and pred.args[1] == current_loc and
-                        not any(p.name == "dined_at" and p.args[0] == pred.args[0] 
-                               for p in state.predicates)):
-                        bindings_list.append({"loc": current_loc, "restaurant": pred.args[0]})
-        
-        return bindings_list if bindings_list else [{}]  # Return empty binding if no specific bindings
-        
     def _is_pddl_goal_satisfied(self, state, goal_predicates, goal_fluents):
         """Check if PDDL goal is satisfied in current state."""
         # Check predicate goals
-        for goal_pred in goal_predicates:
-            if not state.has_predicate(goal_pred):
-                return False
+        if goal_predicates and not state.holds_all(state.facts.mask(goal_predicates)):
+            return False
         
         # Check numeric fluent goals
         for fluent, (operator, target_value) in goal_fluents.items():
@@ -2056,8 +2140,8 @@ class PathFinderAllInOne:
             'total_duration': 0
         }
         
-        current_time = 9 * 60  # Start at 9 AM
-        day = 1
+        schedule = DayScheduler()
+        slots = []
         
         # If no plan found, create a fallback with actual attractions
         if not plan:
@@ -2067,67 +2151,69 @@ class PathFinderAllInOne:
                     dest_name = dest_data['name']
                     
                     # Add travel
+                    slot = schedule.place(120, barrier=True)
                     travel_activity = {
                         'type': 'travel',
                         'name': f'Travel to {dest_name}',
                         'description': f'Journey to {dest_name}',
-                        'day': day,
-                        'formatted_time': self._format_time(current_time),
+                        'day': slot.day,
+                        'formatted_time': self._format_time(slot.start),
                         'duration_minutes': 120,
                         'cost': 100
                     }
                     itinerary['activities'].append(travel_activity)
+                    slots.append(slot)
                     itinerary['total_cost'] += 100
                     itinerary['total_duration'] += 120
-                    current_time += 120
                     
                     # Add multiple attractions
                     attractions = dest_data.get('attractions', [])
                     for attraction in attractions[:3]:  # Add up to 3 attractions
                         if itinerary['total_cost'] + attraction.get('cost', 25) > budget:
                             break
-                            
+                        
+                        slot = schedule.place(attraction.get('duration', 90), attraction.get('open_hours'))
                         attraction_activity = {
                             'type': 'attraction',
                             'name': f"Visit {attraction['name']}",
                             'description': attraction.get('description', f"Explore {attraction['name']}"),
-                            'day': day,
-                            'formatted_time': self._format_time(current_time),
+                            'day': slot.day,
+                            'formatted_time': self._format_time(slot.start),
                             'duration_minutes': attraction.get('duration', 90),
                             'cost': attraction.get('cost', 25),
                             'rating': attraction.get('rating', 4.5),
                             'category': attraction.get('category', 'cultural')
                         }
                         itinerary['activities'].append(attraction_activity)
+                        slots.append(slot)
                         itinerary['total_cost'] += attraction.get('cost', 25)
                         itinerary['total_duration'] += attraction.get('duration', 90)
-                        current_time += attraction.get('duration', 90)
                     
                     # Add restaurants
                     restaurants = dest_data.get('restaurants', [])
                     for restaurant in restaurants[:2]:  # Add up to 2 restaurants per destination
                         if itinerary['total_cost'] + restaurant.get('cost', 40) > budget:
                             break
-                            
+                        
+                        slot = schedule.place_meal(90, restaurant.get('open_hours'))
                         meal_activity = {
                             'type': 'meal',
                             'name': f"Dine at {restaurant['name']}",
                             'description': f"Enjoy {restaurant.get('cuisine', 'local')} cuisine at {restaurant['name']}",
-                            'day': day,
-                            'formatted_time': self._format_time(current_time),
+                            'day': slot.day,
+                            'formatted_time': self._format_time(slot.start),
                             'duration_minutes': 90,
                             'cost': restaurant.get('cost', 40),
                             'cuisine': restaurant.get('cuisine', 'Local'),
                             'rating': restaurant.get('rating', 4.2)
                         }
                         itinerary['activities'].append(meal_activity)
+                        slots.append(slot)
                         itinerary['total_cost'] += restaurant.get('cost', 40)
                         itinerary['total_duration'] += 90
-                        current_time += 90
                         
                     # Move to next day
-                    day += 1
-                    current_time = 9 * 60
+                    schedule.next_day()
             
         else:
             # Process actual PDDL plan
@@ -2135,6 +2221,9 @@ class PathFinderAllInOne:
                 activity = None
                 cost = 0
                 duration_mins = 0
+                open_hours = None
+                meal = False
+                barrier = False
                 
                 # Parse action string
                 if "travel" in action_str:
@@ -2148,13 +2237,12 @@ class PathFinderAllInOne:
                             'type': 'travel',
                             'name': f'Travel to {dest_name}',
                             'description': f'Journey to {dest_name}',
-                            'day': day,
-                            'formatted_time': self._format_time(current_time),
                             'duration_minutes': 120,
                             'cost': 100
                         }
                         cost = 100
                         duration_mins = 120
+                        barrier = True
                 
                 elif "visit_attraction" in action_str:
                     # Extract attraction from visit action
@@ -2174,8 +2262,6 @@ class PathFinderAllInOne:
                                 'type': 'attraction',
                                 'name': f"Visit {attraction_data['name']}",
                                 'description': attraction_data.get('description', f"Explore {attraction_data['name']}"),
-                                'day': day,
-                                'formatted_time': self._format_time(current_time),
                                 'duration_minutes': attraction_data.get('duration', 90),
                                 'cost': attraction_data.get('cost', 25),
                                 'rating': attraction_data.get('rating', 4.5),
@@ -2183,6 +2269,7 @@ class PathFinderAllInOne:
                             }
                             cost = attraction_data.get('cost', 25)
                             duration_mins = attraction_data.get('duration', 90)
+                            open_hours = attraction_data.get('open_hours')
                         
                 elif "dine" in action_str:
                     # Extract restaurant from dine action
@@ -2202,8 +2289,6 @@ class PathFinderAllInOne:
                                 'type': 'meal',
                                 'name': f"Dine at {restaurant_data['name']}",
                                 'description': f"Enjoy {restaurant_data.get('cuisine', 'local')} cuisine",
-                                'day': day,
-                                'formatted_time': self._format_time(current_time),
                                 'duration_minutes': 90,
                                 'cost': restaurant_data.get('cost', 40),
                                 'cuisine': restaurant_data.get('cuisine', 'Local'),
@@ -2211,17 +2296,22 @@ class PathFinderAllInOne:
                             }
                             cost = restaurant_data.get('cost', 40)
                             duration_mins = 90
+                            open_hours = restaurant_data.get('open_hours')
+                            meal = True
                 
                 if activity:
+                    if meal:
+                        slot = schedule.place_meal(duration_mins, open_hours)
+                    else:
+                        slot = schedule.place(duration_mins, open_hours, barrier=barrier)
+                    activity['day'] = slot.day
+                    activity['formatted_time'] = self._format_time(slot.start)
                     itinerary['activities'].append(activity)
+                    slots.append(slot)
                     itinerary['total_cost'] += cost
                     itinerary['total_duration'] += duration_mins
-                    current_time += duration_mins
-                    
-                    # Check if we need to move to next day (after 8 PM)
-                    if current_time >= 20 * 60:
-                        day += 1
-                        current_time = 9 * 60
+        
+        itinerary['activities'] = chronological(itinerary['activities'], slots)
         
         if not itinerary['activities']:
             itinerary['activities'] = [{
@@ -2260,8 +2350,9 @@ class PathFinderAllInOne:
             'total_duration': 0
         }
         
-        current_time = 9 * 60  # Start at 9 AM
-        day = 1
+        # One calendar day per destination, as before, even past `duration`
+        schedule = DayScheduler()
+        slots = []
         
         # Process each destination - make sure we're actually processing them
         processed_destinations = 0
@@ -2274,108 +2365,115 @@ class PathFinderAllInOne:
             processed_destinations += 1
             
             # Add travel activity
+            slot = schedule.place(120, barrier=True)
             travel_activity = {
                 'type': 'travel',
                 'name': f'Travel to {dest_name}',
                 'description': f'Journey to {dest_name}',
-                'day': day,
-                'formatted_time': self._format_time(current_time),
+                'day': slot.day,
+                'formatted_time': self._format_time(slot.start),
                 'duration_minutes': 120,
                 'cost': 100
             }
             itinerary['activities'].append(travel_activity)
+            slots.append(slot)
             itinerary['total_cost'] += 100
             itinerary['total_duration'] += 120
-            current_time += 120
-            
-            # Add attractions that match interests - prioritize by interest match
-            attractions = dest_data.get('attractions', [])
-            matching_attractions = [a for a in attractions if self._matches_interests(a.get('category', ''), interests)]
-            non_matching_attractions = [a for a in attractions if not self._matches_interests(a.get('category', ''), interests)]
             
-            # Prioritize matching attractions, then add others
-            suitable_attractions = matching_attractions[:6] + non_matching_attractions[:2]
+            # Best-rated, interest-matching attractions that fit budget and the rest of the day,
+            # leaving time for two meals
+            selection = self._select_attractions(
+                dest_data.get('attractions', []), interests,
+                budget - itinerary['total_cost'], schedule.day_end - schedule.floor - 2 * 90,
+                max_items=4  # Max 4 attractions per destination
+            )
             
-            # Add more attractions per destination (3-4 attractions)
-            for attraction in suitable_attractions[:4]:  # Max 4 attractions per destination
-                if itinerary['total_cost'] + attraction.get('cost', 25) > budget:
-                    break
-                    
+            for attraction in selection.items:
+                slot = schedule.place(attraction.get('duration', 90), attraction.get('open_hours'))
                 attraction_activity = {
                     'type': 'attraction',
                     'name': f"Visit {attraction['name']}",
                     'description': attraction.get('description', f"Explore {attraction['name']}"),
-                    'day': day,
-                    'formatted_time': self._format_time(current_time),
+                    'day': slot.day,
+                    'formatted_time': self._format_time(slot.start),
                     'duration_minutes': attraction.get('duration', 90),
                     'cost': attraction.get('cost', 25),
                     'rating': attraction.get('rating', 4.5),
                     'category': attraction.get('category', 'cultural')
                 }
                 itinerary['activities'].append(attraction_activity)
+                slots.append(slot)
                 itinerary['total_cost'] += attraction.get('cost', 25)
                 itinerary['total_duration'] += attraction.get('duration', 90)
-                current_time += attraction.get('duration', 90)
             
             # Add multiple restaurants for dining variety
             restaurants = dest_data.get('restaurants', [])
             for restaurant in restaurants[:2]:  # Add up to 2 restaurants per destination
                 if itinerary['total_cost'] + restaurant.get('cost', 40) > budget:
                     break
+                # Lunch or dinner today, or no meal: never past closing time
+                slot = schedule.place_meal(90, restaurant.get('open_hours'), roll_over=False)
+                if slot is None:
+                    break
                     
                 meal_activity = {
                     'type': 'meal',
                     'name': f"Dine at {restaurant['name']}",
                     'description': f"Enjoy {restaurant.get('cuisine', 'local')} cuisine at {restaurant['name']}",
-                    'day': day,
-                    'formatted_time': self._format_time(current_time),
+                    'day': slot.day,
+                    'formatted_time': self._format_time(slot.start),
                     'duration_minutes': 90,
                     'cost': restaurant.get('cost', 40),
                     'cuisine': restaurant.get('cuisine', 'Local'),
                     'rating': restaurant.get('rating', 4.2)
                 }
                 itinerary['activities'].append(meal_activity)
+                slots.append(slot)
                 itinerary['total_cost'] += restaurant.get('cost', 40)
                 itinerary['total_duration'] += 90
-                current_time += 90
             
             # Move to next day if more destinations
             if i < len(destinations) - 1:
-                day += 1
-                current_time = 9 * 60
+                schedule.next_day()
         
         # If no destinations were processed, add some default activities
         if processed_destinations == 0 and destinations:
             # Just add basic activities for any destinations mentioned
             for dest in destinations[:1]:
                 dest_name = dest.replace('_', ' ').title()
+                slot = schedule.place(120, barrier=True)
                 itinerary['activities'].append({
                     'type': 'travel',
                     'name': f'Travel to {dest_name}',
                     'description': f'Journey to {dest_name}',
-                    'day': 1,
-                    'formatted_time': self._format_time(current_time),
+                    'day': slot.day,
+                    'formatted_time': self._format_time(slot.start),
                     'duration_minutes': 120,
                     'cost': 100
                 })
+                slots.append(slot)
                 itinerary['total_cost'] += 100
                 itinerary['total_duration'] += 120
         
         # Add return travel if different end point
         if end_point != start_point and itinerary['total_cost'] + 100 <= budget:
+            slot = schedule.place(120, barrier=True)
             return_activity = {
                 'type': 'travel',
                 'name': f'Return to {end_point.replace("_", " ").title()}',
                 'description': f'Journey back to {end_point.replace("_", " ").title()}',
-                'day': day,
-                'formatted_time': self._format_time(current_time),
+                'day': slot.day,
+                'formatted_time': self._format_time(slot.start),
                 'duration_minutes': 120,
                 'cost': 100
             }
             itinerary['activities'].append(return_activity)
+            slots.append(slot)
             itinerary['total_cost'] += 100
             itinerary['total_duration'] += 120
         
+        itinerary['activities'] = chronological(itinerary['activities'], slots)
+        
         # Add statistics that GUI expects
         itinerary['statistics'] = {
             'total_activities': len(itinerary['activities']),
@@ -2395,36 +2493,59 @@ class PathFinderAllInOne:
         """A* search algorithm for PDDL planning."""
         import heapq
         
-        # Priority queue: (f_score, counter, g_score, state, path)
+        stats = SearchStats()
+        clock = time.perf_counter
+        started = clock()
+        
+        # Priority queue: (f_score, counter, g_score, node); nodes point at their parent
         counter = 0
-        frontier = [(0, counter, 0, initial_state, [])]
+        frontier = [(0, counter, 0, SearchNode(initial_state))]
         explored = set()
+        plan = None  # No plan found
         
         while frontier:
-            f_score, _, g_score, current_state, path = heapq.heappop(frontier)
+            f_score, _, g_score, node = heapq.heappop(frontier)
+            current_state = node.state
             
             if current_state in explored:
+                stats.duplicates += 1
                 continue
             
             explored.add(current_state)
             
             if goal_test(current_state):
-                return path
+                plan = [actions[action_id] for action_id in extract_path(node)]
+                stats.depth = len(plan)
+                break
             
             # Generate successors
-            for action in actions:
+            stats.expanded += 1
+            expand_started = clock()
+            heuristic_time = 0.0
+            for action_id, action in enumerate(actions):
                 if action.is_applicable(current_state):
                     new_state = action.apply(current_state)
+                    if new_state:
+                        stats.generated += 1
                     if new_state and new_state not in explored:
-                        new_path = path + [action]
                         new_g_score = g_score + action.cost
+                        h_started = clock()
                         h_score = self._heuristic(new_state, max_budget)
+                        heuristic_time += clock() - h_started
                         new_f_score = new_g_score + h_score
                         
                         counter += 1
-                        heapq.heappush(frontier, (new_f_score, counter, new_g_score, new_state, new_path))
-        
-        return None  # No plan found
+                        heapq.heappush(frontier, (new_f_score, counter, new_g_score,
+                                                  SearchNode(new_state, node, action_id, new_g_score)))
+                    elif new_state:
+                        stats.duplicates += 1
+            stats.heuristic_ms += heuristic_time * 1000.0
+            stats.successor_ms += (clock() - expand_started - heuristic_time) * 1000.0
+            stats.peak_open = max(stats.peak_open, len(frontier))
+        
+        stats.elapsed_ms = (clock() - started) * 1000.0
+        self.search_stats['astar'] = stats.as_dict()
+        return plan
     
     def _heuristic(self, state, max_budget):
         """Heuristic function for A* search."""
@@ -2455,26 +2576,27 @@ class PathFinderAllInOne:
             'total_duration': 0
         }
         
-        day = 1
-        current_time = 9 * 60
+        schedule = DayScheduler(days=duration)
+        slots = []
         activities_per_day = max(2, (len(destinations) * 4) // duration)  # Estimate activities per day
         
         # Add initial travel from start point if not home
         if start_point != "home" and start_point in self.destinations_data:
             start_data = self.destinations_data[start_point]
+            slot = schedule.place(60, barrier=True)
             travel_activity = {
-                'day': 1,
+                'day': slot.day,
                 'type': 'travel',
                 'name': f'Depart from {start_data["name"]}',
                 'description': f'Start journey from {start_data["name"]}',
-                'formatted_time': self._format_time(current_time),
+                'formatted_time': self._format_time(slot.start),
                 'duration_minutes': 60,
                 'cost': 50
             }
             itinerary['activities'].append(travel_activity)
+            slots.append(slot)
             itinerary['total_cost'] += 50
             itinerary['total_duration'] += 60
-            current_time += 60
         
         # Track visited attractions and restaurants to avoid duplicates
         visited_attractions = set()
@@ -2503,97 +2625,102 @@ class PathFinderAllInOne:
                 continue
             
             dest_data = self.destinations_data[dest]
-            day = day_num
-            current_time = 9 * 60  # Start each day at 9 AM
+            # Each destination day starts on its own calendar day (unless earlier ones overflowed)
+            while schedule.day < day_num:
+                schedule.next_day()
             
             # Travel (only when moving to a new city)
             if day_num > 1 and current_dest_days == 1:  # First day in a new destination
-                travel_activity = {
-                    'day': day,
-                    'type': 'travel',
-                    'name': f'Travel to {dest_data["name"]}',
-                    'description': f'Travel to {dest_data["name"]}',
-                    'formatted_time': self._format_time(current_time),
-                    'duration_minutes': 120,
-                    'cost': 100
-                }
                 if itinerary['total_cost'] + 100 <= budget:
+                    slot = schedule.place(120, barrier=True)
+                    travel_activity = {
+                        'day': slot.day,
+                        'type': 'travel',
+                        'name': f'Travel to {dest_data["name"]}',
+                        'description': f'Travel to {dest_data["name"]}',
+                        'formatted_time': self._format_time(slot.start),
+                        'duration_minutes': 120,
+                        'cost': 100
+                    }
                     itinerary['activities'].append(travel_activity)
+                    slots.append(slot)
                     itinerary['total_cost'] += 100
                     itinerary['total_duration'] += 120
-                    current_time += 120
             
             # Add attractions based on interests (add 3-5 attractions per day)
-            attractions_added = 0
             max_attractions = min(5, activities_per_day - 1)  # Leave room for meals
             
-            for attraction in dest_data['attractions']:
-                if attractions_added >= max_attractions:
-                    break
-                
-                # Skip if already visited
-                attraction_key = f"{dest}_{attraction['name']}"
-                if attraction_key in visited_attractions:
-                    continue
-                    
-                # Add attraction if it matches interests OR if we haven't added any yet
-                if self._matches_interests(attraction['category'], interests) or attractions_added == 0:
-                    activity = {
-                        'day': day,
-                        'type': 'attraction',
-                        'name': attraction['name'],
-                        'description': f"{attraction['name']} in {dest_data['name']}",
-                        'formatted_time': self._format_time(current_time),
-                        'duration_minutes': attraction['duration'],
-                        'cost': attraction['cost'],
-                        'category': attraction['category'],
-                        'rating': attraction['rating']
-                    }
-                    if itinerary['total_cost'] + attraction['cost'] <= budget:
-                        itinerary['activities'].append(activity)
-                        itinerary['total_cost'] += attraction['cost']
-                        itinerary['total_duration'] += attraction['duration']
-                        current_time += attraction['duration'] + 30
-                        attractions_added += 1
-                        visited_attractions.add(attraction_key)
+            # Best unvisited attractions for the day; each needs 30 minutes of transit after it
+            candidates = [a for a in dest_data['attractions']
+                          if f"{dest}_{a['name']}" not in visited_attractions]
+            selection = self._select_attractions(
+                candidates, interests, budget - itinerary['total_cost'],
+                schedule.day_end - max(schedule.floor, schedule.latest),
+                max_items=max_attractions, transit_minutes=30
+            )
+            
+            for attraction in selection.items:
+                slot = schedule.place(attraction['duration'] + 30, attraction.get('open_hours'))
+                activity = {
+                    'day': slot.day,
+                    'type': 'attraction',
+                    'name': attraction['name'],
+                    'description': f"{attraction['name']} in {dest_data['name']}",
+                    'formatted_time': self._format_time(slot.start),
+                    'duration_minutes': attraction['duration'],
+                    'cost': attraction['cost'],
+                    'category': attraction['category'],
+                    'rating': attraction['rating']
+                }
+                itinerary['activities'].append(activity)
+                slots.append(slot)
+                itinerary['total_cost'] += attraction['cost']
+                itinerary['total_duration'] += attraction['duration']
+                visited_attractions.add(f"{dest}_{attraction['name']}")
             
             # Add a restaurant/meal (avoid duplicates)
             for restaurant in dest_data['restaurants']:
                 restaurant_key = f"{dest}_{restaurant['name']}"
                 if restaurant_key not in visited_restaurants:
                     if itinerary['total_cost'] + restaurant['cost'] <= budget:
+                        # Lunch or dinner today, or no meal: never past closing time
+                        slot = schedule.place_meal(90, restaurant.get('open_hours'), roll_over=False)
+                        if slot is None:
+                            break
                         meal_activity = {
-                            'day': day,
+                            'day': slot.day,
                             'type': 'meal',
                             'name': restaurant['name'],
-                            'description': f"Lunch at {restaurant['name']}",
-                            'formatted_time': self._format_time(current_time),
+                            'description': f"{'Lunch' if slot.start < 15 * 60 else 'Dinner'} at {restaurant['name']}",
+                            'formatted_time': self._format_time(slot.start),
                             'duration_minutes': 90,
                             'cost': restaurant['cost'],
                             'cuisine': restaurant['cuisine'],
                             'rating': restaurant['rating']
                         }
                         itinerary['activities'].append(meal_activity)
+                        slots.append(slot)
                         itinerary['total_cost'] += restaurant['cost']
                         itinerary['total_duration'] += 90
-                        current_time += 90
                         visited_restaurants.add(restaurant_key)
                         break
         
         # Add return journey to end point if not home and different from last destination
         if end_point != "home" and end_point in self.destinations_data:
             end_data = self.destinations_data[end_point]
-            return_activity = {
-                'day': duration,
-                'type': 'travel',
-                'name': f'Return to {end_data["name"]}',
-                'description': f'End journey at {end_data["name"]}',
-                'formatted_time': self._format_time(current_time + 60),
-                'duration_minutes': 60,
-                'cost': 50
-            }
             if itinerary['total_cost'] + 50 <= budget:
+                slot = schedule.place(60, barrier=True)
+                return_activity = {
+                    'day': slot.day,
+                    'type': 'travel',
+                    'name': f'Return to {end_data["name"]}',
+                    'description': f'End journey at {end_data["name"]}',
+                    'formatted_time': self._format_time(slot.start),
+                    'duration_minutes': 60,
+                    'cost': 50
+                }
                 itinerary['activities'].append(return_activity)
+                slots.append(slot)
                 itinerary['total_cost'] += 50
                 itinerary['total_duration'] += 60
         elif end_point == "home" and len(destinations) > 0:
@@ -2601,30 +2728,49 @@ class PathFinderAllInOne:
             last_dest = destinations[-1]
             if last_dest in self.destinations_data:
                 last_dest_data = self.destinations_data[last_dest]
-                return_activity = {
-                    'day': duration,
-                    'type': 'travel',
-                    'name': 'Return Home',
-                    'description': f'Return home from {last_dest_data["name"]}',
-                    'formatted_time': self._format_time(current_time + 60),
-                    'duration_minutes': 120,
-                    'cost': 100
-                }
                 if itinerary['total_cost'] + 100 <= budget:
+                    slot = schedule.place(120, barrier=True)
+                    return_activity = {
+                        'day': slot.day,
+                        'type': 'travel',
+                        'name': 'Return Home',
+                        'description': f'Return home from {last_dest_data["name"]}',
+                        'formatted_time': self._format_time(slot.start),
+                        'duration_minutes': 120,
+                        'cost': 100
+                    }
                     itinerary['activities'].append(return_activity)
+                    slots.append(slot)
                     itinerary['total_cost'] += 100
                     itinerary['total_duration'] += 120
         
+        itinerary['activities'] = chronological(itinerary['activities'], slots)
+        
         itinerary['statistics'] = {
             'total_activities': len(itinerary['activities']),
             'total_duration_hours': round(itinerary['total_duration'] / 60, 1),
             'total_cost': itinerary['total_cost'],
             'budget_remaining': budget - itinerary['total_cost'],
+            'extra_days': schedule.extra_days,  # days the plan needed beyond `duration`
             'destinations_count': len(destinations)
         }
         
         return itinerary
     
+    def _select_attractions(self, attractions, interests, budget, minutes, max_items=None, transit_minutes=0):
+        """Maximise rating x interest match within the remaining budget and day."""
+        def value(attraction):
+            # Non-matching attractions still fill spare time, at a quarter of the weight
+            weight = 1.0 if self._matches_interests(attraction.get('category', ''), interests) else 0.25
+            return attraction.get('rating', 4.5) * weight
+        
+        return select_attractions(
+            attractions, value,
+            cost=lambda a: a.get('cost', 25),
+            duration=lambda a: a.get('duration', 90) + transit_minutes,
+            budget=budget, minutes=minutes, max_items=max_items
+        )
+    
     def _matches_interests(self, category, interests):
         """Check if attraction category matches user interests."""
         
@@ -2665,6 +2811,16 @@ class PathFinderAllInOne:
         return cost_by_type
 
 
+_PORTFOLIO_PLANNER = None
+
+def _run_portfolio_strategy(method_name, domain, problem, kwargs):
+    """Portfolio worker entry point: one planner instance per worker process."""
+    global _PORTFOLIO_PLANNER
+    if _PORTFOLIO_PLANNER is None:
+        _PORTFOLIO_PLANNER = PathFinderAllInOne()
+    return getattr(_PORTFOLIO_PLANNER, method_name)(domain, problem, **kwargs)
+
+
 class PathFinderGUI:
     """GUI interface for PathFinder."""
     
@@ -3096,6 +3252,8 @@ Ready to explore the world with AI-powered planning?"""
         output.append(f"💰 Budget: ${itinerary['budget']} | Cost: ${stats['total_cost']} | Remaining: ${stats['budget_remaining']}")
         output.append(f"⏱️  Total Duration: {stats['total_duration_hours']} hours")
         output.append(f"🎯 Activities: {stats['total_activities']}")
+        if stats.get('extra_days'):
+            output.append(f"⚠️  Needs {stats['extra_days']} more day(s) than requested")
         output.append("")
         
         # Activities by day
@@ -0,0 +1,307 @@
+# pattern_db.py
+import array
+import hashlib
+import json
+import math
+import mmap
+import os
+from operator import add
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from grounding import iter_bits
+
+INF = math.inf
+
+PDB_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pdb_cache')
+
+# Cities whose tables would exceed this many cells (rows * width, each table) get no database
+MAX_CELLS = 2000000
+
+# An activity as the PDB sees it: (name, spend, satisfaction gain, minutes)
+Item = Tuple[str, float, float, float]
+
+
+def catalog_key(city: str, items: Sequence[Item]) -> str:
+    """Hash of a city's activities and their costs; a changed catalog gets a new database."""
+    material = json.dumps([PDB_VERSION, city, sorted(items)], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(material.encode('utf-8')).hexdigest()
+
+
+# ---------------------------------------------------------------------
+# ONE CITY: EXACT COVER COSTS PER REMAINING-ACTIVITY COUNTS
+# ---------------------------------------------------------------------
+class PatternDatabase:
+    """
+    Per city: for every count vector of remaining activities (activities
+    with identical spend/gain/minutes form one class) and every
+    satisfaction amount up to what the city can give, the least spend and
+    the least minutes needed to earn it there. Rows are stored as raw
+    doubles and read through a memory map, so lookups touch only the pages
+    they use.
+    """
+
+    def __init__(self, meta: dict, spend, minutes):
+        self.city = meta['city']
+        self.classes: List[Tuple[float, int, float]] = [tuple(c) for c in meta['classes']]
+        self.sizes: List[int] = meta['sizes']
+        self.item_class: Dict[str, int] = meta['items']
+        self.width = meta['width']
+        self.radix = _radix(self.sizes)
+        self.spend = spend
+        self.minutes = minutes
+
+    def row(self, counts: Sequence[int]) -> int:
+        return sum(c * r for c, r in zip(counts, self.radix))
+
+    def spend_vector(self, counts: Sequence[int]) -> Sequence[float]:
+        start = self.row(counts) * self.width
+        return self.spend[start:start + self.width]
+
+    def minutes_vector(self, counts: Sequence[int]) -> Sequence[float]:
+        start = self.row(counts) * self.width
+        return self.minutes[start:start + self.width]
+
+
+def build_tables(items: Sequence[Item]) -> Optional[Tuple[dict, List[float], List[float]]]:
+    """(meta, spend table, minutes table) for a city's activities; None if too large."""
+    signatures = sorted({(spend, math.ceil(gain), minutes) for _, spend, gain, minutes in items if gain > 0})
+    index = {signature: k for k, signature in enumerate(signatures)}
+    sizes = [0] * len(signatures)
+    item_class = {}
+    for name, spend, gain, minutes in items:
+        if gain > 0:
+            k = index[(spend, math.ceil(gain), minutes)]
+            sizes[k] += 1
+            item_class[name] = k
+    rows = 1
+    for size in sizes:
+        rows *= size + 1
+    width = sum(gain * size for (_, gain, _), size in zip(signatures, sizes)) + 1
+    if rows * width > MAX_CELLS:
+        return None
+    radix = _radix(sizes)
+
+    spend_table = [INF] * (rows * width)
+    minutes_table = [INF] * (rows * width)
+    for row in range(rows):
+        base = row * width
+        spend_table[base] = minutes_table[base] = 0.0
+        counts = _counts(row, sizes, radix)
+        for need in range(1, width):
+            best_spend = best_minutes = INF
+            # Use one more activity of some class that still has one left
+            for k, (spend, gain, minutes) in enumerate(signatures):
+                if counts[k] == 0:
+                    continue
+                previous = (row - radix[k]) * width + max(0, need - gain)
+                best_spend = min(best_spend, spend + spend_table[previous])
+                best_minutes = min(best_minutes, minutes + minutes_table[previous])
+            spend_table[base + need] = best_spend
+            minutes_table[base + need] = best_minutes
+
+    meta = {'version': PDB_VERSION, 'classes': signatures, 'sizes': sizes,
+            'items': item_class, 'width': width}
+    return meta, spend_table, minutes_table
+
+
+def _radix(sizes):
+    radix, step = [], 1
+    for size in sizes:
+        radix.append(step)
+        step *= size + 1
+    return radix
+
+
+def _counts(row, sizes, radix):
+    return [(row // r) % (size + 1) for size, r in zip(sizes, radix)]
+
+
+# ---------------------------------------------------------------------
+# DISK CACHE
+# ---------------------------------------------------------------------
+class PDBStore:
+    """Per-city databases under `directory`, one .bin/.json pair per catalog hash."""
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR):
+        self.directory = directory
+        self.databases: Dict[str, PatternDatabase] = {}
+        self._maps = []
+
+    def load_or_build(self, city: str, items: Sequence[Item]) -> Optional[PatternDatabase]:
+        key = catalog_key(city, items)
+        path = os.path.join(self.directory, key)
+        database = self._load(city, path)
+        if database is None:
+            built = build_tables(items)
+            if built is None:
+                return None
+            meta, spend, minutes = built
+            meta['city'] = city
+            self._save(path, meta, spend, minutes)
+            database = self._load(city, path) or PatternDatabase(meta, spend, minutes)
+        self.databases[city] = database
+        return database
+
+    def _load(self, city, path) -> Optional[PatternDatabase]:
+        try:
+            with open(path + '.json', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(path + '.bin', 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        values = memoryview(mapped).cast('d')
+        half = len(values) // 2
+        if meta.get('version') != PDB_VERSION or meta.get('city') != city or half == 0:
+            return None
+        self._maps.append(mapped)
+        return PatternDatabase(meta, values[:half], values[half:])
+
+    def _save(self, path, meta, spend, minutes):
+        """Write both files under temporary names first so readers never see a partial database."""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path + '.bin.tmp', 'wb') as f:
+                array.array('d', spend).tofile(f)
+                array.array('d', minutes).tofile(f)
+            with open(path + '.json.tmp', 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.replace(path + '.bin.tmp', path + '.bin')
+            os.replace(path + '.json.tmp', path + '.json')
+        except OSError as e:
+            print(f"[PDB] Could not cache {meta['city']}: {e}")
+
+
+# ---------------------------------------------------------------------
+# HEURISTIC OVER A GROUND TASK
+# ---------------------------------------------------------------------
+class PDBHeuristic:
+    """
+    Least spend to meet the '>=' satisfaction goal from the activities
+    still open, combining the per-city databases by min-plus convolution
+    (cached per count vector). With a `base` heuristic the larger of the
+    two is returned: bases such as lm+FF already charge for the same goal,
+    so adding them would count the deficit twice. States whose need cannot
+    be met, or not within the remaining budget or time, are dead ends.
+    """
+
+    def __init__(self, task, databases: Dict[str, PatternDatabase], base: Optional[Callable] = None,
+                 fluent: str = 'satisfaction', budget: str = 'budget', time: str = 'time',
+                 item_params: Sequence[str] = ('attraction', 'restaurant'), city_param: str = 'loc'):
+        self.task = task
+        self.base = base
+        self.fluent = fluent
+        self.budget = budget
+        self.time = time
+        self.target = None
+        self.time_limit = INF
+        for name, op, value in task.goal_fluents:
+            if name == fluent and op in ('>=', '>'):
+                self.target = value + (1 if op == '>' else 0)
+            elif name == time and op in ('<=', '<'):
+                self.time_limit = value
+        self.width = math.ceil(self.target) + 1 if self.target is not None else 1
+        # city -> (database, [(done fact id, class)]); macro actions are read through their steps
+        self.cities: List[Tuple[PatternDatabase, List[Tuple[int, int]]]] = []
+        by_city: Dict[str, Dict[int, int]] = {}
+        for action in task.actions:
+            for step in getattr(action, 'steps', (action,)):
+                city = step.bindings.get(city_param)
+                database = databases.get(city)
+                if database is None:
+                    continue
+                for param in item_params:
+                    k = database.item_class.get(f"{param}:{step.bindings.get(param)}")
+                    done = step.add & step.neg  # the fact that stops it being done twice
+                    if k is not None and done:
+                        by_city.setdefault(city, {})[next(iter_bits(done))] = k
+        for city, items in by_city.items():
+            self.cities.append((databases[city], list(items.items())))
+        empty = [0.0] + [INF] * (self.width - 1)
+        self._empty = (empty, empty)
+        self._combined: Dict[tuple, Tuple[List[float], List[float]]] = {}
+
+    def numeric_cost(self, state) -> float:
+        if self.target is None:
+            return 0.0
+        fluents = state.numeric_fluents
+        need = math.ceil(self.target - fluents.get(self.fluent, 0))
+        if need <= 0:
+            return 0.0
+        bits = state.bits
+        key = []
+        for database, items in self.cities:
+            counts = [0] * len(database.sizes)
+            for fact_id, k in items:
+                if not (bits >> fact_id) & 1:
+                    counts[k] += 1
+            key.append(tuple(counts))
+        spend, minutes = self._cover(tuple(key), need)
+        if spend == INF or spend > fluents.get(self.budget, INF):
+            return INF
+        if fluents.get(self.time, 0) + minutes > self.time_limit:
+            return INF
+        return spend
+
+    def _cover(self, key, need) -> Tuple[float, float]:
+        """
+        Cities are folded into a first and a second half, each cached per
+        sub-key, so a move in one city recomputes only its half; the halves
+        are joined at `need` alone.
+        """
+        middle = len(key) // 2
+        first = self._fold(key, 0, middle, from_start=False)
+        second = self._fold(key, middle, len(key), from_start=True)
+        return _min_plus_at(first[0], second[0], need), _min_plus_at(first[1], second[1], need)
+
+    def _fold(self, key, low, high, from_start) -> Tuple[List[float], List[float]]:
+        """Combined (spend, minutes) vectors of cities low..high-1, peeling one city off an end."""
+        if low == high:
+            return self._empty
+        cache_key = (low, key[low:high])
+        cached = self._combined.get(cache_key)
+        if cached is None:
+            if from_start:
+                city, rest = low, self._fold(key, low + 1, high, from_start)
+            else:
+                city, rest = high - 1, self._fold(key, low, high - 1, from_start)
+            database = self.cities[city][0]
+            cached = self._combined[cache_key] = (
+                _min_plus(rest[0], database.spend_vector(key[city]), self.width),
+                _min_plus(rest[1], database.minutes_vector(key[city]), self.width))
+        return cached
+
+    def __call__(self, state) -> float:
+        numeric = self.numeric_cost(state)
+        if numeric == INF or self.base is None:
+            return numeric
+        return max(self.base(state), numeric)
+
+
+def _min_plus(left, right, width) -> List[float]:
+    """
+    Cheapest way to earn at least n from two independent sources, n < width:
+    min over a of left[a] + right[n - a] (both vectors are "at least" costs).
+    """
+    right = list(right)
+    reverse = right[::-1]
+    size = len(right)
+    result = []
+    for n in range(width):
+        low = max(0, n - size + 1)
+        high = min(n, len(left) - 1)
+        if low > high:
+            result.append(INF)
+            continue
+        # right[n - a] for a = low..high, read from the reversed copy
+        start = size - 1 - n + low
+        result.append(min(map(add, left[low:high + 1], reverse[start:start + high - low + 1])))
+    return result
+
+
+def _min_plus_at(left, right, n) -> float:
+    """One entry of the min-plus convolution: min over a of left[a] + right[n - a]."""
+    low = max(0, n - len(right) + 1)
+    high = min(n, len(left) - 1)
+    return min((left[a] + right[n - a] for a in range(low, high + 1)), default=INF)
@@ -0,0 +1,197 @@
+# pddl_ast.py
+import io
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
+
+# Anything other than a plain atom, as nested tuples of tokens:
+# ('>=', ('budget',), 100) is (>= (budget) 100)
+Expr = Union[str, int, float, tuple, 'PDDLAtom']
+
+# [('?from', 'location'), ('?to', 'location')] is ?from ?to - location
+TypedList = List[Tuple[str, Optional[str]]]
+
+
+# ---------------------------------------------------------------------
+# OBJECT MODEL
+# ---------------------------------------------------------------------
+class PDDLAtom:
+    """Atom such as (connected ?from ?to) or (at home)."""
+
+    __slots__ = ('name', 'args')
+
+    def __init__(self, name: str, args: Tuple[str, ...]):
+        self.name = name
+        self.args = tuple(args)
+
+    def __repr__(self):
+        return f"({' '.join((self.name,) + self.args)})"
+
+
+@dataclass
+class LiftedAction:
+    """STRIPS action in the shape grounding.ground_task expects."""
+    name: str
+    parameters: List[str]  # '?from', ...
+    preconditions: list    # PDDLAtom or ('not', PDDLAtom)
+    effects: list          # ('add' | 'del', PDDLAtom)
+    cost: int = 1
+    parameter_types: Dict[str, Optional[str]] = field(default_factory=dict)
+
+
+@dataclass
+class DurativeAction:
+    """Temporal action; written out for remote solvers, never ground locally."""
+    name: str
+    parameters: TypedList
+    duration: Expr
+    condition: List[Expr] = field(default_factory=list)  # e.g. ('at', 'start', PDDLAtom('at', ('?from',)))
+    effect: List[Expr] = field(default_factory=list)
+
+
+@dataclass
+class PDDLDomain:
+    name: str
+    requirements: List[str] = field(default_factory=list)
+    types: Dict[str, Optional[str]] = field(default_factory=dict)       # type -> parent
+    predicates: Dict[str, TypedList] = field(default_factory=dict)      # name -> parameters
+    functions: Dict[str, TypedList] = field(default_factory=dict)       # numeric fluents
+    actions: List[LiftedAction] = field(default_factory=list)
+    durative_actions: List[DurativeAction] = field(default_factory=list)
+
+    def __str__(self):
+        return domain_text(self)
+
+
+@dataclass
+class PDDLProblem:
+    name: str
+    domain: str
+    objects: Dict[str, Optional[str]] = field(default_factory=dict)  # object -> type
+    init: List[PDDLAtom] = field(default_factory=list)
+    fluents: List[Tuple[Expr, float]] = field(default_factory=list)  # (= head value) in :init
+    goal: List[PDDLAtom] = field(default_factory=list)
+    goal_conditions: List[Expr] = field(default_factory=list)        # non-atomic goal conjuncts
+    metric: Optional[Tuple[str, Expr]] = None                        # ('minimize', expr)
+
+    def __str__(self):
+        return problem_text(self)
+
+
+# ---------------------------------------------------------------------
+# STREAMING SERIALIZER
+# ---------------------------------------------------------------------
+def write_domain(domain: PDDLDomain, sink) -> None:
+    """Write the domain as PDDL to anything with a write(str) method, a line at a time."""
+    w = sink.write
+    w(f"(define (domain {domain.name})\n")
+    if domain.requirements:
+        w(f"  (:requirements {' '.join(domain.requirements)})\n")
+    if domain.types:
+        w(f"  (:types {_typed(domain.types.items())})\n")
+    if domain.predicates:
+        w("\n  (:predicates\n")
+        for name, parameters in domain.predicates.items():
+            w(f"    ({' '.join([name] + ([_typed(parameters)] if parameters else []))})\n")
+        w("  )\n")
+    if domain.functions:
+        w("\n  (:functions\n")
+        for name, parameters in domain.functions.items():
+            w(f"    ({' '.join([name] + ([_typed(parameters)] if parameters else []))}) - number\n")
+        w("  )\n")
+    for action in domain.actions:
+        _write_action(action, w)
+    for action in domain.durative_actions:
+        _write_durative(action, w)
+    w(")\n")
+
+
+def write_problem(problem: PDDLProblem, sink) -> None:
+    """Write the problem as PDDL to anything with a write(str) method, a line at a time."""
+    w = sink.write
+    w(f"(define (problem {problem.name})\n")
+    w(f"  (:domain {problem.domain})\n")
+    if problem.objects:
+        w(f"\n  (:objects\n    {_typed(problem.objects.items())}\n  )\n")
+    w("\n  (:init\n")
+    for atom in problem.init:
+        w(f"    {atom!r}\n")
+    for head, value in problem.fluents:
+        w(f"    (= {sexp(head)} {sexp(value)})\n")
+    w("  )\n")
+    w("\n  (:goal\n    (and\n")
+    for atom in problem.goal:
+        w(f"      {atom!r}\n")
+    for condition in problem.goal_conditions:
+        w(f"      {sexp(condition)}\n")
+    w("    )\n  )\n")
+    if problem.metric is not None:
+        w(f"\n  (:metric {problem.metric[0]} {sexp(problem.metric[1])})\n")
+    w(")\n")
+
+
+def domain_text(domain: PDDLDomain) -> str:
+    text = io.StringIO()
+    write_domain(domain, text)
+    return text.getvalue()
+
+
+def problem_text(problem: PDDLProblem) -> str:
+    text = io.StringIO()
+    write_problem(problem, text)
+    return text.getvalue()
+
+
+def sexp(expr: Expr) -> str:
+    """Text of one expression: tuples become lists, whole floats print as integers."""
+    if isinstance(expr, tuple):
+        return f"({' '.join(sexp(part) for part in expr)})"
+    if isinstance(expr, float) and expr.is_integer():
+        return str(int(expr))
+    if isinstance(expr, PDDLAtom):
+        return repr(expr)
+    return str(expr)
+
+
+def _typed(pairs) -> str:
+    """'a b - t c' from [(a, t), (b, t), (c, None)]: runs of one type share the '- type'."""
+    parts, run, run_type = [], [], None
+    for name, type_name in list(pairs) + [(None, None)]:
+        if run and (name is None or type_name != run_type):
+            parts.extend(run)
+            if run_type is not None:
+                parts.extend(('-', run_type))
+            run = []
+        run_type = type_name
+        if name is not None:
+            run.append(name)
+    return ' '.join(parts)
+
+
+def _literal(literal) -> str:
+    if isinstance(literal, tuple):
+        return f"(not {literal[1]!r})"
+    return repr(literal)
+
+
+def _write_action(action: LiftedAction, w) -> None:
+    parameters = [(p, action.parameter_types.get(p)) for p in action.parameters]
+    w(f"\n  (:action {action.name}\n")
+    w(f"    :parameters ({_typed(parameters)})\n")
+    if action.preconditions:
+        w(f"    :precondition (and {' '.join(_literal(p) for p in action.preconditions)})\n")
+    w("    :effect (and\n")
+    for kind, atom in action.effects:
+        w(f"      {_literal(('not', atom)) if kind == 'del' else repr(atom)}\n")
+    w("    )\n  )\n")
+
+
+def _write_durative(action: DurativeAction, w) -> None:
+    w(f"\n  (:durative-action {action.name}\n")
+    w(f"    :parameters ({_typed(action.parameters)})\n")
+    w(f"    :duration {sexp(action.duration)}\n")
+    for keyword, parts in ((':condition', action.condition), (':effect', action.effect)):
+        w(f"    {keyword} (and\n")
+        for part in parts:
+            w(f"      {sexp(part)}\n")
+        w("    )\n")
+    w("  )\n")
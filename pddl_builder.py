@@ -1,72 +1,63 @@
 # pddl_builder.py
 from typing import List
-from textwrap import dedent
 
-class PDDLBuilder:
-    """Builds REAL PDDL domain and problem files with correct, flush-left syntax."""
-
-    def build_domain(self) -> str:
-        domain = """(define (domain trip)
-  (:requirements :strips :typing)
-  (:types location)
+from pddl_ast import LiftedAction, PDDLAtom, PDDLDomain, PDDLProblem
 
-  (:predicates
-    (at ?l - location)
-    (connected ?a - location ?b - location)
-    (visited ?l - location)
-  )
+# How domain and problem state which locations can be travelled between:
+#   'pairs'    - one (connected a b) fact per ordered pair, n*(n-1) facts
+#   'complete' - none; travel needs only (not (at ?to)), which on a
+#                complete graph is the same condition in linear size
+CONNECTIVITY_MODES = ('pairs', 'complete')
 
-  (:action travel
-    :parameters (?from - location ?to - location)
-    :precondition (and (at ?from) (connected ?from ?to))
-    :effect (and
-      (not (at ?from))
-      (at ?to)
-    )
-  )
 
-  (:action visit
-    :parameters (?place - location)
-    :precondition (at ?place)
-    :effect (visited ?place)
-  )
-)
-"""
+class PDDLBuilder:
+    """
+    Builds the trip domain and problem as pddl_ast objects. The local
+    planner grounds them directly; pddl_ast.domain_text/problem_text (or
+    str()) give the PDDL for a remote solver or the GUI.
+    """
+
+    def __init__(self, connectivity: str = 'pairs'):
+        if connectivity not in CONNECTIVITY_MODES:
+            raise ValueError(f"Unknown connectivity mode: {connectivity}")
+        self.connectivity = connectivity
+
+    def build_domain(self) -> PDDLDomain:
+        domain = PDDLDomain('trip', requirements=[':strips', ':typing'], types={'location': None})
+        domain.predicates['at'] = [('?l', 'location')]
+        if self.connectivity == 'complete':
+            domain.requirements.append(':negative-preconditions')
+            reachable = ('not', PDDLAtom('at', ('?to',)))
+        else:
+            domain.predicates['connected'] = [('?a', 'location'), ('?b', 'location')]
+            reachable = PDDLAtom('connected', ('?from', '?to'))
+        domain.predicates['visited'] = [('?l', 'location')]
+
+        domain.actions.append(LiftedAction(
+            'travel', ['?from', '?to'],
+            preconditions=[PDDLAtom('at', ('?from',)), reachable],
+            effects=[('del', PDDLAtom('at', ('?from',))), ('add', PDDLAtom('at', ('?to',)))],
+            parameter_types={'?from': 'location', '?to': 'location'}
+        ))
+        domain.actions.append(LiftedAction(
+            'visit', ['?place'],
+            preconditions=[PDDLAtom('at', ('?place',))],
+            effects=[('add', PDDLAtom('visited', ('?place',)))],
+            parameter_types={'?place': 'location'}
+        ))
         return domain
 
-    def build_problem(self, locations: List[str], start: str, goals: List[str]) -> str:
-        # OBJECTS
-        all_locs = " ".join(locations)
+    def build_problem(self, locations: List[str], start: str, goals: List[str]) -> PDDLProblem:
+        problem = PDDLProblem('trip-problem', 'trip', objects={loc: 'location' for loc in locations})
 
         # INIT
-        init_lines = [f"(at {start})"]
-        for a in locations:
-            for b in locations:
-                if a != b:
-                    init_lines.append(f"(connected {a} {b})")
-        init_str = "\n    ".join(init_lines)
+        problem.init.append(PDDLAtom('at', (start,)))
+        if self.connectivity == 'pairs':
+            for a in locations:
+                for b in locations:
+                    if a != b:
+                        problem.init.append(PDDLAtom('connected', (a, b)))
 
         # GOALS
-        goal_parts = [f"(visited {g})" for g in goals]
-        goal_str = "\n      ".join(goal_parts)
-
-        # PROBLEM (flush-left, no indentation before (define))
-        problem = f"""(define (problem trip-problem)
-  (:domain trip)
-
-  (:objects
-    {all_locs} - location
-  )
-
-  (:init
-    {init_str}
-  )
-
-  (:goal
-    (and
-      {goal_str}
-    )
-  )
-)
-"""
+        problem.goal.extend(PDDLAtom('visited', (g,)) for g in goals)
         return problem
@@ -0,0 +1,290 @@
+# pddl_reduce.py
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from pddl_ast import PDDLAtom, PDDLDomain, PDDLProblem
+
+INF = float('inf')
+
+# Numeric comparisons the affordability check understands: (lhs bound, rhs bound) -> holds
+_COMPARISONS = {
+    '>=': lambda lhs, rhs: lhs[1] >= rhs[0],
+    '>': lambda lhs, rhs: lhs[1] > rhs[0],
+    '<=': lambda lhs, rhs: lhs[0] <= rhs[1],
+    '<': lambda lhs, rhs: lhs[0] < rhs[1],
+}
+
+
+@dataclass
+class ReductionReport:
+    """What reduce_problem removed, by reason, and the resulting size."""
+    objects_before: int = 0
+    objects_after: int = 0
+    facts_before: int = 0   # init atoms + numeric fluent values
+    facts_after: int = 0
+    dropped: Dict[str, List[str]] = field(default_factory=dict)  # reason -> objects
+    duplicate_facts: int = 0
+    irrelevant_facts: int = 0  # predicates/functions no action, goal or metric reads
+
+    @property
+    def ratio(self) -> float:
+        """Fraction of objects plus facts removed."""
+        before = self.objects_before + self.facts_before
+        return 1.0 - (self.objects_after + self.facts_after) / before if before else 0.0
+
+    def summary(self) -> str:
+        reasons = ', '.join(f"{len(objs)} {reason}" for reason, objs in self.dropped.items() if objs) or 'none'
+        return (f"{self.objects_before}->{self.objects_after} objects, {self.facts_before}->{self.facts_after} facts "
+                f"({self.ratio:.0%} smaller); dropped: {reasons}")
+
+
+def reduce_problem(domain: PDDLDomain, problem: PDDLProblem,
+                   relevant: Optional[Callable[[str], bool]] = None) -> Tuple[PDDLProblem, ReductionReport]:
+    """
+    Pre-solve reduction. Drops objects no action can ever take as a
+    parameter: 'unreachable' when the static facts (predicates no action
+    changes) admit no binding, 'unaffordable' when every binding fails a
+    numeric condition against a budget-like fluent that can only move the
+    wrong way. `relevant` lets the caller drop further objects as
+    'irrelevant' (e.g. attractions outside the user's interests). Facts on
+    dropped objects, repeated facts, and facts no action, goal or metric
+    reads go too. Objects named in the goal or metric are always kept.
+    Returns a new problem; the input is not modified.
+    """
+    report = ReductionReport(objects_before=len(problem.objects),
+                             facts_before=len(problem.init) + len(problem.fluents))
+    analysis = _Analysis(domain, problem)
+    pinned = analysis.goal_objects | analysis.constants
+
+    removed: Set[str] = set()
+    if relevant is not None:
+        report.dropped['irrelevant'] = [o for o in problem.objects if o not in pinned and not relevant(o)]
+        removed.update(report.dropped['irrelevant'])
+
+    # Dropping objects can only shrink other objects' bindings, so repeat to a fixpoint
+    report.dropped.setdefault('unreachable', [])
+    report.dropped.setdefault('unaffordable', [])
+    while True:
+        joined, affordable = analysis.supported(removed)
+        newly = [o for o in problem.objects if o not in removed and o not in pinned and o not in affordable]
+        if not newly:
+            break
+        for obj in newly:
+            report.dropped['unaffordable' if obj in joined else 'unreachable'].append(obj)
+        removed.update(newly)
+
+    reduced = PDDLProblem(problem.name, problem.domain,
+                          objects={o: t for o, t in problem.objects.items() if o not in removed},
+                          goal=list(problem.goal), goal_conditions=list(problem.goal_conditions),
+                          metric=problem.metric)
+    seen = set()
+    for atom in problem.init:
+        key = (atom.name, atom.args)
+        if removed.intersection(atom.args):
+            continue
+        if atom.name not in analysis.read_predicates:
+            report.irrelevant_facts += 1
+        elif key in seen:
+            report.duplicate_facts += 1
+        else:
+            seen.add(key)
+            reduced.init.append(atom)
+    seen = set()
+    for head, value in problem.fluents:
+        if removed.intersection(head[1:]):
+            continue
+        if head[0] not in analysis.read_functions:
+            report.irrelevant_facts += 1
+        elif head in seen:
+            report.duplicate_facts += 1
+        else:
+            seen.add(head)
+            reduced.fluents.append((head, value))
+
+    report.objects_after = len(reduced.objects)
+    report.facts_after = len(reduced.init) + len(reduced.fluents)
+    return reduced, report
+
+
+# ---------------------------------------------------------------------
+# DOMAIN ANALYSIS
+# ---------------------------------------------------------------------
+class _Schema:
+    """An action flattened to typed parameters, atom conditions and numeric comparisons."""
+
+    def __init__(self, parameters, atoms, negated, comparisons):
+        self.parameters = parameters    # [(var, type)]
+        self.atoms = atoms              # positive PDDLAtom conditions
+        self.negated = negated          # PDDLAtom under (not ...)
+        self.comparisons = comparisons  # (op, lhs, rhs)
+
+
+class _Analysis:
+
+    def __init__(self, domain: PDDLDomain, problem: PDDLProblem):
+        self.problem = problem
+        self.parents = domain.types
+        self.schemas: List[_Schema] = []
+        changed_predicates, self.function_moves = set(), {}
+        self.read_predicates, self.read_functions = set(), set()
+        self.constants = set()
+
+        for action in domain.actions:
+            parameters = [(p, action.parameter_types.get(p)) for p in action.parameters]
+            self._add_schema(parameters, action.preconditions)
+            changed_predicates.update(atom.name for _, atom in action.effects)
+        for action in domain.durative_actions:
+            # (at start X) / (over all X) / (at end X): the timing does not matter here
+            self._add_schema(action.parameters, [part[-1] for part in action.condition])
+            for part in action.effect:
+                self._note_effect(part[-1], changed_predicates)
+
+        self.static = {name for name in domain.predicates if name not in changed_predicates}
+        targets = problem.goal + problem.goal_conditions + ([problem.metric[1]] if problem.metric else [])
+        for expr in targets:
+            self._note_reads(expr)
+        self.goal_objects = {token for expr in targets for token in _tokens(expr) if token in problem.objects}
+
+        self.facts: Dict[str, List[tuple]] = {}
+        self.by_arg: Dict[tuple, List[tuple]] = {}  # (predicate, position, object) -> argument tuples
+        for atom in problem.init:
+            self.facts.setdefault(atom.name, []).append(atom.args)
+            for position, arg in enumerate(atom.args):
+                self.by_arg.setdefault((atom.name, position, arg), []).append(atom.args)
+        self.values = {head: value for head, value in problem.fluents}
+
+    def _add_schema(self, parameters, conditions):
+        atoms, negated, comparisons = [], [], []
+        for condition in conditions:
+            self._note_reads(condition)
+            if isinstance(condition, PDDLAtom):
+                atoms.append(condition)
+            elif condition[0] == 'not' and isinstance(condition[1], PDDLAtom):
+                negated.append(condition[1])
+            elif condition[0] in _COMPARISONS:
+                comparisons.append(condition)
+        for atom in atoms + negated:
+            self.constants.update(arg for arg in atom.args if not arg.startswith('?'))
+        self.schemas.append(_Schema(parameters, atoms, negated, comparisons))
+
+    def _note_effect(self, effect, changed_predicates):
+        if isinstance(effect, PDDLAtom):
+            changed_predicates.add(effect.name)
+        elif effect[0] == 'not':
+            changed_predicates.add(effect[1].name)
+        else:
+            # (increase (f ...) x), (decrease ...), (assign ...): record the directions f moves in
+            self.function_moves.setdefault(effect[1][0], set()).add(effect[0])
+            self._note_reads(effect[2])
+
+    def _note_reads(self, expr):
+        if isinstance(expr, PDDLAtom):
+            self.read_predicates.add(expr.name)
+        elif isinstance(expr, tuple) and expr:
+            if isinstance(expr[0], str) and expr[0] not in _COMPARISONS and expr[0] not in ('not', '+', '-', '*', '/'):
+                self.read_functions.add(expr[0])
+            for part in expr[1:]:
+                self._note_reads(part)
+
+    def supported(self, removed: Set[str]):
+        """Objects some action can bind from static facts alone, and those that also pass its numeric checks."""
+        joined, affordable = set(), set()
+        for schema in self.schemas:
+            static_atoms = [atom for atom in schema.atoms if atom.name in self.static]
+            bound = {arg for atom in static_atoms for arg in atom.args}
+            # Parameters no static atom constrains can take any object of their type
+            free = [self._objects_of(t, removed) for var, t in schema.parameters if var not in bound]
+            if not all(free):
+                continue
+            bindings = [{}]
+            for atom in static_atoms:
+                bindings = [b for binding in bindings for b in self._extend(binding, atom, schema, removed)]
+            bindings = [b for b in bindings if not any(self._negated_static_holds(atom, b) for atom in schema.negated)]
+            if not bindings:
+                continue
+            for objects in free:
+                joined.update(objects)
+            usable = False
+            for binding in bindings:
+                joined.update(binding.values())
+                if all(self._comparison_may_hold(c, binding) for c in schema.comparisons):
+                    affordable.update(binding.values())
+                    usable = True
+            if usable:
+                for objects in free:
+                    affordable.update(objects)
+        return joined, affordable
+
+    def _extend(self, binding, atom, schema, removed):
+        types = dict(schema.parameters)
+        candidates = self.facts.get(atom.name, ())
+        # Join on the first argument already fixed by a constant or the binding
+        for position, term in enumerate(atom.args):
+            value = binding.get(term, None if term.startswith('?') else term)
+            if value is not None:
+                candidates = self.by_arg.get((atom.name, position, value), ())
+                break
+        for args in candidates:
+            if len(args) != len(atom.args) or removed.intersection(args):
+                continue
+            extended = dict(binding)
+            for term, value in zip(atom.args, args):
+                if not term.startswith('?'):
+                    if term != value:
+                        break
+                elif extended.setdefault(term, value) != value or not self._is_a(value, types.get(term)):
+                    break
+            else:
+                yield extended
+
+    def _negated_static_holds(self, atom, binding):
+        if atom.name not in self.static or any(a.startswith('?') and a not in binding for a in atom.args):
+            return False
+        return tuple(binding.get(a, a) for a in atom.args) in self.facts.get(atom.name, ())
+
+    def _objects_of(self, type_name, removed):
+        return [o for o in self.problem.objects if o not in removed and self._is_a(o, type_name)]
+
+    def _is_a(self, obj, type_name):
+        if type_name is None:
+            return True
+        current = self.problem.objects.get(obj)
+        while current is not None:
+            if current == type_name:
+                return True
+            current = self.parents.get(current)
+        return False
+
+    def _comparison_may_hold(self, comparison, binding):
+        op, lhs, rhs = comparison
+        return _COMPARISONS[op](self._bounds(lhs, binding), self._bounds(rhs, binding))
+
+    def _bounds(self, expr, binding) -> Tuple[float, float]:
+        """Interval the expression can take over any plan; (-inf, inf) when unknown."""
+        if isinstance(expr, (int, float)):
+            return (expr, expr)
+        if not isinstance(expr, tuple) or not expr or any(
+                a.startswith('?') and a not in binding for a in expr[1:] if isinstance(a, str)):
+            return (-INF, INF)
+        head = (expr[0],) + tuple(binding.get(a, a) if isinstance(a, str) else a for a in expr[1:])
+        value = self.values.get(head)
+        if value is None:
+            return (-INF, INF)
+        moves = self.function_moves.get(expr[0], set())
+        if not moves:
+            return (value, value)
+        if moves == {'decrease'}:
+            return (-INF, value)
+        if moves == {'increase'}:
+            return (value, INF)
+        return (-INF, INF)
+
+
+def _tokens(expr):
+    if isinstance(expr, PDDLAtom):
+        yield from expr.args
+    elif isinstance(expr, tuple):
+        for part in expr:
+            yield from _tokens(part)
+    elif isinstance(expr, str):
+        yield expr
@@ -0,0 +1,131 @@
+# plan_cache.py
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+PLAN_CACHE_VERSION = 1
+
+# Itineraries kept in process (least recently used dropped first)
+LRU_SIZE = 256
+
+# Lifetime of an on-disk entry; the in-process copy follows the same deadline
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+
+def catalog_version(destinations_data: dict) -> str:
+    """Hash of the static destination catalog; editing it invalidates every cached plan."""
+    material = json.dumps(destinations_data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(material.encode('utf-8')).hexdigest()
+
+
+def normalize_destinations(destinations: Iterable[str]) -> list:
+    """Lower-case snake_case names, duplicates dropped, sorted (plan_trip picks the order itself)."""
+    return sorted({d.strip().lower().replace(' ', '_') for d in destinations if d and d.strip()})
+
+
+def request_key(destinations, budget, interests, duration, start_point, end_point, catalog: str) -> str:
+    """Canonical form of a plan_trip request as a short hash."""
+    material = json.dumps([
+        PLAN_CACHE_VERSION,
+        normalize_destinations(destinations),
+        float(budget),
+        sorted({i.strip().lower() for i in interests}),
+        int(duration),
+        start_point.strip().lower(),
+        end_point.strip().lower(),
+        catalog,
+    ], ensure_ascii=False)
+    return hashlib.sha1(material.encode('utf-8')).hexdigest()
+
+
+class PlanCache:
+    """
+    Two tiers of finished itineraries keyed by request_key: an in-process
+    LRU and, if `db_path` is given, a SQLite table that survives restarts.
+    Entries are stored as JSON text, so every hit returns a fresh copy the
+    caller may modify. Expired rows are deleted on write.
+    """
+
+    def __init__(self, size: int = LRU_SIZE, db_path: Optional[str] = None,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.size = size
+        self.ttl_seconds = ttl_seconds
+        self.entries: 'OrderedDict[str, tuple]' = OrderedDict()  # key -> (expires_at, payload)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.db = self._open(db_path) if db_path else None
+
+    def _open(self, db_path):
+        try:
+            conn = sqlite3.connect(db_path, check_same_thread=False)
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS plan_cache (
+                    key TEXT PRIMARY KEY,
+                    payload TEXT,
+                    expires_at REAL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS plan_cache_expiry ON plan_cache (expires_at)')
+            conn.commit()
+            return conn
+        except sqlite3.Error as e:
+            print(f"[CACHE] Plan cache database unavailable: {e}")
+            return None
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self.entries[key]
+                entry = None
+            if entry is None and self.db is not None:
+                row = self.db.execute('SELECT expires_at, payload FROM plan_cache WHERE key = ? AND expires_at > ?',
+                                      (key, now)).fetchone()
+                if row is not None:
+                    entry = self._remember(key, row)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return json.loads(entry[1])
+
+    def put(self, key: str, itinerary: dict) -> bool:
+        """Store a copy of `itinerary`; False if it is not plain JSON data."""
+        try:
+            payload = json.dumps(itinerary, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return False
+        now = time.time()
+        entry = (now + self.ttl_seconds, payload)
+        with self._lock:
+            self._remember(key, entry)
+            if self.db is not None:
+                try:
+                    self.db.execute('DELETE FROM plan_cache WHERE expires_at <= ?', (now,))
+                    self.db.execute('INSERT OR REPLACE INTO plan_cache (key, payload, expires_at) VALUES (?, ?, ?)',
+                                    (key, payload, entry[0]))
+                    self.db.commit()
+                except sqlite3.Error as e:
+                    print(f"[CACHE] Could not persist plan: {e}")
+        return True
+
+    def _remember(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            if self.db is not None:
+                self.db.execute('DELETE FROM plan_cache')
+                self.db.commit()
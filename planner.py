@@ -1,16 +1,246 @@
 # planner.py
+import re
 import requests
 import json
+from typing import List, Optional, Tuple, Union
+
+from grounding import FactTable, ground_task
+from pddl_ast import LiftedAction, PDDLAtom, PDDLDomain, PDDLProblem, domain_text, problem_text
+from search import astar
+from heuristics import make_heuristic
+from validator import ValidationResult, validate_plan
 
 PLANNER_API_URL = "https://solver.planning.domains/solve"
 
+# Local planner: weighted A* budget before the remote service is tried
+LOCAL_MAX_EXPANSIONS = 20000
+LOCAL_WEIGHT = 2.0
+
+
+class PDDLParseError(Exception):
+    """PDDL text outside the supported STRIPS/typing subset."""
+
+
+# PDDL given either as text or as pddl_ast objects
+DomainInput = Union[str, PDDLDomain]
+ProblemInput = Union[str, PDDLProblem]
+
+
+# ---------------------------------------------------------------------
+# PDDL PARSER (STRIPS + typing + negative preconditions)
+# ---------------------------------------------------------------------
+def parse_sexp(text: str) -> list:
+    """Nested lists of lower-cased tokens; ';' comments are dropped."""
+    tokens = re.findall(r'\(|\)|[^\s()]+', re.sub(r';[^\n]*', '', text).lower())
+    stack = [[]]
+    for token in tokens:
+        if token == '(':
+            stack.append([])
+        elif token == ')':
+            if len(stack) == 1:
+                raise PDDLParseError("Unbalanced ')'")
+            closed = stack.pop()
+            stack[-1].append(closed)
+        else:
+            stack[-1].append(token)
+    if len(stack) != 1 or len(stack[0]) != 1 or not isinstance(stack[0][0], list):
+        raise PDDLParseError("Expected a single (define ...) form")
+    return stack[0][0]
+
+
+def _typed_list(tokens: list) -> List[Tuple[str, Optional[str]]]:
+    """'a b - t c' -> [(a, t), (b, t), (c, None)]"""
+    typed, pending = [], []
+    i = 0
+    while i < len(tokens):
+        if tokens[i] == '-':
+            if i + 1 >= len(tokens):
+                raise PDDLParseError("Missing type after '-'")
+            typed.extend((name, tokens[i + 1]) for name in pending)
+            pending = []
+            i += 2
+        else:
+            pending.append(tokens[i])
+            i += 1
+    typed.extend((name, None) for name in pending)
+    return typed
+
+
+def _atom(form) -> PDDLAtom:
+    if not isinstance(form, list) or not form or isinstance(form[0], list):
+        raise PDDLParseError(f"Expected an atom, got {form}")
+    return PDDLAtom(form[0], tuple(form[1:]))
+
+
+def _conjuncts(form) -> list:
+    if not form:
+        return []
+    if form[0] == 'and':
+        return [c for part in form[1:] for c in _conjuncts(part)]
+    return [form]
+
+
+def _sections(form, header: str):
+    if len(form) < 2 or form[0] != 'define' or form[1][:1] != [header]:
+        raise PDDLParseError(f"Expected (define ({header} ...))")
+    return form[1][1], form[2:]
+
+
+def parse_domain(text: str) -> PDDLDomain:
+    name, sections = _sections(parse_sexp(text), 'domain')
+    domain = PDDLDomain(name)
+    for section in sections:
+        key = section[0]
+        if key == ':requirements':
+            unsupported = set(section[1:]) - {':strips', ':typing', ':negative-preconditions'}
+            if unsupported:
+                raise PDDLParseError(f"Unsupported requirements: {sorted(unsupported)}")
+            domain.requirements.extend(section[1:])
+        elif key == ':types':
+            domain.types.update(_typed_list(section[1:]))
+        elif key == ':predicates':
+            domain.predicates.update((p[0], _typed_list(p[1:])) for p in section[1:])
+        elif key == ':action':
+            domain.actions.append(_parse_action(section, domain))
+        else:
+            raise PDDLParseError(f"Unsupported domain section: {key}")
+    return domain
+
+
+def _parse_action(section, domain: PDDLDomain) -> LiftedAction:
+    fields = dict(zip(section[2::2], section[3::2]))
+    parameters = _typed_list(fields.get(':parameters', []))
+    preconditions = []
+    for literal in _conjuncts(fields.get(':precondition', [])):
+        if literal[0] == 'not':
+            preconditions.append(('not', _atom(literal[1])))
+        else:
+            preconditions.append(_atom(literal))
+    effects = []
+    for literal in _conjuncts(fields.get(':effect', [])):
+        if literal[0] == 'not':
+            effects.append(('del', _atom(literal[1])))
+        else:
+            effects.append(('add', _atom(literal)))
+    for literal in preconditions + [e[1] for e in effects]:
+        atom = literal[1] if isinstance(literal, tuple) else literal
+        if atom.name not in domain.predicates:
+            raise PDDLParseError(f"Undeclared predicate in {section[1]}: {atom.name}")
+    return LiftedAction(section[1], [var for var, _ in parameters], preconditions, effects,
+                        parameter_types=dict(parameters))
+
+
+def parse_problem(text: str) -> PDDLProblem:
+    name, sections = _sections(parse_sexp(text), 'problem')
+    problem = PDDLProblem(name, domain='')
+    for section in sections:
+        key = section[0]
+        if key == ':domain':
+            problem.domain = section[1]
+        elif key == ':objects':
+            problem.objects.update(_typed_list(section[1:]))
+        elif key == ':init':
+            problem.init.extend(_atom(a) for a in section[1:])
+        elif key == ':goal':
+            for literal in _conjuncts(section[1]):
+                if literal[0] == 'not':
+                    raise PDDLParseError("Negative goals are not supported")
+                problem.goal.append(_atom(literal))
+        else:
+            raise PDDLParseError(f"Unsupported problem section: {key}")
+    return problem
+
+
+class _LocalState:
+    """Bitset state for the grounded local planner."""
+
+    __slots__ = ('facts', 'bits', 'numeric_fluents')
+
+    def __init__(self, facts: FactTable, bits: int):
+        self.facts = facts
+        self.bits = bits
+        self.numeric_fluents = {}
+
+    def copy(self):
+        return _LocalState(self.facts, self.bits)
+
+    def signature(self):
+        return self.bits
+
+
+def ground_pddl(domain: DomainInput, problem: ProblemInput):
+    """Ground a domain and problem, given as PDDL text or as pddl_ast objects, into a grounding.GroundTask."""
+    if isinstance(domain, str):
+        domain = parse_domain(domain)
+    if isinstance(problem, str):
+        problem = parse_problem(problem)
+    if domain.durative_actions or domain.functions or problem.fluents or problem.goal_conditions:
+        raise PDDLParseError("Durative actions and numeric fluents need a remote planner")
+
+    init = list(problem.init)
+    for obj, obj_type in problem.objects.items():
+        # An object is an instance of its type and of every ancestor type
+        seen = set()
+        while obj_type is not None and obj_type not in seen:
+            seen.add(obj_type)
+            init.append(PDDLAtom(f"type:{obj_type}", (obj,)))
+            obj_type = domain.types.get(obj_type)
+
+    facts = FactTable()
+    initial_state = _LocalState(facts, facts.mask(init))
+    return ground_task([_typed_action(action) for action in domain.actions], initial_state, problem.goal, {})
+
+
+def _typed_action(action: LiftedAction) -> LiftedAction:
+    """Typing compiles to static unary type preconditions, joined before the others."""
+    types = [PDDLAtom(f"type:{action.parameter_types[var]}", (var,))
+             for var in action.parameters if action.parameter_types.get(var) is not None]
+    if not types:
+        return action
+    return LiftedAction(action.name, action.parameters, types + action.preconditions, action.effects,
+                        action.cost, action.parameter_types)
+
+
+def solve_locally(domain: DomainInput, problem: ProblemInput) -> Optional[List[str]]:
+    """
+    Ground (parsing text first) and solve with weighted A* + h_FF. Returns
+    plan steps in the remote planner's format, e.g. '(travel home chicago)',
+    or None.
+    """
+    task = ground_pddl(domain, problem)
+    goal = astar(task, make_heuristic(task, 'ff'), max_expansions=LOCAL_MAX_EXPANSIONS, weight=LOCAL_WEIGHT)
+    if goal is None:
+        return None
+
+    steps = []
+    node = goal
+    while node.action_id is not None:
+        action = task.actions[node.action_id]
+        steps.append(f"({' '.join((action.name,) + tuple(action.bindings.values()))})")
+        node = node.parent
+    steps.reverse()
+    return steps
+
+
+def validate_pddl_plan(domain: DomainInput, problem: ProblemInput, plan: List[str]) -> Optional[ValidationResult]:
+    """Validate solver output against the PDDL; None if the PDDL is outside the parsed subset."""
+    try:
+        task = ground_pddl(domain, problem)
+    except PDDLParseError:
+        return None
+    return validate_plan(task, plan)
+
+
 class RealPlanner:
     """
     Wrapper around the Planning.Domains API.
     This executes a REAL planner, not simulated logic.
     """
 
-    def solve(self, domain_str: str, problem_str: str):
+    def solve(self, domain: DomainInput, problem: ProblemInput):
+        # The remote service takes text: this is where pddl_ast objects get serialized
+        domain_str = domain if isinstance(domain, str) else domain_text(domain)
+        problem_str = problem if isinstance(problem, str) else problem_text(problem)
         payload = {
             "domain": domain_str,
             "problem": problem_str
@@ -57,46 +287,20 @@ class RealPlanner:
         plan_steps = data["result"]["plan"]
         return [step["name"] for step in plan_steps]
     
-    def solve_with_fallback(self, domain_str: str, problem_str: str):
-        """Try the real planner first, fall back to simple planner if it fails."""
+    def solve_with_fallback(self, domain: DomainInput, problem: ProblemInput):
+        """Solve locally first (pddl_ast objects are ground directly); only call the remote planner if that fails."""
         try:
-            return self.solve(domain_str, problem_str)
-        except Exception as e:
-            print(f"Real planner failed: {e}")
-            print("Falling back to simple planner...")
-            return self._simple_fallback_planner(domain_str, problem_str)
-    
-    def _simple_fallback_planner(self, domain_str: str, problem_str: str):
-        """Simple fallback planner when the API is unavailable."""
-        # Extract locations and goals from the problem string
-        import re
-        
-        # Find objects section
-        objects_match = re.search(r':objects\s+([^)]+)', problem_str)
-        if not objects_match:
-            raise Exception("Could not parse problem objects")
-        
-        objects_line = objects_match.group(1).strip()
-        locations = [loc.strip() for loc in objects_line.split('-')[0].split()]
-        
-        # Find goal section  
-        goals_match = re.search(r'\(visited\s+([^)]+)\)', problem_str)
-        if not goals_match:
-            raise Exception("Could not parse problem goals")
-        
-        # Simple plan: travel to each goal location and visit it
-        plan = []
-        current = "home"  # assume we start at home
-        
-        # Extract all visited goals
-        visited_goals = re.findall(r'\(visited\s+([^)]+)\)', problem_str)
-        
-        for goal in visited_goals:
-            goal = goal.strip()
-            if goal != current:
-                plan.append(f"(travel {current} {goal})")
-                current = goal
-            plan.append(f"(visit {goal})")
-        
-        print(f"Fallback plan generated: {plan}")
+            plan = solve_locally(domain, problem)
+            if plan is not None:
+                print(f"Local planner found a {len(plan)}-step plan")
+                return plan
+            print("Local planner found no plan")
+        except PDDLParseError as e:
+            print(f"Local planner cannot read this PDDL: {e}")
+
+        print("Falling back to remote planner...")
+        plan = self.solve(domain, problem)
+        validation = validate_pddl_plan(domain, problem, plan)
+        if validation is not None and not validation.valid:
+            raise Exception(f"Planner returned an invalid plan: {validation.reason}")
         return plan
@@ -0,0 +1,72 @@
+# portfolio.py
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class PortfolioResult:
+    """Winning plan of a portfolio run and what happened to every strategy."""
+    plan: Optional[List[str]]
+    strategy: Optional[str]
+    elapsed_ms: float
+    status: Dict[str, str] = field(default_factory=dict)  # name -> ok / invalid / error / cancelled
+
+
+def run_portfolio(jobs: Dict[str, Tuple[Callable, tuple]], deadline_ms: Optional[float] = None,
+                  mode: str = 'first', is_valid: Optional[Callable] = None,
+                  score: Optional[Callable] = None, max_workers: Optional[int] = None) -> PortfolioResult:
+    """
+    Run planning strategies concurrently in worker processes.
+
+    jobs: name -> (picklable callable, args); each returns a plan or None.
+    mode 'first' returns the first valid plan; mode 'best' waits for all
+    strategies (or the deadline) and keeps the lowest `score`. Strategies
+    still running when the portfolio returns are cancelled.
+    """
+    if mode not in ('first', 'best'):
+        raise ValueError(f"Unknown portfolio mode: {mode}")
+    score = score or len
+    start = time.monotonic()
+    status = {name: 'cancelled' for name in jobs}
+    best_plan, best_name = None, None
+
+    workers = max_workers or max(1, min(len(jobs), os.cpu_count() or 1))
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = {executor.submit(fn, *args): name for name, (fn, args) in jobs.items()}
+        timeout = deadline_ms / 1000.0 if deadline_ms is not None else None
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                name = futures[future]
+                try:
+                    plan = future.result()
+                except Exception as e:
+                    status[name] = f"error: {e}"
+                    continue
+                if not plan or (is_valid is not None and not is_valid(plan)):
+                    status[name] = 'invalid'
+                    continue
+                status[name] = 'ok'
+                if best_plan is None or score(plan) < score(best_plan):
+                    best_plan, best_name = plan, name
+                if mode == 'first':
+                    break
+        except FuturesTimeout:
+            pass
+    finally:
+        _shutdown_now(executor)
+
+    return PortfolioResult(best_plan, best_name, (time.monotonic() - start) * 1000.0, status)
+
+
+def _shutdown_now(executor: ProcessPoolExecutor):
+    """Cancel queued work and stop workers that are still searching."""
+    # The executor has no public way to stop running tasks, so terminate the workers
+    processes = list((getattr(executor, '_processes', None) or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
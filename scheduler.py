@@ -0,0 +1,155 @@
+# scheduler.py
+import bisect
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+DAY_START = 9 * 60
+DAY_END = 22 * 60
+
+# Lunch and dinner slots meals are placed into
+MEAL_WINDOWS = ((12 * 60, 14 * 60 + 30), (18 * 60, 21 * 60))
+
+
+def parse_open_hours(open_hours: Optional[str], default: Tuple[int, int] = (0, 24 * 60)) -> Tuple[int, int]:
+    """'9:00-17:00' -> (540, 1020); missing or malformed hours give `default`."""
+    try:
+        opens, closes = open_hours.split('-')
+        return _to_minutes(opens), _to_minutes(closes)
+    except (AttributeError, ValueError):
+        return default
+
+
+def _to_minutes(text: str) -> int:
+    hours, minutes = text.strip().split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+@dataclass
+class Slot:
+    """Where an activity was placed: day number and start/end in minutes from midnight."""
+    day: int
+    start: int
+    end: int
+
+
+# ---------------------------------------------------------------------
+# ONE DAY: FREE TIME AS SORTED INTERVALS
+# ---------------------------------------------------------------------
+class DayCalendar:
+    """Free time of one day as sorted, disjoint [start, end) intervals."""
+
+    def __init__(self, start: int = DAY_START, end: int = DAY_END):
+        self.starts = [start]
+        self.ends = [end]
+
+    def find(self, duration: int, earliest: int, latest_end: int) -> Optional[int]:
+        """Earliest free start >= `earliest` whose activity ends by `latest_end`."""
+        i = max(0, bisect.bisect_right(self.starts, earliest) - 1)
+        for j in range(i, len(self.starts)):
+            start = max(self.starts[j], earliest)
+            if start + duration > latest_end:
+                return None  # later intervals only start later
+            if start + duration <= self.ends[j]:
+                return start
+        return None
+
+    def book(self, start: int, end: int):
+        """Remove [start, end) from the free interval that contains it."""
+        i = bisect.bisect_right(self.starts, start) - 1
+        pieces = [(s, e) for s, e in ((self.starts[i], start), (end, self.ends[i])) if e > s]
+        self.starts[i:i + 1] = [s for s, _ in pieces]
+        self.ends[i:i + 1] = [e for _, e in pieces]
+
+
+# ---------------------------------------------------------------------
+# MULTI-DAY SCHEDULER
+# ---------------------------------------------------------------------
+class DayScheduler:
+    """
+    Places activities into the earliest free slot that respects opening
+    hours, rolling over to the next day when nothing fits. Barrier
+    activities (travel) start after everything booked so far that day and
+    push the earliest start of everything after them, so activities
+    never land on the wrong side of a move to another city. Once the last
+    of `days` is full, activities roll into extra days (counted in
+    `extra_days`); no slot ever ends after `day_end`.
+    """
+
+    def __init__(self, days: Optional[int] = None, day_start: int = DAY_START, day_end: int = DAY_END):
+        self.days = days
+        self.day_start = day_start
+        self.day_end = day_end
+        self.day = 0
+        self.next_day()
+
+    def next_day(self):
+        self.day += 1
+        self.calendar = DayCalendar(self.day_start, self.day_end)
+        self.floor = self.day_start  # nothing may start before this
+        self.latest = self.day_start  # end of the last booked activity
+        self.booked_today = 0
+
+    def has_next_day(self) -> bool:
+        return self.days is None or self.day < self.days
+
+    @property
+    def extra_days(self) -> int:
+        """Days used beyond `days`."""
+        return max(0, self.day - self.days) if self.days is not None else 0
+
+    def place(self, duration: int, open_hours: Optional[str] = None, barrier: bool = False) -> Slot:
+        opens, closes = parse_open_hours(open_hours, (self.day_start, self.day_end))
+        if min(closes, self.day_end) - max(opens, self.day_start) < duration:
+            opens, closes = self.day_start, self.day_end  # never fits its hours; ignore them
+        while True:
+            slot = self._try(duration, opens, closes, barrier)
+            if slot is not None:
+                return slot
+            if self.booked_today == 0:
+                return self._span_days(duration, barrier)
+            self.next_day()
+
+    def place_meal(self, duration: int, open_hours: Optional[str] = None,
+                   roll_over: bool = True) -> Optional[Slot]:
+        """Lunch or dinner slot today, else lunch on the next day; None if not rolling over."""
+        opens, closes = parse_open_hours(open_hours, (self.day_start, self.day_end))
+        for _ in range(2):
+            for meal_start, meal_end in MEAL_WINDOWS:
+                slot = self._try(duration, max(opens, meal_start), min(closes, meal_end), False)
+                if slot is not None:
+                    return slot
+            if not roll_over or not self.has_next_day():
+                break
+            self.next_day()
+        return self.place(duration, open_hours) if roll_over else None
+
+    def _try(self, duration, opens, closes, barrier) -> Optional[Slot]:
+        # A barrier goes after everything already booked today, not into an earlier gap
+        earliest = max(self.latest, self.floor, opens) if barrier else max(self.floor, opens)
+        start = self.calendar.find(duration, earliest, min(closes, self.day_end))
+        if start is None:
+            return None
+        end = start + duration
+        self.calendar.book(start, end)
+        self.booked_today += 1
+        self.latest = max(self.latest, end)
+        if barrier:
+            self.floor = end
+        return Slot(self.day, start, end)
+
+    def _span_days(self, duration, barrier) -> Slot:
+        """Longer than a day: whole days from this one, then the rest of it the next morning."""
+        length = self.day_end - self.day_start
+        slot = self._try(length, self.day_start, self.day_end, barrier)
+        remaining = duration - length
+        while remaining > 0:
+            self.next_day()
+            self._try(min(remaining, length), self.day_start, self.day_end, barrier)
+            remaining -= length
+        return slot
+
+
+def chronological(activities: List[dict], slots: Sequence[Slot]) -> List[dict]:
+    """Activities re-ordered by their placed (day, start)."""
+    order = sorted(range(len(activities)), key=lambda i: (slots[i].day, slots[i].start))
+    return [activities[i] for i in order]
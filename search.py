@@ -0,0 +1,425 @@
+# search.py
+import heapq
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class SearchNode:
+    """Search node: state plus a parent pointer and the id of the action that produced it."""
+
+    __slots__ = ('state', 'parent', 'action_id', 'g')
+
+    def __init__(self, state, parent=None, action_id=None, g=0):
+        self.state = state
+        self.parent = parent
+        self.action_id = action_id
+        self.g = g
+
+
+def extract_path(node: SearchNode) -> List[int]:
+    """Walk parent pointers back to the root; return action ids in execution order."""
+    path = []
+    while node is not None and node.action_id is not None:
+        path.append(node.action_id)
+        node = node.parent
+    path.reverse()
+    return path
+
+
+def extract_plan(task, node: SearchNode) -> List[str]:
+    """Action strings are only formatted here, once a plan is returned."""
+    return plan_labels(task, extract_path(node))
+
+
+def plan_labels(task, action_ids: List[int]) -> List[str]:
+    """Plan step strings for a path of action ids; macros expand to their steps."""
+    plan = []
+    for action_id in action_ids:
+        action = task.actions[action_id]
+        for step in getattr(action, 'steps', None) or (action,):
+            plan.append(step.label())
+    return plan
+
+
+# ---------------------------------------------------------------------
+# SEARCH STATISTICS
+# ---------------------------------------------------------------------
+@dataclass
+class SearchStats:
+    """
+    Counters a search adds to as it runs (pass the same object to several
+    runs to total them). Timing is two perf_counter reads per expansion and
+    per heuristic call, cheap enough to leave on.
+    """
+    expanded: int = 0         # states whose successors were generated
+    generated: int = 0        # successor states built
+    duplicates: int = 0       # states dropped as already seen (or dominated)
+    peak_open: int = 0        # largest open list (IDA*: deepest path)
+    heuristic_ms: float = 0.0
+    successor_ms: float = 0.0
+    elapsed_ms: float = 0.0
+    depth: int = 0            # steps in the last plan found
+
+    def add(self, other: 'SearchStats'):
+        """Fold in another run's counters; peak_open keeps the larger of the two."""
+        self.expanded += other.expanded
+        self.generated += other.generated
+        self.duplicates += other.duplicates
+        self.peak_open = max(self.peak_open, other.peak_open)
+        self.heuristic_ms += other.heuristic_ms
+        self.successor_ms += other.successor_ms
+        self.elapsed_ms += other.elapsed_ms
+
+    @property
+    def mean_branching(self) -> float:
+        return self.generated / self.expanded if self.expanded else 0.0
+
+    @property
+    def effective_branching(self) -> float:
+        """b* such that a uniform tree of the plan's depth has `generated` nodes (0 without a plan)."""
+        if self.depth <= 0 or self.generated <= 0:
+            return 0.0
+        low, high = 0.0, float(self.generated)
+        for _ in range(50):
+            b = (low + high) / 2
+            total, term = 0.0, 1.0
+            for _ in range(self.depth):
+                term *= b
+                total += term
+                if total >= self.generated:
+                    break
+            if total < self.generated:
+                low = b
+            else:
+                high = b
+        return (low + high) / 2
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            'nodes_expanded': self.expanded,
+            'nodes_generated': self.generated,
+            'duplicates_pruned': self.duplicates,
+            'peak_open': self.peak_open,
+            'heuristic_ms': round(self.heuristic_ms, 2),
+            'successor_ms': round(self.successor_ms, 2),
+            'elapsed_ms': round(self.elapsed_ms, 2),
+            'plan_depth': self.depth,
+            'mean_branching_factor': round(self.mean_branching, 3),
+            'effective_branching_factor': round(self.effective_branching, 3),
+        }
+
+
+# ---------------------------------------------------------------------
+# DOMINANCE PRUNING
+# ---------------------------------------------------------------------
+def fluent_preferences(task) -> Dict[str, int]:
+    """
+    +1 if more of a fluent is never worse (only '>=' / '>' conditions),
+    -1 if less is never worse, 0 if states must agree on it. Fluents that
+    no condition mentions are left out: they cannot change what is reachable.
+    """
+    preference: Dict[str, int] = {}
+    conditions = [c for a in task.actions for c in a.numeric_pre] + list(task.goal_fluents)
+    for fluent, op, _ in conditions:
+        p = 1 if op in ('>=', '>') else -1 if op in ('<=', '<') else 0
+        previous = preference.get(fluent)
+        preference[fluent] = p if previous in (None, p) else 0
+    # Only additive effects preserve dominance between successors
+    for a in task.actions:
+        for fluent, op, _ in a.numeric_eff:
+            if op not in ('+', '-') and fluent in preference:
+                preference[fluent] = 0
+    return preference
+
+
+class ParetoArchive:
+    """
+    Per propositional key, the non-dominated (fluent vector, g) pairs seen
+    so far. A state is dominated if an archived state with the same facts
+    (and equal values on fluents marked 0) is at least as good on every
+    ordered fluent and has g no larger.
+    """
+
+    def __init__(self, task):
+        preference = fluent_preferences(task)
+        self.exact = tuple(f for f, p in preference.items() if p == 0)
+        self.ordered = tuple((f, p) for f, p in preference.items() if p != 0)
+        self.fronts: Dict[tuple, List[list]] = {}  # key -> [[vector, g, node], ...]
+
+    def _key_vector(self, state):
+        fluents = state.numeric_fluents
+        key = (state.bits,) + tuple(fluents.get(f, 0) for f in self.exact)
+        vector = tuple(p * fluents.get(f, 0) for f, p in self.ordered)
+        return key, vector
+
+    def insert(self, node: SearchNode) -> bool:
+        """Archive `node` unless dominated; drop entries it dominates. False if pruned."""
+        key, vector = self._key_vector(node.state)
+        front = self.fronts.setdefault(key, [])
+        for other_vector, other_g, _ in front:
+            if other_g <= node.g and all(o >= v for o, v in zip(other_vector, vector)):
+                return False
+        front[:] = [entry for entry in front
+                    if not (node.g <= entry[1] and all(v >= o for v, o in zip(vector, entry[0])))]
+        front.append([vector, node.g, node])
+        return True
+
+    def is_current(self, node: SearchNode) -> bool:
+        """False once a better state with the same facts has replaced `node`."""
+        key, _ = self._key_vector(node.state)
+        return any(entry[2] is node for entry in self.fronts.get(key, ()))
+
+    def __len__(self):
+        return sum(len(front) for front in self.fronts.values())
+
+
+# ---------------------------------------------------------------------
+# A* OVER A GROUND TASK
+# ---------------------------------------------------------------------
+def astar(task, heuristic: Callable, max_expansions: Optional[int] = None,
+          max_per_schema: Optional[int] = None, weight: float = 1.0,
+          deadline: Optional[float] = None, cost_bound: float = math.inf,
+          dominance: bool = False, stats: Optional[SearchStats] = None) -> Optional[SearchNode]:
+    """
+    (Weighted) A* over a grounding.GroundTask. Returns the goal node (use
+    extract_plan) or None. `max_per_schema` caps successors per action name
+    per expansion; `deadline` is a time.monotonic() timestamp; nodes whose
+    g reaches `cost_bound` are pruned. With `dominance`, duplicate detection
+    uses a ParetoArchive instead of exact signatures, so states that are
+    worse on every numeric resource than a known one are never queued.
+    Counters go to `stats` if given.
+    """
+    stats = stats if stats is not None else SearchStats()
+    clock = time.perf_counter
+    started = clock()
+    root = SearchNode(task.initial_state)
+    counter = 0
+    open_list = [(0, 0, counter, root)]  # (f_score, g_score, tie, node)
+    closed_set = set()
+    archive = ParetoArchive(task) if dominance else None
+    if archive is not None:
+        archive.insert(root)
+
+    step = 0
+    while open_list and (max_expansions is None or step < max_expansions):
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        step += 1
+        _, _, _, node = heapq.heappop(open_list)
+        state = node.state
+
+        if archive is not None:
+            if not archive.is_current(node):
+                stats.duplicates += 1
+                continue  # superseded by a dominating state after it was queued
+        else:
+            state_sig = state.signature()
+            if state_sig in closed_set:
+                stats.duplicates += 1
+                continue
+            closed_set.add(state_sig)
+
+        if task.is_goal(state):
+            stats.depth = len(extract_path(node))
+            stats.elapsed_ms += (clock() - started) * 1000.0
+            return node
+
+        stats.expanded += 1
+        expand_started = clock()
+        heuristic_time = 0.0
+        per_schema = {}
+        for action in task.applicable(state):
+            if max_per_schema is not None:
+                taken = per_schema.get(action.name, 0)
+                if taken >= max_per_schema:
+                    continue
+                per_schema[action.name] = taken + 1
+
+            g_score = node.g + action.cost
+            if g_score >= cost_bound:
+                continue
+            new_state = action.apply(state)
+            stats.generated += 1
+            child = SearchNode(new_state, node, action.id, g_score)
+            if archive is not None and not archive.insert(child):
+                stats.duplicates += 1
+                continue  # dominated by a state already seen
+            h_started = clock()
+            h_score = heuristic(new_state)
+            heuristic_time += clock() - h_started
+            if h_score == math.inf:
+                continue  # recognised dead end
+            counter += 1
+            heapq.heappush(open_list, (g_score + weight * h_score, g_score, counter, child))
+        stats.heuristic_ms += heuristic_time * 1000.0
+        stats.successor_ms += (clock() - expand_started - heuristic_time) * 1000.0
+        if len(open_list) > stats.peak_open:
+            stats.peak_open = len(open_list)
+
+    stats.elapsed_ms += (clock() - started) * 1000.0
+    return None
+
+
+# ---------------------------------------------------------------------
+# ANYTIME SEARCH
+# ---------------------------------------------------------------------
+@dataclass
+class AnytimeResult:
+    """Best plan found before the deadline plus the improvement trace."""
+    node: Optional[SearchNode]
+    cost: float
+    improvements: List[Tuple[float, float]] = field(default_factory=list)  # (elapsed ms, cost)
+    completed: bool = False  # the final weight-1 pass ran to exhaustion
+
+
+def anytime_search(task, heuristic: Callable, deadline_ms: float,
+                   weights: Tuple[float, ...] = (5.0, 3.0, 2.0, 1.5, 1.0),
+                   dominance: bool = False, stats: Optional[SearchStats] = None) -> AnytimeResult:
+    """
+    Restarting weighted A*: solve greedily first, then re-run with smaller
+    weights, pruning anything that cannot beat the incumbent, until the
+    weights run out or the wall-clock deadline passes.
+    """
+    start = time.monotonic()
+    deadline = start + deadline_ms / 1000.0
+    result = AnytimeResult(node=None, cost=math.inf)
+
+    for weight in weights:
+        if time.monotonic() >= deadline:
+            return result
+        node = astar(task, heuristic, weight=weight, deadline=deadline, cost_bound=result.cost,
+                     dominance=dominance, stats=stats)
+        if node is not None:
+            result.node = node
+            result.cost = node.g
+            result.improvements.append(((time.monotonic() - start) * 1000.0, node.g))
+        elif time.monotonic() >= deadline:
+            return result
+
+    result.completed = True
+    return result
+
+
+# ---------------------------------------------------------------------
+# IDA*: LOW-MEMORY DEPTH-FIRST SEARCH
+# ---------------------------------------------------------------------
+# Transposition table entries kept by ida_star (least recently used dropped first)
+TRANSPOSITION_TABLE_SIZE = 50000
+
+
+class _SearchLimit(Exception):
+    """Expansion cap or deadline reached inside ida_star."""
+
+
+def ida_star(task, heuristic: Callable, max_expansions: Optional[int] = None,
+             deadline: Optional[float] = None,
+             table_size: int = TRANSPOSITION_TABLE_SIZE,
+             stats: Optional[SearchStats] = None) -> Optional[SearchNode]:
+    """
+    Iterative-deepening A*: depth-first passes bounded by f = g + h, the
+    bound rising to the smallest f that exceeded it. Memory is the current
+    path plus a transposition table of at most `table_size` states holding
+    (backed-up h, g of the last visit, pass). It skips states already
+    searched this pass at a g no larger and keeps the raised h estimates
+    between passes. Returns a goal node chain (use extract_plan) or None.
+    """
+    stats = stats if stats is not None else SearchStats()
+    clock = time.perf_counter
+    started = clock()
+    table: 'OrderedDict[tuple, list]' = OrderedDict()
+    path: List[int] = []
+    on_path = set()
+    expansions = 0
+
+    def estimate(signature, state):
+        entry = table.get(signature)
+        if entry is not None:
+            table.move_to_end(signature)
+            return entry[0]
+        h_started = clock()
+        h = heuristic(state)
+        stats.heuristic_ms += (clock() - h_started) * 1000.0
+        return h
+
+    def remember(signature, h, g, iteration):
+        table[signature] = [h, g, iteration]
+        table.move_to_end(signature)
+        if len(table) > table_size:
+            table.popitem(last=False)
+
+    def dfs(state, signature, g, bound, iteration):
+        """Smallest f above `bound` found below this state, or -1 once a goal is on the path."""
+        nonlocal expansions
+        h = estimate(signature, state)
+        if g + h > bound:
+            return g + h
+        if task.is_goal(state):
+            return -1
+        expansions += 1
+        if max_expansions is not None and expansions > max_expansions:
+            raise _SearchLimit()
+        if deadline is not None and expansions & 63 == 0 and time.monotonic() >= deadline:
+            raise _SearchLimit()
+        remember(signature, h, g, iteration)
+        stats.expanded += 1
+        if len(path) + 1 > stats.peak_open:
+            stats.peak_open = len(path) + 1
+
+        exceeded = math.inf
+        successors = task.applicable(state)
+        while True:
+            successor_started = clock()
+            action = next(successors, None)
+            child = action.apply(state) if action is not None else None
+            stats.successor_ms += (clock() - successor_started) * 1000.0
+            if action is None:
+                break
+            stats.generated += 1
+            child_signature = child.signature()
+            child_g = g + action.cost
+            if child_signature in on_path:
+                stats.duplicates += 1
+                continue
+            entry = table.get(child_signature)
+            if entry is not None and entry[2] == iteration and entry[1] <= child_g:
+                stats.duplicates += 1
+                continue  # transposition: already searched this pass from a cheaper g
+            path.append(action.id)
+            on_path.add(child_signature)
+            result = dfs(child, child_signature, child_g, bound, iteration)
+            if result < 0:
+                return result
+            path.pop()
+            on_path.discard(child_signature)
+            exceeded = min(exceeded, result)
+
+        # Nothing below fits the bound: raise this state's estimate for later passes
+        if exceeded - g > h:
+            remember(signature, exceeded - g, g, iteration)
+        return exceeded
+
+    root = task.initial_state
+    root_signature = root.signature()
+    bound = heuristic(root)
+    iteration = 0
+    try:
+        while bound < math.inf:
+            iteration += 1
+            on_path = {root_signature}
+            result = dfs(root, root_signature, 0, bound, iteration)
+            if result < 0:
+                node = SearchNode(root)
+                for action_id in path:
+                    action = task.actions[action_id]
+                    node = SearchNode(action.apply(node.state), node, action_id, node.g + action.cost)
+                stats.depth = len(path)
+                return node
+            bound = result
+    except _SearchLimit:
+        pass
+    finally:
+        stats.elapsed_ms += (clock() - started) * 1000.0
+    return None
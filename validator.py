@@ -0,0 +1,74 @@
+# validator.py
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from grounding import COMPARATORS, iter_bits
+
+
+@dataclass
+class ValidationResult:
+    """Outcome of replaying a plan on a ground task."""
+    valid: bool
+    steps_applied: int
+    failed_step: Optional[int] = None  # index into the plan
+    reason: Optional[str] = None
+    cost: float = 0
+    final_fluents: Dict[str, float] = field(default_factory=dict)
+    final_state: object = None
+
+
+def validate_plan(task, plan: List[str], state=None, require_goal: bool = True) -> ValidationResult:
+    """
+    Replay plan steps on a grounding.GroundTask in one pass, from `state`
+    (default: the task's initial state). Each step is a dict lookup plus
+    bitset tests; the first unknown or inapplicable step stops the replay.
+    """
+    state = task.initial_state if state is None else state
+    cost = 0
+    for index, step in enumerate(plan):
+        action = task.action_for_step(step)
+        if action is None:
+            return _failed(index, f"{step}: unknown action or static precondition false", cost, state)
+        if not action.is_applicable(state):
+            return _failed(index, f"{step}: {_first_unmet(task, action, state)}", cost, state)
+        state = action.apply(state)
+        cost += action.cost
+
+    if require_goal and not task.is_goal(state):
+        return ValidationResult(False, len(plan), None, "goal not reached: " + _unmet_goal(task, state),
+                                cost, dict(state.numeric_fluents), state)
+    return ValidationResult(True, len(plan), None, None, cost, dict(state.numeric_fluents), state)
+
+
+def _failed(index, reason, cost, state) -> ValidationResult:
+    return ValidationResult(False, index, index, reason, cost, dict(state.numeric_fluents), state)
+
+
+def _first_unmet(task, action, state) -> str:
+    """Describe the first precondition of `action` that fails in `state`."""
+    atoms = task.facts.atoms
+    missing = action.pre & ~state.bits
+    if missing:
+        name, args = atoms[next(iter_bits(missing))]
+        return f"requires ({' '.join((name,) + args)})"
+    present = action.neg & state.bits
+    if present:
+        name, args = atoms[next(iter_bits(present))]
+        return f"requires (not ({' '.join((name,) + args)}))"
+    for fluent, op, value in action.numeric_pre:
+        current = state.numeric_fluents.get(fluent, 0)
+        if not COMPARATORS[op](current, value):
+            return f"requires {fluent} {op} {value}, have {current}"
+    return "not applicable"
+
+
+def _unmet_goal(task, state) -> str:
+    missing = task.goal_mask & ~state.bits
+    if missing:
+        name, args = task.facts.atoms[next(iter_bits(missing))]
+        return f"({' '.join((name,) + args)})"
+    for fluent, op, value in task.goal_fluents:
+        current = state.numeric_fluents.get(fluent, 0)
+        if not COMPARATORS[op](current, value):
+            return f"{fluent} {op} {value}, have {current}"
+    return "unknown"